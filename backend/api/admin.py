@@ -3,7 +3,8 @@
 from django.contrib import admin
 from .models import (
     Beneficiary, Loan, EmiDetail, AccountTransaction, 
-    MobileRecharge, ElectricityBill, RationCard, PDSTransaction, UtilityBill
+    MobileRecharge, ElectricityBill, RationCard, PDSTransaction, UtilityBill,
+    BeneficiaryFeatures, ImportLedger, PortfolioSummary
 )
 
 # --- Registering the core models ---
@@ -57,4 +58,21 @@ class RationCardAdmin(admin.ModelAdmin):
 @admin.register(PDSTransaction)
 class PDSTransactionAdmin(admin.ModelAdmin):
     list_display = ('ration_card', 'item_name', 'transaction_date', 'uptake_ratio')
-    search_fields = ('ration_card__ration_card_id',)
\ No newline at end of file
+    search_fields = ('ration_card__ration_card_id',)
+
+# --- Registering model features and import bookkeeping ---
+
+@admin.register(BeneficiaryFeatures)
+class BeneficiaryFeaturesAdmin(admin.ModelAdmin):
+    list_display = ('beneficiary', 'num_emi_records', 'max_dpd', 'total_credit', 'total_debit', 'updated_at')
+    search_fields = ('beneficiary__beneficiary_id', 'beneficiary__full_name')
+
+@admin.register(ImportLedger)
+class ImportLedgerAdmin(admin.ModelAdmin):
+    list_display = ('feed', 'file_name', 'row_count', 'high_water_mark', 'imported_at')
+    readonly_fields = ('imported_at',)
+
+@admin.register(PortfolioSummary)
+class PortfolioSummaryAdmin(admin.ModelAdmin):
+    list_display = ('report', 'bucket', 'count', 'beneficiaries', 'defaults', 'amount', 'refreshed_at')
+    list_filter = ('report',)
@@ -0,0 +1,60 @@
+# api/cache_backends.py
+"""
+Local stand-in for a shared cache such as Redis with an LRU eviction policy.
+
+Django's FileBasedCache is shared by every worker process on the machine,
+but once MAX_ENTRIES is reached it culls a random sample of entries. Here a
+cache hit touches the entry's file, and culling removes the 1/CULL_FREQUENCY
+least recently used entries (oldest modification time) instead, so the hot
+profiles and the invalidation generations stay cached. The modification time
+comes from the handle the hit already reads, and a file is touched at most
+once per TOUCH_INTERVAL, so hot keys don't write to the filesystem on every get.
+"""
+import os
+import pickle
+import time
+import zlib
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+# Seconds within which a hit does not touch its file again, so the LRU order
+# is only this precise.
+TOUCH_INTERVAL = 60
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """FileBasedCache that evicts least recently used entries rather than random ones."""
+
+    def get(self, key, default=None, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            with open(fname, 'rb') as f:
+                if not self._is_expired(f):
+                    value = pickle.loads(zlib.decompress(f.read()))
+                    self._touch_used(f)
+                    return value
+        except FileNotFoundError:
+            pass
+        return default
+
+    def _touch_used(self, f):
+        """Marks the open cache file as used, unless that was done in the last TOUCH_INTERVAL."""
+        if time.time() - os.fstat(f.fileno()).st_mtime >= TOUCH_INTERVAL:
+            os.utime(f.fileno() if os.utime in os.supports_fd else f.name)
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        last_used = []
+        for fname in filelist:
+            try:
+                last_used.append((os.stat(fname).st_mtime_ns, fname))
+            except FileNotFoundError:
+                continue
+        last_used.sort()
+        for _, fname in last_used[:num_entries // self._cull_frequency]:
+            self._delete(fname)
@@ -0,0 +1,151 @@
+# api/fast_serializers.py
+"""
+Read-only fast path for the list and retrieve endpoints.
+
+A ModelSerializer builds and walks a tree of Field objects for every row.
+For the flat `fields = '__all__'` serializers in serializers.py the output
+is fully determined by the field list, so `compile_serializer` does that
+walk once per serializer class. It yields the `.values()` columns to fetch
+and a plain function turning one values() dict into the same dict DRF would
+render. Plain types pass through untouched. Dates, aware datetimes and
+decimals use inlined copies of DRF's default ISO-8601 and coerce-to-string
+formatting. Anything else goes through the field's own to_representation,
+so the JSON is identical.
+
+`FastJSONRenderer` encodes with orjson when it is installed and falls back
+to DRF's JSONRenderer otherwise.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+    # datetime, date and time objects go through DRF's JSONEncoder.default, so
+    # e.g. UTC datetimes keep DRF's 'Z' suffix rather than orjson's '+00:00'
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+except ImportError:  # optional; the standard json renderer is used instead
+    orjson = None
+
+# Fields whose to_representation returns a values() cell unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.FloatField, serializers.PrimaryKeyRelatedField,
+)
+
+_compiled = {}
+
+
+def _is_iso(output_format):
+    return output_format is not None and output_format.lower() == ISO_8601
+
+def _converter(field):
+    """
+    A one-argument function giving `field`'s representation of a non-null
+    values() cell, or None when the cell passes through unchanged.
+    """
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.DateTimeField) and _is_iso(getattr(field, 'format', api_settings.DATETIME_FORMAT)):
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if tz is not None:
+            def convert(value):
+                if value.tzinfo is None:
+                    return field.to_representation(value)
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return convert
+    elif isinstance(field, serializers.DateField) and _is_iso(getattr(field, 'format', api_settings.DATE_FORMAT)):
+        return lambda value: value.isoformat()
+    elif (isinstance(field, serializers.DecimalField)
+          and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) and not field.localize
+          and not field.normalize_output and field.rounding is None):
+        # The database backend already returns the column's scale, which the
+        # ModelSerializer field shares, so quantize() would be a no-op.
+        return lambda value: f'{value:f}'
+    return field.to_representation
+
+
+def compile_serializer(serializer_class):
+    """
+    Returns (values() column names, row function) for a flat ModelSerializer.
+    Raises TypeError for serializers with nested, method or multi-valued
+    fields, which need the regular DRF path.
+    """
+    if serializer_class in _compiled:
+        return _compiled[serializer_class]
+
+    columns, plan = [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                              serializers.ManyRelatedField)) or '.' in field.source or field.source == '*':
+            raise TypeError(f"{serializer_class.__name__}.{name} cannot be rendered from .values()")
+        columns.append(field.source)
+        plan.append((name, field.source, _converter(field)))
+
+    def render_row(row):
+        out = {}
+        for name, source, convert in plan:
+            value = row[source]
+            out[name] = value if convert is None or value is None else convert(value)
+        return out
+
+    _compiled[serializer_class] = (columns, render_row)
+    return columns, render_row
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when available, with the same output as DRF's."""
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+
+
+class FastReadMixin:
+    """
+    Serves list and retrieve from `.values()` rows rendered by the compiled
+    serializer. Writes still go through the regular ModelSerializer.
+    """
+    def fast_serializer(self):
+        return compile_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        columns, render_row = self.fast_serializer()
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([render_row(row) for row in page])
+        return Response([render_row(row) for row in queryset])
+
+    def retrieve(self, request, *args, **kwargs):
+        columns, render_row = self.fast_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]}).values(*columns).first()
+        except (TypeError, ValueError, ValidationError):
+            row = None
+        if row is None:
+            raise Http404
+        return Response(render_row(row))
+
+    def export_rows(self, queryset):
+        columns, render_row = self.fast_serializer()
+        for row in queryset.values(*columns).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield render_row(row)
+
+    def stream_ndjson(self, rows):
+        if orjson is None:
+            yield from super().stream_ndjson(rows)
+            return
+        default = JSONEncoder().default
+        for row in rows:
+            yield orjson.dumps(row, default=default, option=ORJSON_OPTIONS) + b'\n'
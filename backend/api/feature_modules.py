@@ -0,0 +1,259 @@
+# api/feature_modules.py
+"""
+Pluggable feature modules: the model's feature families and the pipeline
+that combines them.
+
+A module is registered with `@feature_module(name, source, columns)`. It
+computes its columns from one source's event rows in a single grouped,
+vectorized pass, and returns a frame indexed by beneficiary. The
+`compute_features` pipeline:
+  * takes each source frame once (the caller reads every CSV or table once);
+  * runs every registered module on its source;
+  * concatenates the families with one aligned pd.concat.
+`attach` then joins the result to the beneficiary frame in a single join.
+
+Sources use the normalized columns in SOURCE_COLUMNS. model.py renames its
+CSV columns to them, and api/features.py reads them from the tables for the
+windowed modules, so the 'csv', 'db' and 'store' feature sources run the same
+code. The all-time modules also have equivalent database aggregates there.
+
+When a beneficiary has no rows in a source, that source's columns are 0.
+The exception is the columns a module lists as `missing` (ratios, shares,
+averages of optional values, days since), which stay NaN for the imputer.
+The modules and their column order:
+  emi_aggregates, account_flows, recharge_totals, electricity_totals
+      the all-time aggregates stored in BeneficiaryFeatures' columns
+  *_windowed, *_recency
+      the 30/90/180-day families of api/windowed_features.py, as of `as_of`,
+      each followed by its days since the last event
+  recurring_transactions, recharge_usage, electricity_payments, utilities, pds
+      recurring debits, merchant spread, auto-pay and data usage, late/unpaid
+      bills and subsidies, utility arrears, ration uptake
+Adding a family is one decorated function here; feature_columns() and the
+store pick it up. A module that only looks at recent rows declares its
+`horizon`, so api/features.py reads no older rows for it.
+"""
+import pandas as pd
+
+from .windowed_features import (
+    ADDITIVE_COLUMNS, BUILDERS, HORIZON, RECENCY_BUILDERS, RECENCY_COLUMNS, WINDOWED_COLUMNS, WINDOWS, as_day,
+    numeric,
+)
+
+# Normalized columns per source (beneficiary_id first)
+SOURCE_COLUMNS = {
+    'emis': ['beneficiary_id', 'emi_record_id', 'due_date', 'paid_date', 'amount', 'dpd_days'],
+    'transactions': ['beneficiary_id', 'timestamp', 'type', 'amount', 'balance', 'is_recurring',
+                     'merchant_category'],
+    'recharges': ['beneficiary_id', 'date', 'amount', 'is_auto_pay', 'data_usage_gb'],
+    'electricity': ['beneficiary_id', 'due_date', 'payment_date', 'status', 'amount', 'subsidy'],
+    'utilities': ['beneficiary_id', 'utility_type', 'due_date', 'amount', 'payment_date', 'arrears'],
+    'pds': ['beneficiary_id', 'card_type', 'family_members', 'date', 'allocated_kg', 'uptake_kg',
+            'uptake_ratio'],
+}
+
+
+class FeatureModule:
+    """
+    One feature family: `columns` computed by `build(frame, as_of)` from one
+    source. A module with a `horizon` only uses the rows dated up to that many
+    days before as_of; the others use every row.
+    """
+    def __init__(self, name, source, columns, build, missing=(), horizon=None):
+        if source not in SOURCE_COLUMNS:
+            raise ValueError(f"Unknown feature source '{source}'. Available: {', '.join(SOURCE_COLUMNS)}.")
+        self.name = name
+        self.source = source
+        self.columns = list(columns)
+        self.build = build
+        self.missing = set(missing)
+        self.horizon = horizon
+
+    def __repr__(self):
+        return f"FeatureModule({self.name!r}, {self.source!r}, {len(self.columns)} columns)"
+
+# Registered modules, in column order
+FEATURE_MODULES = {}
+
+def feature_module(name, source, columns, missing=(), horizon=None):
+    """Registers the decorated `build(frame, as_of)` as the feature module `name`."""
+    def register(build):
+        if name in FEATURE_MODULES:
+            raise ValueError(f"Feature module '{name}' is already registered.")
+        FEATURE_MODULES[name] = FeatureModule(name, source, columns, build, missing, horizon)
+        return build
+    return register
+
+def selected_modules(names=None):
+    """The registered modules named in `names` (all of them when None), in registration order."""
+    if names is None:
+        return list(FEATURE_MODULES.values())
+    unknown = set(names) - set(FEATURE_MODULES)
+    if unknown:
+        raise ValueError(f"Unknown feature modules: {', '.join(sorted(unknown))}. "
+                         f"Available: {', '.join(FEATURE_MODULES)}.")
+    return [module for module in FEATURE_MODULES.values() if module.name in names]
+
+def feature_columns(names=None):
+    """Every column the modules in `names` compute, in order."""
+    return [col for module in selected_modules(names) for col in module.columns]
+
+def missing_columns(names=None):
+    """The columns that stay NaN, rather than 0, for a beneficiary without rows."""
+    return {col for module in selected_modules(names) for col in module.missing}
+
+
+def _flag(values):
+    """Booleans from bools or 'True'/'1'/'yes' strings; anything else is False."""
+    if values.dtype == bool:
+        return values
+    return values.astype(str).str.strip().str.lower().isin(('true', '1', 'yes'))
+
+def _category(values):
+    """Text values with blanks as missing, so nunique() skips them."""
+    return values.where(values.astype(str).str.strip() != '')
+
+
+# ---- All-time aggregates (the BeneficiaryFeatures columns) ----
+@feature_module('emi_aggregates', 'emis', ['num_emi_records', 'total_emi_amount', 'avg_dpd', 'max_dpd'])
+def emi_aggregates(frame, as_of):
+    return (frame.assign(amount=numeric(frame['amount']), dpd_days=numeric(frame['dpd_days']).fillna(0))
+            .groupby('beneficiary_id')
+            .agg(num_emi_records=('emi_record_id', 'nunique'), total_emi_amount=('amount', 'sum'),
+                 avg_dpd=('dpd_days', 'mean'), max_dpd=('dpd_days', 'max')))
+
+@feature_module('account_flows', 'transactions', ['total_credit', 'total_debit'])
+def account_flows(frame, as_of):
+    kind = frame['type'].astype(str).str.upper()
+    amount = numeric(frame['amount']).fillna(0)
+    return (frame.assign(credit=amount.where(kind == 'CREDIT', 0.0), debit=amount.where(kind == 'DEBIT', 0.0))
+            .groupby('beneficiary_id').agg(total_credit=('credit', 'sum'), total_debit=('debit', 'sum')))
+
+@feature_module('recharge_totals', 'recharges', ['mob_total_recharge', 'mob_avg_recharge'])
+def recharge_totals(frame, as_of):
+    return (frame.assign(amount=numeric(frame['amount']).fillna(0)).groupby('beneficiary_id')
+            .agg(mob_total_recharge=('amount', 'sum'), mob_avg_recharge=('amount', 'mean')))
+
+@feature_module('electricity_totals', 'electricity', ['elec_total', 'elec_avg'])
+def electricity_totals(frame, as_of):
+    return (frame.assign(amount=numeric(frame['amount']).fillna(0)).groupby('beneficiary_id')
+            .agg(elec_total=('amount', 'sum'), elec_avg=('amount', 'mean')))
+
+
+# ---- Time-windowed families (api/windowed_features.py) ----
+def _windowed_module(source, prefix):
+    columns = [col for col in WINDOWED_COLUMNS if col.startswith(prefix) and col not in RECENCY_COLUMNS]
+    build = BUILDERS[source]
+    feature_module(f'{source}_windowed', source, columns, horizon=HORIZON,
+                   missing=[col for col in columns if col not in ADDITIVE_COLUMNS])(
+        lambda frame, as_of: build(frame, as_of, WINDOWS)
+    )
+    recency = [col for col in RECENCY_COLUMNS if col.startswith(prefix)]
+    if recency:
+        feature_module(f'{source}_recency', source, recency, missing=recency)(RECENCY_BUILDERS[source])
+
+_windowed_module('transactions', 'txn_')
+_windowed_module('emis', 'emi_')
+_windowed_module('recharges', 'mob_')
+_windowed_module('electricity', 'elec_')
+
+
+# ---- Recurring transactions, recharge usage, bill payments, utilities, PDS ----
+@feature_module('recurring_transactions', 'transactions',
+                ['txn_recurring_share', 'txn_recurring_debit', 'txn_merchant_categories'],
+                missing=['txn_recurring_share'])
+def recurring_transactions(frame, as_of):
+    recurring = _flag(frame['is_recurring'])
+    debit = frame['type'].astype(str).str.upper() == 'DEBIT'
+    amount = numeric(frame['amount']).fillna(0)
+    return (frame.assign(recurring=recurring.astype(float), recurring_debit=amount.where(recurring & debit, 0.0),
+                         merchant_category=_category(frame['merchant_category']))
+            .groupby('beneficiary_id')
+            .agg(txn_recurring_share=('recurring', 'mean'), txn_recurring_debit=('recurring_debit', 'sum'),
+                 txn_merchant_categories=('merchant_category', 'nunique')))
+
+@feature_module('recharge_usage', 'recharges', ['mob_auto_pay_share', 'mob_avg_data_gb'],
+                missing=['mob_auto_pay_share', 'mob_avg_data_gb'])
+def recharge_usage(frame, as_of):
+    return (frame.assign(auto_pay=_flag(frame['is_auto_pay']).astype(float), data_gb=numeric(frame['data_usage_gb']))
+            .groupby('beneficiary_id').agg(mob_auto_pay_share=('auto_pay', 'mean'), mob_avg_data_gb=('data_gb', 'mean')))
+
+@feature_module('electricity_payments', 'electricity',
+                ['elec_late_share', 'elec_unpaid_share', 'elec_total_subsidy', 'elec_subsidy_share'],
+                missing=['elec_late_share', 'elec_unpaid_share', 'elec_subsidy_share'])
+def electricity_payments(frame, as_of):
+    status = frame['status'].astype(str).str.strip().str.lower()
+    grouped = (frame.assign(late=(status == 'late').astype(float), unpaid=(status == 'unpaid').astype(float),
+                            amount=numeric(frame['amount']).fillna(0), subsidy=numeric(frame['subsidy']).fillna(0))
+               .groupby('beneficiary_id')
+               .agg(elec_late_share=('late', 'mean'), elec_unpaid_share=('unpaid', 'mean'),
+                    elec_total_subsidy=('subsidy', 'sum'), billed=('amount', 'sum')))
+    grouped['elec_subsidy_share'] = grouped['elec_total_subsidy'] / grouped['billed'].where(grouped['billed'] > 0)
+    return grouped.drop(columns='billed')
+
+@feature_module('utilities', 'utilities',
+                ['util_bills', 'util_types', 'util_total', 'util_avg', 'util_total_arrears', 'util_max_arrears',
+                 'util_arrears_ratio', 'util_late_share'],
+                missing=['util_arrears_ratio', 'util_late_share'])
+def utilities(frame, as_of):
+    due = as_day(frame['due_date'])
+    paid = as_day(frame['payment_date'])
+    late = paid.isna() | (paid > due)       # paid after the due date, or not paid
+    grouped = (frame.assign(amount=numeric(frame['amount']).fillna(0), arrears=numeric(frame['arrears']).fillna(0),
+                            late=late.astype(float), utility_type=_category(frame['utility_type']))
+               .groupby('beneficiary_id')
+               .agg(util_bills=('amount', 'size'), util_types=('utility_type', 'nunique'),
+                    util_total=('amount', 'sum'), util_avg=('amount', 'mean'),
+                    util_total_arrears=('arrears', 'sum'), util_max_arrears=('arrears', 'max'),
+                    util_late_share=('late', 'mean')))
+    grouped['util_arrears_ratio'] = grouped['util_total_arrears'] / grouped['util_total'].where(grouped['util_total'] > 0)
+    return grouped
+
+@feature_module('pds', 'pds',
+                ['pds_transactions', 'pds_allocated_kg', 'pds_uptake_kg', 'pds_avg_uptake_ratio',
+                 'pds_min_uptake_ratio', 'pds_bpl', 'pds_family_members'],
+                missing=['pds_avg_uptake_ratio', 'pds_min_uptake_ratio', 'pds_family_members'])
+def pds(frame, as_of):
+    return (frame.assign(allocated=numeric(frame['allocated_kg']).fillna(0), uptake=numeric(frame['uptake_kg']).fillna(0),
+                         ratio=numeric(frame['uptake_ratio']), family=numeric(frame['family_members']),
+                         bpl=(frame['card_type'].astype(str).str.strip().str.upper() == 'BPL').astype(float))
+            .groupby('beneficiary_id')
+            .agg(pds_transactions=('allocated', 'size'), pds_allocated_kg=('allocated', 'sum'),
+                 pds_uptake_kg=('uptake', 'sum'), pds_avg_uptake_ratio=('ratio', 'mean'),
+                 pds_min_uptake_ratio=('ratio', 'min'), pds_bpl=('bpl', 'max'),
+                 pds_family_members=('family', 'max')))
+
+
+# ---- Pipeline ----
+def compute_features(sources, as_of=None, modules=None):
+    """
+    Runs the modules named in `modules` (all when None) on `sources`, a dict
+    mapping source name to a DataFrame with its SOURCE_COLUMNS. Returns one
+    frame indexed by beneficiary, with every feature_columns(modules) column,
+    for the beneficiaries with rows in any source. Missing or empty sources
+    are skipped. `as_of` (default today) is the date the windowed modules
+    count back from.
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else 'today').normalize()
+    selected = selected_modules(modules)
+    parts = [module.build(sources[module.source], as_of) for module in selected
+             if sources.get(module.source) is not None and len(sources[module.source])]
+    return combine_features(parts, modules)
+
+def combine_features(parts, modules=None):
+    """Module results (frames indexed by beneficiary) as one frame with every feature_columns(modules) column."""
+    columns = feature_columns(modules)
+    if not parts:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='beneficiary_id'), dtype=float)
+    return fill_missing(pd.concat(parts, axis=1, join='outer').reindex(columns=columns).astype(float), modules)
+
+def fill_missing(frame, modules=None):
+    """Sets the module columns of beneficiaries without rows to 0, except missing_columns(), which stay NaN."""
+    keep = missing_columns(modules)
+    zero = [col for col in feature_columns(modules) if col in frame.columns and col not in keep]
+    frame[zero] = frame[zero].fillna(0.0)
+    return frame
+
+def attach(base, features, modules=None):
+    """`base` (indexed by beneficiary) joined with `features` in one aligned join, gaps filled."""
+    return fill_missing(base.join(features, how='left'), modules)
@@ -0,0 +1,282 @@
+# api/features.py
+"""
+Per-beneficiary model features read from the imported tables.
+
+`module_features` produces the same frame as `build_features()` in model.py,
+which uses it when CONFIG['feature_source'] is 'db'. The all-time modules
+(counts, sums, means, shares and last dates, listed in DATABASE_MODULES) run
+as one GROUP BY per module in the database. Only the modules without one, the
+windowed families, get raw rows: `source_frames` reads each table they need
+once (one values_list query per source), restricted to the given
+beneficiaries and to the module's horizon before `as_of`, into the normalized
+frames of api/feature_modules.py.
+
+`refresh_features` writes the result to the BeneficiaryFeatures table: the
+all-time aggregates to its columns (FEATURE_COLUMNS) and every other module
+column to its `event_features` JSON, stamped with the date it is as of. The
+importers call it once an import finishes, for every beneficiary it touched, so
+the table stays current without re-aggregating the whole book. Readers
+serve the stored windows as of the day they were stored; `python
+import_data.py features` (e.g. nightly) moves the windows of every row not
+yet as of today forward (`refresh_stale_features`).
+"""
+import math
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import pandas as pd
+from django.db.models import Avg, Case, Count, DateTimeField, F, FloatField, Max, Min, Q, Sum, Value, When
+from django.utils import timezone
+
+from .feature_modules import (
+    SOURCE_COLUMNS, combine_features, compute_features, feature_columns, missing_columns, selected_modules,
+)
+from .models import (
+    Beneficiary, BeneficiaryFeatures, EmiDetail, AccountTransaction, MobileRecharge, ElectricityBill,
+    PDSTransaction, UtilityBill
+)
+
+# The all-time aggregates (feature_modules' first four modules) stored as BeneficiaryFeatures columns.
+FEATURE_COLUMNS = [
+    'num_emi_records', 'total_emi_amount', 'avg_dpd', 'max_dpd',
+    'total_credit', 'total_debit',
+    'mob_total_recharge', 'mob_avg_recharge',
+    'elec_total', 'elec_avg',
+]
+
+# Beneficiaries aggregated per round of queries; bounds memory and IN-list size.
+REFRESH_BATCH_SIZE = 5000
+
+# Module columns kept in BeneficiaryFeatures.event_features rather than in its own columns
+EVENT_COLUMNS = [col for col in feature_columns() if col not in FEATURE_COLUMNS]
+
+# Stored event features of a beneficiary without any rows
+NO_EVENTS = {col: None if col in missing_columns() else 0.0 for col in EVENT_COLUMNS}
+
+# feature_modules source -> (queryset, beneficiary lookup, date a module's horizon applies to,
+#                            fields in SOURCE_COLUMNS order after the beneficiary)
+EVENT_SOURCES = {
+    'emis': (EmiDetail.objects, 'loan__beneficiary', 'emi_due_date',
+             ['emi_record_id', 'emi_due_date', 'emi_paid_date', 'emi_amount', 'dpd_days']),
+    'transactions': (AccountTransaction.objects, 'beneficiary', 'transaction_timestamp',
+                     ['transaction_timestamp', 'transaction_type', 'amount', 'current_balance', 'is_recurring',
+                      'merchant_category']),
+    'recharges': (MobileRecharge.objects, 'beneficiary', 'bill_payment_date',
+                  ['bill_payment_date', 'recharge_amount', 'is_auto_pay', 'data_usage_gb']),
+    'electricity': (ElectricityBill.objects, 'beneficiary', 'due_date',
+                    ['due_date', 'payment_date', 'payment_status', 'bill_amount', 'subsidy_amount']),
+    'utilities': (UtilityBill.objects, 'beneficiary', 'bill_due_date',
+                  ['utility_type', 'bill_due_date', 'bill_amount', 'payment_date', 'arrears_amount']),
+    'pds': (PDSTransaction.objects, 'ration_card__beneficiary', 'transaction_date',
+            ['ration_card__card_type', 'ration_card__num_family_members', 'transaction_date',
+             'allocated_quantity_kg', 'actual_uptake_quantity_kg', 'uptake_ratio']),
+}
+
+
+# ---- All-time modules as database aggregates ----
+# Sums and means come back as floats, as the pandas modules compute them
+# (a decimal output would be rounded to the column's scale).
+def _sum(field, **extra):
+    return Sum(field, output_field=FloatField(), **extra)
+
+def _mean(field):
+    return Avg(field, output_field=FloatField())
+
+def _share(condition):
+    """Mean of a 0/1 flag, i.e. the share of rows matching `condition`."""
+    return Avg(Case(When(condition, then=Value(1.0)), default=Value(0.0), output_field=FloatField()))
+
+def _present(field):
+    """Rows with a non-blank `field`, counted as distinct values as pandas nunique() does."""
+    return Count(field, distinct=True, filter=~Q(**{field: ''}))
+
+def _ratio(column, numerator, denominator):
+    def finish(frame, as_of):
+        frame[column] = frame[numerator] / frame[denominator].where(frame[denominator] > 0)
+        return frame
+    return finish
+
+def _days_since(column):
+    def finish(frame, as_of):
+        frame[column] = (as_of - pd.to_datetime(frame[column])) / pd.Timedelta(days=1)
+        return frame
+    return finish
+
+# feature module -> (as_of -> {column: aggregate over its source's rows}, finish(frame, as_of) or None)
+# Same definitions as the pandas modules of api/feature_modules.py; the parity
+# tests compare the two. Modules left out get raw rows (see source_frames).
+DATABASE_MODULES = {
+    'emi_aggregates': (lambda as_of: {
+        'num_emi_records': Count('emi_record_id', distinct=True), 'total_emi_amount': _sum('emi_amount'),
+        'avg_dpd': _mean('dpd_days'), 'max_dpd': Max('dpd_days'),
+    }, None),
+    'account_flows': (lambda as_of: {
+        'total_credit': _sum('amount', filter=Q(transaction_type='CREDIT')),
+        'total_debit': _sum('amount', filter=Q(transaction_type='DEBIT')),
+    }, None),
+    'recharge_totals': (lambda as_of: {
+        'mob_total_recharge': _sum('recharge_amount'), 'mob_avg_recharge': _mean('recharge_amount'),
+    }, None),
+    'electricity_totals': (lambda as_of: {
+        'elec_total': _sum('bill_amount'), 'elec_avg': _mean('bill_amount'),
+    }, None),
+    'emis_recency': (lambda as_of: {
+        'emi_days_since_last_payment': Max('emi_paid_date', filter=Q(emi_due_date__lte=as_of,
+                                                                     emi_paid_date__lte=as_of)),
+    }, _days_since('emi_days_since_last_payment')),
+    'recharges_recency': (lambda as_of: {
+        'mob_days_since_last_recharge': Max('bill_payment_date', filter=Q(bill_payment_date__lte=as_of)),
+    }, _days_since('mob_days_since_last_recharge')),
+    'electricity_recency': (lambda as_of: {
+        'elec_days_since_last_payment': Max('payment_date', filter=Q(due_date__lte=as_of,
+                                                                     payment_date__lte=as_of)),
+    }, _days_since('elec_days_since_last_payment')),
+    'recurring_transactions': (lambda as_of: {
+        'txn_recurring_share': _share(Q(is_recurring=True)),
+        'txn_recurring_debit': _sum('amount', filter=Q(is_recurring=True, transaction_type='DEBIT')),
+        'txn_merchant_categories': _present('merchant_category'),
+    }, None),
+    'recharge_usage': (lambda as_of: {
+        'mob_auto_pay_share': _share(Q(is_auto_pay=True)), 'mob_avg_data_gb': _mean('data_usage_gb'),
+    }, None),
+    'electricity_payments': (lambda as_of: {
+        'elec_late_share': _share(Q(payment_status__iexact='late')),
+        'elec_unpaid_share': _share(Q(payment_status__iexact='unpaid')),
+        'elec_total_subsidy': _sum('subsidy_amount'), 'billed': _sum('bill_amount'),
+    }, _ratio('elec_subsidy_share', 'elec_total_subsidy', 'billed')),
+    'utilities': (lambda as_of: {
+        'util_bills': Count('pk'), 'util_types': _present('utility_type'),
+        'util_total': _sum('bill_amount'), 'util_avg': _mean('bill_amount'),
+        'util_total_arrears': _sum('arrears_amount'),
+        'util_max_arrears': Max('arrears_amount', output_field=FloatField()),
+        'util_late_share': _share(Q(payment_date__isnull=True) | Q(payment_date__gt=F('bill_due_date'))),
+    }, _ratio('util_arrears_ratio', 'util_total_arrears', 'util_total')),
+    'pds': (lambda as_of: {
+        'pds_transactions': Count('pk'), 'pds_allocated_kg': _sum('allocated_quantity_kg'),
+        'pds_uptake_kg': _sum('actual_uptake_quantity_kg'), 'pds_avg_uptake_ratio': _mean('uptake_ratio'),
+        'pds_min_uptake_ratio': Min('uptake_ratio'), 'pds_bpl': Max(Case(
+            When(ration_card__card_type__iexact='BPL', then=Value(1.0)), default=Value(0.0),
+            output_field=FloatField())),
+        'pds_family_members': Max('ration_card__num_family_members'),
+    }, None),
+}
+
+
+def database_features(module, beneficiary_pks=None, as_of=None, chunk_size=REFRESH_BATCH_SIZE):
+    """One DATABASE_MODULES module as a single GROUP BY, indexed by beneficiary pk."""
+    aggregates, finish = DATABASE_MODULES[module.name]
+    queryset, beneficiary_field, _, _ = EVENT_SOURCES[module.source]
+    if beneficiary_pks is not None:
+        queryset = queryset.filter(**{f'{beneficiary_field}__in': beneficiary_pks})
+    aggregates = aggregates(as_of.date())
+    rows = (queryset.order_by().values(beneficiary_field).annotate(**aggregates)
+            .values_list(beneficiary_field, *aggregates).iterator(chunk_size=chunk_size))
+    frame = pd.DataFrame.from_records(rows, columns=['beneficiary_id', *aggregates]).set_index('beneficiary_id')
+    if finish is not None:
+        frame = finish(frame, as_of)
+    return frame[module.columns].astype(float)
+
+def _date_range(queryset, date_field, as_of, horizon):
+    """Lookups keeping the rows dated in the `horizon` days up to as_of (UTC days, as the windows count them)."""
+    first, last = (as_of - pd.Timedelta(days=horizon)).date(), as_of.date() + timedelta(days=1)
+    if isinstance(queryset.model._meta.get_field(date_field), DateTimeField):
+        first, last = (datetime.combine(day, time.min, tzinfo=dt_timezone.utc) for day in (first, last))
+    return {f'{date_field}__gte': first, f'{date_field}__lt': last}
+
+def source_frames(beneficiary_pks=None, chunk_size=REFRESH_BATCH_SIZE, modules=None, as_of=None):
+    """
+    {source: DataFrame with its SOURCE_COLUMNS}, keyed by beneficiary pk,
+    for `beneficiary_pks` (every row when None), with the rows the modules
+    in `modules` (all when None) use: only the sources they read, and only
+    the last `horizon` days before `as_of` (default today) when every module
+    on a source has one. One query per table.
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else 'today').normalize()
+    horizons = {}
+    for module in selected_modules(modules):
+        known = horizons.get(module.source, 0)
+        horizons[module.source] = None if None in (known, module.horizon) else max(known, module.horizon)
+    frames = {}
+    for name, horizon in horizons.items():
+        queryset, beneficiary_field, date_field, fields = EVENT_SOURCES[name]
+        if beneficiary_pks is not None:
+            queryset = queryset.filter(**{f'{beneficiary_field}__in': beneficiary_pks})
+        if horizon is not None:
+            queryset = queryset.filter(**_date_range(queryset, date_field, as_of, horizon))
+        rows = queryset.order_by().values_list(beneficiary_field, *fields).iterator(chunk_size=chunk_size)
+        frames[name] = pd.DataFrame.from_records(rows, columns=SOURCE_COLUMNS[name])
+    return frames
+
+def module_features(beneficiary_pks=None, as_of=None, modules=None, chunk_size=REFRESH_BATCH_SIZE):
+    """
+    compute_features() for `beneficiary_pks` (everyone with rows when None),
+    indexed by beneficiary pk: DATABASE_MODULES in the database, the other
+    modules on source_frames().
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else 'today').normalize()
+    selected = selected_modules(modules)
+    parts = [database_features(module, beneficiary_pks, as_of, chunk_size)
+             for module in selected if module.name in DATABASE_MODULES]
+    rest = [module.name for module in selected if module.name not in DATABASE_MODULES]
+    if rest:
+        frames = source_frames(beneficiary_pks, chunk_size, rest, as_of)
+        parts.append(compute_features(frames, as_of=as_of, modules=rest))
+    return combine_features(parts, modules)
+
+def _json_values(row):
+    """A feature row as a JSON-safe dict (NaN -> None)."""
+    return {col: None if math.isnan(value) else value for col, value in row.items()}
+
+def refresh_features(beneficiary_pks=None):
+    """
+    Recomputes and upserts the BeneficiaryFeatures rows of `beneficiary_pks`
+    (every beneficiary when None), in batches of REFRESH_BATCH_SIZE.
+    Returns the number of rows written.
+    """
+    if beneficiary_pks is None:
+        beneficiary_pks = _beneficiary_pks(Beneficiary.objects.all())
+    written = 0
+    batch = []
+    for pk in beneficiary_pks:
+        batch.append(pk)
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            written += _refresh_batch(batch)
+            batch = []
+    if batch:
+        written += _refresh_batch(batch)
+    return written
+
+def refresh_stale_features():
+    """
+    Refreshes the beneficiaries without a BeneficiaryFeatures row or with
+    event features as of an earlier day, moving their windows to today.
+    Returns the number of rows written.
+    """
+    stale = Beneficiary.objects.exclude(features__event_features_as_of=timezone.localdate())
+    return refresh_features(_beneficiary_pks(stale))
+
+def _beneficiary_pks(queryset):
+    """Yields the Beneficiary pks of `queryset`, paging by key so no cursor stays open across the writes."""
+    last = 0
+    while True:
+        page = list(queryset.filter(pk__gt=last).order_by('pk')
+                    .values_list('pk', flat=True)[:REFRESH_BATCH_SIZE])
+        if not page:
+            return
+        yield from page
+        last = page[-1]
+
+def _refresh_batch(beneficiary_pks):
+    as_of = timezone.localdate()
+    features = module_features(beneficiary_pks, as_of=as_of)
+    aggregates = features[FEATURE_COLUMNS].to_dict('index')
+    events = {pk: _json_values(row) for pk, row in features[EVENT_COLUMNS].to_dict('index').items()}
+    rows = [
+        BeneficiaryFeatures(beneficiary_id=pk, **aggregates.get(pk, dict.fromkeys(FEATURE_COLUMNS, 0)),
+                            event_features=events.get(pk, NO_EVENTS), event_features_as_of=as_of)
+        for pk in beneficiary_pks
+    ]
+    BeneficiaryFeatures.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['beneficiary'],
+        update_fields=FEATURE_COLUMNS + ['event_features', 'event_features_as_of', 'updated_at'],
+    )
+    return len(rows)
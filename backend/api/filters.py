@@ -0,0 +1,147 @@
+# api/filters.py
+"""
+Query-string filters for the list endpoints, restricted to what the indexes serve.
+
+Each viewset declares its `query_filters`: a list of `QueryFilter`s mapping a
+query parameter to an ORM lookup. Filters marked `anchor` lead one of the
+indexes from migration 0004 (or a unique/foreign-key index). The others,
+such as date ranges, are only efficient as the second column of such an
+index. `IndexedFilterBackend` applies them and refuses requests that would
+scan the whole table:
+  * unknown parameters are rejected, so a typo can't silently return everything;
+  * filters without an anchor are rejected (or, with
+    FILTERS_REJECT_UNINDEXED = False, run with a logged warning);
+  * `ordering` is limited to the viewset's indexed date column, and also
+    needs an anchor. The primary key is appended as a tiebreaker.
+
+Example: /api/transactions/?beneficiary_id=NBC_001&last_days=90&transaction_type=debit
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Parameters used by pagination, rendering and exports rather than filtering
+RESERVED_PARAMS = {'cursor', 'page_size', 'format', 'as', 'ordering'}
+
+
+def _positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise ValueError(value)
+    return value
+
+def _parse_date(value):
+    return date.fromisoformat(value)
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(_parse_date(value), time.min))
+
+def _next_day_start(value):
+    return timezone.make_aware(datetime.combine(_parse_date(value) + timedelta(days=1), time.min))
+
+def _days_ago(value):
+    return timezone.localdate() - timedelta(days=int(value))
+
+def _days_ago_start(value):
+    return timezone.make_aware(datetime.combine(_days_ago(value), time.min))
+
+# kind -> converter from the raw query-string value
+PARSERS = {
+    'str': str,
+    'upper': str.upper,
+    'int': int,
+    'positive_int': _positive_int,
+    'date': _parse_date,
+    'day_start': _day_start,            # datetime column, from midnight of the given date
+    'next_day_start': _next_day_start,  # datetime column, up to midnight after the given date
+    'days_ago': _days_ago,              # date column, last N days
+    'days_ago_start': _days_ago_start,  # datetime column, last N days
+}
+
+
+class QueryFilter:
+    """One query parameter: the ORM lookup it feeds, how its value is parsed and whether it anchors an index."""
+    def __init__(self, param, lookup, kind='str', anchor=False, extra=None):
+        self.param = param
+        self.lookup = lookup
+        self.kind = kind
+        self.anchor = anchor
+        self.extra = extra or {}    # fixed lookups added alongside, e.g. to match a partial index
+
+    def __repr__(self):
+        return f"QueryFilter({self.param!r} -> {self.lookup!r}, {self.kind})"
+
+    def filters(self, raw):
+        try:
+            value = PARSERS[self.kind](raw.strip())
+        except (ValueError, OverflowError):    # OverflowError: a date beyond the calendar's range
+            raise ValidationError({self.param: f"Invalid value '{raw}'."})
+        return {self.lookup: value, **self.extra}
+
+
+def date_range_filters(field, datetime_field=False):
+    """date_from / date_to / last_days filters on `field` (inclusive dates)."""
+    if datetime_field:
+        return [
+            QueryFilter('date_from', f'{field}__gte', 'day_start'),
+            QueryFilter('date_to', f'{field}__lt', 'next_day_start'),
+            QueryFilter('last_days', f'{field}__gte', 'days_ago_start'),
+        ]
+    return [
+        QueryFilter('date_from', f'{field}__gte', 'date'),
+        QueryFilter('date_to', f'{field}__lte', 'date'),
+        QueryFilter('last_days', f'{field}__gte', 'days_ago'),
+    ]
+
+
+class IndexedFilterBackend:
+    """Applies a viewset's `query_filters` and `ordering_fields`, refusing unindexed requests."""
+
+    def _requested(self, request, view):
+        available = {f.param: f for f in getattr(view, 'query_filters', [])}
+        unknown = sorted(set(request.query_params) - set(available) - RESERVED_PARAMS)
+        if unknown:
+            raise ValidationError({
+                'filters': f"Unsupported filter(s): {', '.join(unknown)}. "
+                           f"Available: {', '.join(available) or 'none'}."
+            })
+        requested = [available[p] for p in available if request.query_params.get(p, '').strip()]
+        anchors = [f.param for f in available.values() if f.anchor]
+        return requested, anchors
+
+    def _check_indexed(self, view, what, requested, anchors):
+        if any(f.anchor for f in requested):
+            return
+        message = f"{what} needs at least one of: {', '.join(anchors)} (otherwise the whole table is scanned)."
+        if settings.FILTERS_REJECT_UNINDEXED:
+            raise ValidationError({'filters': message})
+        logger.warning("Unindexed query on %s: %s", view.basename, message)
+
+    def filter_queryset(self, request, queryset, view):
+        requested, anchors = self._requested(request, view)
+        if not requested:
+            return queryset
+        self._check_indexed(view, f"Filtering by {', '.join(f.param for f in requested)}", requested, anchors)
+        for query_filter in requested:
+            queryset = queryset.filter(**query_filter.filters(request.query_params[query_filter.param]))
+        return queryset
+
+    def get_ordering(self, request, queryset, view):
+        """Used by KeysetPagination: the requested indexed ordering, or None for the default (id)."""
+        ordering = request.query_params.get('ordering', '').strip()
+        if not ordering:
+            return None
+        allowed = getattr(view, 'ordering_fields', [])
+        if ordering.lstrip('-') not in allowed:
+            raise ValidationError({'ordering': f"Unsupported ordering '{ordering}'. Available: "
+                                               f"{', '.join(allowed) or 'none'} (prefix with '-' to reverse)."})
+        requested, anchors = self._requested(request, view)
+        self._check_indexed(view, f"Ordering by {ordering.lstrip('-')}", requested, anchors)
+        # The date columns repeat, so the pk breaks ties (in the same direction):
+        # rows sharing a date then keep one order across the cursor's pages.
+        return (ordering, '-pk' if ordering.startswith('-') else 'pk')
@@ -0,0 +1,81 @@
+# api/http_cache.py
+"""
+Conditional GETs and cross-process invalidation for the read endpoints.
+
+Cacheable responses carry an ETag, a hash of everything the body is derived
+from: the score table version, a beneficiary's `updated_at` stamps or the
+summaries' `refreshed_at`, plus the negotiated media type and the current
+data generation (below). Where those include a timestamp, the response also
+carries Last-Modified. A client or proxy that sends them back in
+If-None-Match / If-Modified-Since gets 304 Not Modified, without the body
+being rebuilt or re-sent. The check costs only what computing the validator
+costs: nothing for scores, one indexed query for a profile.
+
+Generations are tokens kept in the shared cache (settings.CACHES), one per
+scope:
+  'data'    bumped by the importers after they write rows;
+  'scores'  bumped by the scoring job after it publishes new scores.
+They are folded into the ETags and into cache keys, so an import or a new
+score file invalidates every cached response, in every worker process.
+The score store also checks the 'scores' generation and reloads straight
+away instead of waiting for its file watcher.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+SCOPES = ('data', 'scores')
+
+
+def _generation_key(scope):
+    return f'generation:{scope}'
+
+def data_generation(scope):
+    """The current generation token of `scope`."""
+    key = _generation_key(scope)
+    token = cache.get(key)
+    if token is None:
+        # Never set, or evicted: start a new generation rather than reuse an old token.
+        cache.add(key, str(time.time_ns()), None)
+        token = cache.get(key)
+    return token
+
+def bump_generation(*scopes):
+    """Starts a new generation of each scope, invalidating what was cached under the old one."""
+    for scope in scopes or SCOPES:
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown cache scope '{scope}'. Available: {', '.join(SCOPES)}.")
+        cache.set(_generation_key(scope), str(time.time_ns()), None)
+
+
+def make_etag(request, scope, *parts):
+    """Strong ETag for the response to `request` built from `parts` and the generation of `scope`."""
+    tag = '|'.join(str(part) for part in (request.accepted_media_type, data_generation(scope), *parts))
+    return quote_etag(hashlib.blake2b(tag.encode(), digest_size=16).hexdigest())
+
+def add_validators(response, etag, last_modified=None):
+    """Sets ETag / Last-Modified and asks clients to revalidate after HTTP_CACHE_MAX_AGE."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, max_age=settings.HTTP_CACHE_MAX_AGE, must_revalidate=True)
+    return response
+
+def conditional_response(request, etag, build, last_modified=None):
+    """
+    304 Not Modified if the client already holds the representation tagged
+    `etag`; otherwise the response returned by `build()`. Successful
+    responses carry the validators either way.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        add_validators(response, etag, last_modified)
+    return response
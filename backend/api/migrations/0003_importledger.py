@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_accounttransaction_electricitybill_loan_emidetail_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(help_text="Importer type, e.g. 'transaction'", max_length=50, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_hash', models.CharField(help_text='SHA-256 of the last imported file', max_length=64)),
+                ('row_count', models.IntegerField(default=0)),
+                ('high_water_mark', models.DateTimeField(blank=True, help_text='Latest event date/time seen in the feed', null=True)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
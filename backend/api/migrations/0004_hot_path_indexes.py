@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_importledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['beneficiary', 'transaction_timestamp'], name='txn_beneficiary_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['transaction_type', 'transaction_timestamp'], name='txn_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='electricitybill',
+            index=models.Index(fields=['beneficiary', 'due_date'], name='elec_beneficiary_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='electricitybill',
+            index=models.Index(fields=['payment_status', 'due_date'], name='elec_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emidetail',
+            index=models.Index(fields=['loan', 'emi_due_date'], name='emi_loan_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emidetail',
+            index=models.Index(fields=['payment_status_detailed', 'emi_due_date'], name='emi_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emidetail',
+            index=models.Index(condition=models.Q(('dpd_days__gt', 0)), fields=['dpd_days'], name='emi_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobilerecharge',
+            index=models.Index(fields=['beneficiary', 'bill_payment_date'], name='recharge_beneficiary_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdstransaction',
+            index=models.Index(fields=['ration_card', 'transaction_date'], name='pds_card_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='utilitybill',
+            index=models.Index(fields=['beneficiary', 'bill_due_date'], name='utility_beneficiary_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='utilitybill',
+            index=models.Index(fields=['utility_type', 'bill_due_date'], name='utility_type_due_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeneficiaryFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_emi_records', models.IntegerField(default=0)),
+                ('total_emi_amount', models.FloatField(default=0)),
+                ('avg_dpd', models.FloatField(default=0)),
+                ('max_dpd', models.FloatField(default=0)),
+                ('total_credit', models.FloatField(default=0)),
+                ('total_debit', models.FloatField(default=0)),
+                ('mob_total_recharge', models.FloatField(default=0)),
+                ('mob_avg_recharge', models.FloatField(default=0)),
+                ('elec_total', models.FloatField(default=0)),
+                ('elec_avg', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('beneficiary', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='api.beneficiary')),
+            ],
+        ),
+    ]
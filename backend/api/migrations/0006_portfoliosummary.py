@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_beneficiaryfeatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.CharField(max_length=50)),
+                ('bucket', models.CharField(max_length=100)),
+                ('position', models.IntegerField(default=0, help_text='Display order within the report')),
+                ('count', models.IntegerField(default=0, help_text='Loans, EMIs or beneficiaries, depending on the report')),
+                ('beneficiaries', models.IntegerField(default=0)),
+                ('defaults', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['report', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('report', 'bucket'), name='portfolio_summary_report_bucket_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_portfoliosummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beneficiaryfeatures',
+            name='windowed',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='beneficiaryfeatures',
+            name='windowed_as_of',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
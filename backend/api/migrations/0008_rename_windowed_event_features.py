@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_beneficiaryfeatures_windowed'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='beneficiaryfeatures',
+            old_name='windowed',
+            new_name='event_features',
+        ),
+        migrations.RenameField(
+            model_name='beneficiaryfeatures',
+            old_name='windowed_as_of',
+            new_name='event_features_as_of',
+        ),
+    ]
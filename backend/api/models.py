@@ -42,6 +42,14 @@ class EmiDetail(models.Model):
     payment_status_detailed = models.CharField(max_length=50)
     dpd_days = models.IntegerField(default=0, help_text="Days Past Due")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['loan', 'emi_due_date'], name='emi_loan_due_idx'),
+            models.Index(fields=['payment_status_detailed', 'emi_due_date'], name='emi_status_due_idx'),
+            # Partial index: only overdue EMIs, for "dpd_days > 0" filters and DPD buckets
+            models.Index(fields=['dpd_days'], name='emi_overdue_idx', condition=models.Q(dpd_days__gt=0)),
+        ]
+
     def __str__(self):
         return self.emi_record_id
 
@@ -62,6 +70,12 @@ class AccountTransaction(models.Model):
     is_recurring = models.BooleanField(default=False)
     location_city = models.CharField(max_length=100, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['beneficiary', 'transaction_timestamp'], name='txn_beneficiary_ts_idx'),
+            models.Index(fields=['transaction_type', 'transaction_timestamp'], name='txn_type_ts_idx'),
+        ]
+
     def __str__(self):
         return self.transaction_id
 
@@ -78,6 +92,11 @@ class MobileRecharge(models.Model):
     is_auto_pay = models.BooleanField(default=False)
     data_usage_gb = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['beneficiary', 'bill_payment_date'], name='recharge_beneficiary_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.beneficiary.full_name} - {self.bill_payment_date}"
 
@@ -96,6 +115,12 @@ class ElectricityBill(models.Model):
     payment_status = models.CharField(max_length=50)
     subsidy_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['beneficiary', 'due_date'], name='elec_beneficiary_due_idx'),
+            models.Index(fields=['payment_status', 'due_date'], name='elec_status_due_idx'),
+        ]
+
     def __str__(self):
         return self.service_id
 
@@ -120,6 +145,11 @@ class PDSTransaction(models.Model):
     actual_uptake_quantity_kg = models.FloatField()
     uptake_ratio = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['ration_card', 'transaction_date'], name='pds_card_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.ration_card.ration_card_id} - {self.transaction_date}"
 
@@ -140,5 +170,77 @@ class UtilityBill(models.Model):
     arrears_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     metered_consumption = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['beneficiary', 'bill_due_date'], name='utility_beneficiary_due_idx'),
+            models.Index(fields=['utility_type', 'bill_due_date'], name='utility_type_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.connection_id
+
+
+# --- 8. PRECOMPUTED MODEL FEATURES ---
+class BeneficiaryFeatures(models.Model):
+    """
+    Per-beneficiary aggregates used by the credit model (see api/features.py).
+    Refreshed for the affected beneficiaries whenever their data is imported.
+    """
+    beneficiary = models.OneToOneField(Beneficiary, on_delete=models.CASCADE, related_name='features')
+    num_emi_records = models.IntegerField(default=0)
+    total_emi_amount = models.FloatField(default=0)
+    avg_dpd = models.FloatField(default=0)
+    max_dpd = models.FloatField(default=0)
+    total_credit = models.FloatField(default=0)
+    total_debit = models.FloatField(default=0)
+    mob_total_recharge = models.FloatField(default=0)
+    mob_avg_recharge = models.FloatField(default=0)
+    elec_total = models.FloatField(default=0)
+    elec_avg = models.FloatField(default=0)
+    # Every other feature-module column (api/feature_modules.py), as of `event_features_as_of`; null = unknown
+    event_features = models.JSONField(default=dict, blank=True)
+    event_features_as_of = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features for {self.beneficiary_id}"
+
+
+# --- 9. IMPORT BOOKKEEPING ---
+class ImportLedger(models.Model):
+    """Fingerprint and high-water mark of the last file applied for each import feed."""
+    feed = models.CharField(max_length=50, unique=True, help_text="Importer type, e.g. 'transaction'")
+    file_name = models.CharField(max_length=255)
+    file_hash = models.CharField(max_length=64, help_text="SHA-256 of the last imported file")
+    row_count = models.IntegerField(default=0)
+    high_water_mark = models.DateTimeField(null=True, blank=True, help_text="Latest event date/time seen in the feed")
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.feed} ({self.file_name})"
+
+
+# --- 10. PORTFOLIO REPORT SUMMARIES ---
+class PortfolioSummary(models.Model):
+    """
+    One row of a precomputed portfolio report (see api/reports.py), e.g. the
+    '31-60' bucket of 'dpd_buckets'. Rebuilt as a whole by
+    refresh_portfolio_summaries(); the report endpoints only read it.
+    """
+    report = models.CharField(max_length=50)
+    bucket = models.CharField(max_length=100)
+    position = models.IntegerField(default=0, help_text="Display order within the report")
+    count = models.IntegerField(default=0, help_text="Loans, EMIs or beneficiaries, depending on the report")
+    beneficiaries = models.IntegerField(default=0)
+    defaults = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'bucket'], name='portfolio_summary_report_bucket_uniq'),
+        ]
+        ordering = ['report', 'position']
+
     def __str__(self):
-        return self.connection_id
\ No newline at end of file
+        return f"{self.report}: {self.bucket}"
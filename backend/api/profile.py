@@ -0,0 +1,91 @@
+# api/profile.py
+"""
+The beneficiary 360° profile behind /api/beneficiaries/<beneficiary_id>/profile/.
+
+`load_profile` fetches a beneficiary with its ration card and features
+(select_related) and each related list through one sliced Prefetch, which
+Django runs as a single windowed query per relation. The newest
+PROFILE_WINDOWS[...] rows are kept per parent, so a profile costs the same
+fixed number of queries however much history the beneficiary has.
+
+Rendered profiles are cached per beneficiary. The cache key embeds the
+beneficiary's `updated_at` and its feature row's `updated_at`. Every import
+bumps one of those for each beneficiary it touches (the importers refresh
+BeneficiaryFeatures once each import finishes), so an import invalidates exactly the
+affected profiles, in every process and with any cache backend. The key
+also embeds the 'data' generation (see http_cache.py), which the importers
+bump once they finish, so nothing cached before an import outlives it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .http_cache import data_generation
+from .models import (
+    Beneficiary, Loan, EmiDetail, AccountTransaction, MobileRecharge, ElectricityBill, PDSTransaction, UtilityBill
+)
+from .serializers import BeneficiaryProfileSerializer
+
+
+def _recent(lookup, queryset, to_attr, window):
+    return Prefetch(lookup, queryset=queryset[:settings.PROFILE_WINDOWS[window]], to_attr=to_attr)
+
+def load_profile(beneficiary_id):
+    """The Beneficiary with all profile relations prefetched, or None."""
+    return (
+        Beneficiary.objects
+        .select_related('ration_card', 'features')
+        .prefetch_related(
+            _recent('loans', Loan.objects.order_by('-sanction_date', '-id').prefetch_related(
+                _recent('emis', EmiDetail.objects.order_by('-emi_due_date', '-id'), 'recent_emis', 'emis'),
+            ), 'recent_loans', 'loans'),
+            _recent('transactions', AccountTransaction.objects.order_by('-transaction_timestamp', '-id'),
+                    'recent_transactions', 'transactions'),
+            _recent('recharges', MobileRecharge.objects.order_by('-bill_payment_date', '-id'),
+                    'recent_recharges', 'recharges'),
+            _recent('electricity_bills', ElectricityBill.objects.order_by('-due_date', '-id'),
+                    'recent_electricity_bills', 'electricity_bills'),
+            _recent('utility_bills', UtilityBill.objects.order_by('-bill_due_date', '-id'),
+                    'recent_utility_bills', 'utility_bills'),
+            _recent('ration_card__pds_transactions', PDSTransaction.objects.order_by('-transaction_date', '-id'),
+                    'recent_pds_transactions', 'pds_transactions'),
+        )
+        .filter(beneficiary_id=beneficiary_id)
+        .first()
+    )
+
+def profile_stamps(beneficiary_id):
+    """(pk, updated_at, features updated_at or None) for a beneficiary, or None. One indexed query."""
+    return (Beneficiary.objects.filter(beneficiary_id=beneficiary_id)
+            .values_list('pk', 'updated_at', 'features__updated_at').first())
+
+def profile_last_modified(stamps):
+    """When the profile described by `stamps` last changed."""
+    _, updated_at, features_updated_at = stamps
+    return max(updated_at, features_updated_at) if features_updated_at else updated_at
+
+def profile_cache_key(beneficiary_id, stamps=None):
+    """
+    Versioned cache key for a beneficiary's profile, or None if it does not
+    exist. Costs one indexed query unless `stamps` are passed in.
+    """
+    stamps = stamps or profile_stamps(beneficiary_id)
+    if stamps is None:
+        return None
+    pk, updated_at, features_updated_at = stamps
+    version = f"{updated_at.timestamp():.6f}-{features_updated_at.timestamp() if features_updated_at else 0:.6f}"
+    return f"beneficiary-profile:{pk}:{version}:{data_generation('data')}"
+
+def beneficiary_profile(beneficiary_id, stamps=None):
+    """The rendered profile dict for `beneficiary_id`, from cache when current; None if unknown."""
+    key = profile_cache_key(beneficiary_id, stamps)
+    if key is None:
+        return None
+    data = cache.get(key)
+    if data is None:
+        beneficiary = load_profile(beneficiary_id)
+        if beneficiary is None:
+            return None
+        data = BeneficiaryProfileSerializer(beneficiary).data
+        cache.set(key, data, settings.PROFILE_CACHE_TTL)
+    return data
@@ -0,0 +1,151 @@
+# api/reports.py
+"""
+Portfolio-level aggregates for the admin reports dashboard.
+
+Each report is computed with one GROUP BY in SQL (or, for risk bands, a
+count over the loaded score table) and stored as PortfolioSummary rows,
+much like a materialized view. The report endpoints only read those rows,
+so a dashboard load is a single small query however large the portfolio.
+
+The summaries are refreshed:
+  * at the end of `python import_data.py all`, and on demand with
+    `python import_data.py reports` (e.g. from cron);
+  * in the background by the endpoints, once the rows are older than
+    REPORTS_MAX_AGE. The stale rows are served meanwhile.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, CharField, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import EmiDetail, Loan, PortfolioSummary
+from .score_store import score_store
+
+# (label, lowest dpd_days, highest dpd_days or None)
+DPD_BUCKETS = [
+    ('Current', 0, 0),
+    ('1-30', 1, 30),
+    ('31-60', 31, 60),
+    ('61-90', 61, 90),
+    ('90+', 91, None),
+]
+
+REPORTS = ['defaults_by_scheme', 'dpd_buckets', 'disbursements_by_month', 'risk_bands']
+
+
+def defaults_by_scheme():
+    """Loans, distinct beneficiaries, defaulted loans and disbursed amount per loan scheme."""
+    rows = (Loan.objects.order_by().values('loan_scheme')
+            .annotate(loans=Count('id'), people=Count('beneficiary', distinct=True),
+                      defaulted=Count('id', filter=Q(beneficiary__target_default=True)),
+                      disbursed=Sum('original_loan_amount'))
+            .order_by('-disbursed'))
+    return [
+        dict(bucket=row['loan_scheme'], count=row['loans'], beneficiaries=row['people'],
+             defaults=row['defaulted'], amount=row['disbursed'] or 0)
+        for row in rows
+    ]
+
+def dpd_buckets():
+    """EMIs, distinct beneficiaries and EMI amount per days-past-due bucket."""
+    bucket = Case(
+        *[When(dpd_days__gte=low, then=Value(label)) if high is None
+          else When(dpd_days__range=(low, high), then=Value(label))
+          for label, low, high in DPD_BUCKETS],
+        default=Value('Current'), output_field=CharField(),
+    )
+    rows = {
+        row['bucket']: row for row in
+        EmiDetail.objects.order_by().annotate(bucket=bucket).values('bucket')
+        .annotate(emis=Count('id'), people=Count('loan__beneficiary', distinct=True), total=Sum('emi_amount'))
+    }
+    return [
+        dict(bucket=label, count=rows.get(label, {}).get('emis', 0),
+             beneficiaries=rows.get(label, {}).get('people', 0), amount=rows.get(label, {}).get('total') or 0)
+        for label, _, _ in DPD_BUCKETS
+    ]
+
+def disbursements_by_month():
+    """Loans sanctioned and amount disbursed per sanction month (YYYY-MM)."""
+    rows = (Loan.objects.order_by().annotate(month=TruncMonth('sanction_date')).values('month')
+            .annotate(loans=Count('id'), people=Count('beneficiary', distinct=True),
+                      disbursed=Sum('original_loan_amount'))
+            .order_by('month'))
+    return [
+        dict(bucket=row['month'].strftime('%Y-%m'), count=row['loans'], beneficiaries=row['people'],
+             amount=row['disbursed'] or 0)
+        for row in rows
+    ]
+
+def risk_bands():
+    """Beneficiaries per risk band in the served score table, or None when no scores are loaded."""
+    score_store.reload()
+    table = score_store.table
+    if table is None:
+        return None
+    return [
+        dict(bucket=band, count=count, beneficiaries=count)
+        for band, count in sorted(table.band_counts().items())
+    ]
+
+BUILDERS = {
+    'defaults_by_scheme': defaults_by_scheme,
+    'dpd_buckets': dpd_buckets,
+    'disbursements_by_month': disbursements_by_month,
+    'risk_bands': risk_bands,
+}
+
+
+def refresh_portfolio_summaries(reports=None):
+    """
+    Recomputes `reports` (all by default) and swaps their PortfolioSummary
+    rows in one transaction. A report whose source is unavailable keeps its
+    previous rows. Returns {report: rows written}.
+    """
+    now = timezone.now()
+    computed = {}
+    for report in reports or REPORTS:
+        rows = BUILDERS[report]()
+        if rows is not None:
+            computed[report] = [
+                PortfolioSummary(report=report, position=position, refreshed_at=now, **row)
+                for position, row in enumerate(rows)
+            ]
+    with transaction.atomic():
+        PortfolioSummary.objects.filter(report__in=list(computed)).delete()
+        PortfolioSummary.objects.bulk_create([row for rows in computed.values() for row in rows])
+    return {report: len(rows) for report, rows in computed.items()}
+
+
+_refresh_lock = threading.Lock()
+
+def _refresh_in_background():
+    try:
+        refresh_portfolio_summaries()
+    finally:
+        connection.close()
+        _refresh_lock.release()
+
+def refresh_if_stale(refreshed_at):
+    """Starts a background refresh when the summaries are missing or older than REPORTS_MAX_AGE."""
+    if refreshed_at is not None and (timezone.now() - refreshed_at).total_seconds() < settings.REPORTS_MAX_AGE:
+        return False
+    if not _refresh_lock.acquire(blocking=False):
+        return False    # one is already running
+    threading.Thread(target=_refresh_in_background, name='portfolio-summary-refresh', daemon=True).start()
+    return True
+
+def load_reports(reports=None):
+    """{report: {'refreshed_at': ..., 'rows': [...]}} from the summary table."""
+    queryset = PortfolioSummary.objects.all()
+    if reports is not None:
+        queryset = queryset.filter(report__in=reports)
+    result = {report: {'refreshed_at': None, 'rows': []} for report in reports or REPORTS}
+    for row in queryset.values('report', 'bucket', 'count', 'beneficiaries', 'defaults', 'amount', 'refreshed_at'):
+        entry = result.setdefault(row.pop('report'), {'refreshed_at': None, 'rows': []})
+        entry['refreshed_at'] = row.pop('refreshed_at')
+        entry['rows'].append(row)
+    return result
@@ -0,0 +1,158 @@
+# api/score_index.py
+"""
+Compact, memory-mapped index of the pre-calculated scores.
+
+The scoring job writes the scores as one binary file: a small JSON header
+followed by three arrays sorted by beneficiary ID — the IDs as fixed-width
+ASCII, the scores as int16 and the risk bands as uint8 codes into the
+header's band list. Every worker `mmap`s the same file read-only, so the
+table is paged in once by the OS and shared between processes. Opening it
+costs no parsing, and a lookup is a binary search (`np.searchsorted`) over
+the ID array.
+
+The file is replaced with os.replace(), never rewritten in place. A worker
+still holding the old mapping keeps reading the old, complete version until
+it reopens the file.
+
+This module has no Django dependency so that model.py can write the index
+directly. To build it from an existing scores CSV (run from backend/):
+    python api/score_index.py beneficiary_scores.csv beneficiary_scores.idx
+"""
+import os
+import sys
+import json
+import mmap
+from datetime import datetime, timezone
+
+import numpy as np
+
+MAGIC = b'NBCSIDX1'
+HEADER_LEN = np.dtype('<u4')
+ALIGN = 8
+
+
+def _pad(length):
+    return -length % ALIGN
+
+
+def write_score_index(path, beneficiary_ids, scores, bands, version=None):
+    """
+    Writes the index for the parallel sequences `beneficiary_ids`, `scores`
+    and `bands` (risk band labels) to `path` atomically. Returns the number of
+    entries written.
+    """
+    ids = np.array([str(b).upper() for b in beneficiary_ids], dtype=np.bytes_)
+    scores = np.asarray(scores)
+    if len(scores) and (scores.min() < np.iinfo(np.int16).min or scores.max() > np.iinfo(np.int16).max):
+        raise ValueError("Scores do not fit in int16.")
+    band_names, codes = np.unique(np.asarray(bands, dtype=str), return_inverse=True)
+    if len(band_names) > np.iinfo(np.uint8).max + 1:
+        raise ValueError("More than 256 distinct risk bands.")
+
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    if len(ids) > 1 and (ids[1:] == ids[:-1]).any():
+        raise ValueError("Duplicate beneficiary IDs in the score table.")
+
+    header = json.dumps({
+        'count': len(ids),
+        'id_width': ids.dtype.itemsize,
+        'bands': band_names.tolist(),
+        'version': version or datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+    }).encode()
+    header += b' ' * _pad(len(MAGIC) + HEADER_LEN.itemsize + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array(len(header), dtype=HEADER_LEN).tobytes())
+        f.write(header)
+        for array in (ids, scores[order].astype('<i2'), codes[order].astype('u1')):
+            data = array.tobytes()
+            f.write(data + b'\0' * _pad(len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+class ScoreIndex:
+    """
+    Read-only view of an index file. Has the same interface as the CSV-backed
+    ScoreTable in score_store: `get(beneficiary_id)` returns
+    (score, risk_band_class) or None, plus `version`, `loaded_at` and `len()`.
+    """
+    def __init__(self, path):
+        self.loaded_at = datetime.now(timezone.utc)
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._mmap
+        if buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' is not a score index file.")
+        offset = len(MAGIC)
+        header_len = int(np.frombuffer(buf, dtype=HEADER_LEN, count=1, offset=offset)[0])
+        offset += HEADER_LEN.itemsize
+        header = json.loads(bytes(buf[offset:offset + header_len]))
+        offset += header_len
+
+        count, width = header['count'], header['id_width']
+        self.version = header['version']
+        self.bands = header['bands']
+        self.id_width = width
+        self.ids = np.frombuffer(buf, dtype=f'S{width}', count=count, offset=offset)
+        offset += count * width + _pad(count * width)
+        self.scores = np.frombuffer(buf, dtype='<i2', count=count, offset=offset)
+        offset += count * 2 + _pad(count * 2)
+        self.band_codes = np.frombuffer(buf, dtype='u1', count=count, offset=offset)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, beneficiary_id):
+        key = self._key(beneficiary_id)
+        if not key:
+            return None
+        i = int(np.searchsorted(self.ids, key))
+        if i == len(self.ids) or self.ids[i] != key:
+            return None
+        return int(self.scores[i]), self.bands[self.band_codes[i]]
+
+    def get_many(self, beneficiary_ids):
+        """`get` for a list of IDs in one vectorized binary search; None marks a missing ID."""
+        if not len(self.ids):
+            return [None] * len(beneficiary_ids)
+        keys = np.array([self._key(b) for b in beneficiary_ids], dtype=f'S{self.id_width}')
+        positions = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        found = (keys != b'') & (self.ids[positions] == keys)
+        scores, codes = self.scores[positions].tolist(), self.band_codes[positions].tolist()
+        return [(scores[i], self.bands[codes[i]]) if hit else None for i, hit in enumerate(found.tolist())]
+
+    def band_counts(self):
+        """{risk band: number of beneficiaries}."""
+        counts = np.bincount(self.band_codes, minlength=len(self.bands)).tolist()
+        return dict(zip(self.bands, counts))
+
+    def _key(self, beneficiary_id):
+        """The ID as stored (ASCII bytes), or b'' if it cannot be in the index."""
+        try:
+            key = beneficiary_id.encode('ascii')
+        except UnicodeEncodeError:
+            return b''
+        return key if len(key) <= self.id_width else b''
+
+
+def build_from_csv(csv_path, index_path):
+    """Writes the index for a beneficiary_scores.csv-format file."""
+    import pandas as pd
+    frame = pd.read_csv(csv_path, usecols=['beneficiary_id', 'score', 'risk_band_class'],
+                        dtype={'beneficiary_id': 'str', 'risk_band_class': 'str'})
+    return write_score_index(index_path, frame['beneficiary_id'], frame['score'].astype(int),
+                             frame['risk_band_class'])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python api/score_index.py <scores.csv> <index file>")
+        sys.exit(1)
+    written = build_from_csv(sys.argv[1], sys.argv[2])
+    print(f"Wrote {written:,} scores to {sys.argv[2]}.")
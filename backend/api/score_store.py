@@ -0,0 +1,185 @@
+# api/score_store.py
+"""
+The table of pre-calculated scores served by GetBeneficiaryScore.
+
+Scores come from the memory-mapped index written by the scoring job (see
+score_index.py) when it exists, and otherwise from beneficiary_scores.csv
+parsed into a dict. Either way the loaded table is an immutable snapshot.
+A daemon thread watches the files and, when the source's modification time
+or size changes, builds a new snapshot off to the side and swaps it in with
+a single reference assignment. A request reads `store.table` once and uses that snapshot
+throughout, so it never sees a half-loaded table. If the file is missing
+or unreadable, the last good snapshot is kept (or the store reports itself
+unavailable), and loading is retried on the next check.
+
+The scoring job also bumps the 'scores' generation in the shared cache
+(see http_cache.py). `current()` compares it at most once a second and
+reloads as soon as it changes, so new scores are served without waiting
+for the watcher.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from django.conf import settings
+
+from .http_cache import data_generation
+from .score_index import ScoreIndex
+
+SCORE_COLUMNS = ['beneficiary_id', 'score', 'risk_band_class']
+
+
+class ScoresNotAvailable(Exception):
+    """Raised when no score table has been loaded yet."""
+
+
+class ScoreTable:
+    """One loaded version of the score file: {beneficiary_id: (score, risk_band_class)}."""
+    def __init__(self, scores, version, source_mtime):
+        self.scores = scores
+        self.version = version
+        self.source_mtime = source_mtime
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def get(self, beneficiary_id):
+        return self.scores.get(beneficiary_id)
+
+    def get_many(self, beneficiary_ids):
+        return [self.scores.get(b) for b in beneficiary_ids]
+
+    def band_counts(self):
+        """{risk band: number of beneficiaries}."""
+        return dict(Counter(band for _, band in self.scores.values()))
+
+
+def read_score_table(path, stamp):
+    """Parses the score CSV into a ScoreTable; `stamp` is the file's (mtime_ns, size)."""
+    frame = pd.read_csv(path, usecols=SCORE_COLUMNS, dtype={'beneficiary_id': 'str', 'risk_band_class': 'str'})
+    ids = frame['beneficiary_id'].str.upper()
+    scores = dict(zip(ids, zip(frame['score'].astype(int).tolist(), frame['risk_band_class'].tolist())))
+    mtime = datetime.fromtimestamp(stamp[0] / 1e9, tz=timezone.utc)
+    return ScoreTable(scores, mtime.isoformat(timespec='milliseconds'), mtime)
+
+
+def open_score_index(path, stamp):
+    """Maps the binary score index; `stamp` is unused, the version comes from its header."""
+    return ScoreIndex(path)
+
+
+class ScoreStore:
+    """
+    Holds the current score table and keeps it fresh from a background
+    thread that checks the files every `check_interval` seconds. `sources`
+    is a list of (path, loader) pairs in order of preference; the first
+    existing file is loaded. The thread starts on first use, so management
+    commands that never serve a score never spawn it. `generation`, if
+    given, returns a token that changes whenever the files are republished.
+    """
+    def __init__(self, sources, check_interval=30.0, generation=None):
+        self.sources = sources
+        self.check_interval = check_interval
+        self.generation = generation
+        self.table = None           # current ScoreTable or ScoreIndex; replaced, never mutated
+        self.last_error = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._generation = None
+        self._generation_checked = 0.0
+
+    def _file_stamp(self):
+        """(path, mtime_ns, size) of the preferred existing source, or None."""
+        for path, _ in self.sources:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, st.st_mtime_ns, st.st_size
+        return None
+
+    def reload(self, force=False):
+        """
+        Loads the file if it changed since the last successful load (or always
+        with `force`). Returns True when a new table was swapped in.
+        """
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is None:
+                names = ' or '.join(f"'{os.path.basename(path)}'" for path, _ in self.sources)
+                self.last_error = f"{names} not found."
+                return False
+            if stamp == self._stamp and not force:
+                return False
+            path = stamp[0]
+            loader = dict(self.sources)[path]
+            try:
+                table = loader(path, stamp[1:])
+            except (OSError, ValueError, KeyError, pd.errors.ParserError) as exc:
+                # Typically a file still being written; keep serving the old table.
+                self.last_error = f"Could not load '{os.path.basename(path)}': {exc}"
+                print(f"Score store: {self.last_error}")
+                return False
+            if self._file_stamp() != stamp:
+                # Changed while we were reading it; pick it up on the next check.
+                return False
+            self.table = table
+            self._stamp = stamp
+            self.last_error = None
+        print(f"Score store: loaded {len(table):,} scores (version {table.version}).")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            self.reload()
+
+    def start(self):
+        """Loads the table now and starts the background watcher (idempotent)."""
+        if self._watcher is not None:
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name='score-store-watcher', daemon=True)
+        self.reload()
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if self.generation is None or now - self._generation_checked < 1.0:
+            return
+        self._generation_checked = now
+        token = self.generation()
+        if token != self._generation:
+            self._generation = token
+            self.reload()
+
+    def current(self):
+        """The current ScoreTable snapshot; raises ScoresNotAvailable if none is loaded."""
+        self.start()
+        self._check_generation()
+        table = self.table
+        if table is None:
+            # The file may have appeared since the last check; don't make callers wait for the watcher.
+            self.reload()
+            table = self.table
+        if table is None:
+            raise ScoresNotAvailable(self.last_error or 'Score data not loaded.')
+        return table
+
+
+score_store = ScoreStore(
+    [(str(settings.SCORES_INDEX_FILE), open_score_index), (str(settings.SCORES_FILE), read_score_table)],
+    check_interval=settings.SCORES_CHECK_INTERVAL,
+    generation=lambda: data_generation('scores'),
+)
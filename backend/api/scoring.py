@@ -0,0 +1,145 @@
+# api/scoring.py
+"""
+Real-time scoring of a single beneficiary.
+
+The LightGBM model and SimpleImputer written by model.py's train step (and
+the probability calibration map, when training produced one) are loaded
+once per worker process and kept warm; they are reloaded only when
+the files on disk change. A request then costs one feature-store query plus
+an in-memory prediction on a single row.
+"""
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import joblib
+import numpy as np
+
+from django.conf import settings
+from django.utils import timezone as django_timezone
+
+from .calibration import CALIBRATION_FILE, apply_calibration, load_calibration
+from .features import EVENT_COLUMNS, FEATURE_COLUMNS, NO_EVENTS, module_features
+from .models import Beneficiary, BeneficiaryFeatures
+
+MODEL_FILE = 'lgb_model.pkl'
+IMPUTER_FILE = 'imputer.pkl'
+
+
+class ModelNotAvailable(Exception):
+    """Raised when no trained model/imputer pair exists in SCORING_MODEL_DIR."""
+
+
+class ModelCache:
+    """
+    Process-wide holder of the trained model and imputer. `get()` returns the
+    warm pair, checking the files' modification times at most every
+    `check_interval` seconds and reloading them (under a lock) when they change.
+    """
+    def __init__(self, model_dir, check_interval=5.0):
+        self.model_dir = model_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loaded = None       # (model, imputer, calibration, feature names, fill values, keep mask, label, mtimes)
+        self._checked_at = 0.0
+
+    def _paths(self):
+        return os.path.join(self.model_dir, MODEL_FILE), os.path.join(self.model_dir, IMPUTER_FILE)
+
+    def _version(self):
+        try:
+            version = tuple(os.stat(path).st_mtime_ns for path in self._paths())
+        except FileNotFoundError:
+            raise ModelNotAvailable(f"No trained model in '{self.model_dir}'. Run model.py in train mode first.")
+        try:
+            return version + (os.stat(os.path.join(self.model_dir, CALIBRATION_FILE)).st_mtime_ns,)
+        except FileNotFoundError:
+            return version + (0,)   # uncalibrated model
+
+    def get(self):
+        now = time.monotonic()
+        if self._loaded is not None and now - self._checked_at < self.check_interval:
+            return self._loaded
+        with self._lock:
+            version = self._version()
+            if self._loaded is None or self._loaded[-1] != version:
+                self._loaded = self._load(version)
+            self._checked_at = now
+        return self._loaded
+
+    def _load(self, version):
+        model_path, imputer_path = self._paths()
+        model = joblib.load(model_path)
+        imputer = joblib.load(imputer_path)
+        calibration = load_calibration(self.model_dir)
+        # Median imputation is applied by hand (see predict): SimpleImputer.transform
+        # costs more than the prediction itself on a single row. Columns that were
+        # all-missing at fit time have a NaN statistic and are dropped, as sklearn does.
+        fill = np.asarray(imputer.statistics_, dtype=float)
+        keep = ~np.isnan(fill)
+        label = datetime.fromtimestamp(max(version) / 1e9, tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        return model, imputer, calibration, list(imputer.feature_names_in_), fill, keep, label, version
+
+    def predict(self, features):
+        """Default probability for one beneficiary; `features` maps feature name -> value."""
+        model, _, calibration, names, fill, keep, _, _ = self.get()
+        x = np.array([features.get(name, np.nan) for name in names], dtype=float)
+        x = np.where(np.isnan(x), fill, x)[keep].reshape(1, -1)
+        if hasattr(model, 'booster_'):
+            prob = model.booster_.predict(x, num_threads=1)[0]
+        else:
+            prob = model.predict_proba(x)[0, 1]
+        return float(apply_calibration(calibration, prob))
+
+    @property
+    def version(self):
+        """Label of the loaded model: the UTC modification time of its newest file."""
+        return self.get()[-2]
+
+
+model_cache = ModelCache(str(settings.SCORING_MODEL_DIR))
+
+
+def beneficiary_features(beneficiary_id):
+    """
+    The model's feature vector for one beneficiary, read from the feature store
+    with its windows as of the day they were stored (`python import_data.py
+    features` moves them forward daily). Only a beneficiary without a store row
+    yet has the feature modules run on its rows. Returns None for an unknown
+    beneficiary_id.
+    """
+    beneficiary = (Beneficiary.objects.select_related('features')
+                   .filter(beneficiary_id=beneficiary_id).first())
+    if beneficiary is None:
+        return None
+    try:
+        stored = beneficiary.features
+        aggregates = {col: getattr(stored, col) for col in FEATURE_COLUMNS}
+        events = stored.event_features
+    except BeneficiaryFeatures.DoesNotExist:
+        aggregates, events = {}, None
+    if not events:
+        live = module_features([beneficiary.pk], as_of=django_timezone.localdate())
+        if beneficiary.pk in live.index:
+            row = live.loc[beneficiary.pk]
+            aggregates = aggregates or row[FEATURE_COLUMNS].to_dict()
+            events = row[EVENT_COLUMNS].to_dict()
+        else:
+            events = NO_EVENTS
+
+    # Same definitions as model.base_features()
+    return {
+        'age': (date.today() - beneficiary.date_of_birth).days / 365.25,
+        'aadhaar_present': int(bool(beneficiary.aadhar_number)),
+        'mobile_present': int(bool(beneficiary.mobile_number)),
+        **{col: float(aggregates.get(col, 0)) for col in FEATURE_COLUMNS},
+        **{col: np.nan if value is None else float(value) for col, value in events.items()},
+    }
+
+def score_beneficiary(beneficiary_id):
+    """Returns (default probability, model version) or None for an unknown beneficiary_id."""
+    features = beneficiary_features(beneficiary_id)
+    if features is None:
+        return None
+    return model_cache.predict(features), model_cache.version
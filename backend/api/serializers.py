@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import (
     Beneficiary, Loan, EmiDetail, AccountTransaction, 
-    MobileRecharge, ElectricityBill, RationCard, PDSTransaction, UtilityBill
+    MobileRecharge, ElectricityBill, RationCard, PDSTransaction, UtilityBill,
+    BeneficiaryFeatures
 )
+from .features import FEATURE_COLUMNS
 # --- ADD THE NEW BENEFICIARY SERIALIZER ---
 
 class BeneficiarySerializer(serializers.ModelSerializer):
@@ -57,4 +59,40 @@ class PDSTransactionSerializer(serializers.ModelSerializer):
 class UtilityBillSerializer(serializers.ModelSerializer):
     class Meta:
         model = UtilityBill
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# --- NESTED SERIALIZERS FOR THE BENEFICIARY PROFILE (see api/profile.py) ---
+# The nested lists read the bounded, prefetched `recent_*` attributes.
+
+class LoanProfileSerializer(serializers.ModelSerializer):
+    emis = EmiDetailSerializer(many=True, read_only=True, source='recent_emis')
+
+    class Meta:
+        model = Loan
+        fields = '__all__'
+
+class RationCardProfileSerializer(serializers.ModelSerializer):
+    pds_transactions = PDSTransactionSerializer(many=True, read_only=True, source='recent_pds_transactions')
+
+    class Meta:
+        model = RationCard
+        fields = '__all__'
+
+class BeneficiaryFeaturesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BeneficiaryFeatures
+        fields = FEATURE_COLUMNS + ['updated_at']
+
+class BeneficiaryProfileSerializer(BeneficiarySerializer):
+    loans = LoanProfileSerializer(many=True, read_only=True, source='recent_loans')
+    transactions = AccountTransactionSerializer(many=True, read_only=True, source='recent_transactions')
+    recharges = MobileRechargeSerializer(many=True, read_only=True, source='recent_recharges')
+    electricity_bills = ElectricityBillSerializer(many=True, read_only=True, source='recent_electricity_bills')
+    utility_bills = UtilityBillSerializer(many=True, read_only=True, source='recent_utility_bills')
+    ration_card = RationCardProfileSerializer(read_only=True)
+    features = BeneficiaryFeaturesSerializer(read_only=True)
+
+    class Meta(BeneficiarySerializer.Meta):
+        fields = BeneficiarySerializer.Meta.fields + [
+            'loans', 'transactions', 'recharges', 'electricity_bills', 'utility_bills', 'ration_card', 'features',
+        ]
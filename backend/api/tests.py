@@ -1,3 +1,606 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import signal
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone as django_timezone
+from django.utils.timezone import make_aware
+
+from rest_framework.renderers import JSONRenderer
+
+import import_data
+import model
+from import_beneficiaries import import_beneficiaries
+from api.cache_backends import LRUFileBasedCache
+from api.calibration import METHODS, apply_calibration, fit_calibration, load_calibration, save_calibration
+from api.fast_serializers import FastJSONRenderer
+from api.features import module_features, refresh_features, refresh_stale_features, source_frames
+from api.http_cache import bump_generation
+from api.reports import refresh_portfolio_summaries
+from api.score_index import ScoreIndex, write_score_index
+from api.score_store import ScoreStore, ScoreTable, open_score_index
+from api.scoring import beneficiary_features
+from api.windowed_features import HORIZON, as_day
+from api.models import AccountTransaction, Beneficiary, BeneficiaryFeatures, ElectricityBill, ImportLedger
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+TRANSACTION_HEADER = ('beneficiary_id,account_number,transaction_id,transaction_timestamp,type,amount,'
+                      'description,current_balance,mode,merchant_category,is_recurring,location_city\n')
+
+
+def make_beneficiaries(count):
+    return [
+        Beneficiary.objects.create(
+            beneficiary_id=f'NBC_{i:03d}', aadhar_number=f'{100000000000 + i}', mobile_number=f'{9000000000 + i}',
+            full_name=f'Person_{i}', date_of_birth=date(1980, 1, 1 + i % 28), target_default=bool(i % 2),
+        )
+        for i in range(1, count + 1)
+    ]
+
+def transaction_line(i, beneficiary, when, kind='CREDIT', amount=100):
+    return (f'{beneficiary},AC{i},TRX_{i:05d},{when:%Y-%m-%d %H:%M:%S},{kind},{amount},Rent,{1000 + i},'
+            f'IMPS,Food,{i % 2 == 0},Mumbai\n')
+
+
+class ImportTestCase(TestCase):
+    """Writes CSV fixtures to a temporary directory removed after each test."""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write_csv(self, name, header, lines):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w') as f:
+            f.write(header + ''.join(lines))
+        return path
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MultiChunkImportTests(ImportTestCase):
+    def test_every_chunk_keeps_its_timestamps(self):
+        make_beneficiaries(3)
+        lines = [transaction_line(i, f'NBC_{1 + i % 3:03d}', datetime(2024, 1, 1 + i, 10, 30)) for i in range(10)]
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, lines)
+
+        stats = import_data.run_import('transaction', path, batch_size=3, full=True)
+
+        self.assertEqual(stats['rows'], 10)
+        self.assertEqual(stats['stale'], 0)
+        stamps = dict(AccountTransaction.objects.values_list('transaction_id', 'transaction_timestamp'))
+        self.assertEqual(len(stamps), 10)
+        for i in range(10):
+            self.assertEqual(stamps[f'TRX_{i:05d}'], make_aware(datetime(2024, 1, 1 + i, 10, 30)))
+
+    def test_feature_store_refreshed_once_with_every_chunk(self):
+        beneficiaries = make_beneficiaries(2)
+        lines = [transaction_line(i, 'NBC_001', datetime(2024, 1, 1 + i), amount=10 * (i + 1)) for i in range(7)]
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, lines)
+
+        with mock.patch.object(import_data, 'refresh_features', wraps=import_data.refresh_features) as refresh:
+            import_data.run_import('transaction', path, batch_size=2, full=True)
+
+        refresh.assert_called_once_with([beneficiaries[0].pk])
+        self.assertEqual(BeneficiaryFeatures.objects.get(beneficiary=beneficiaries[0]).total_credit, 280)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportLedgerTests(ImportTestCase):
+    def setUp(self):
+        super().setUp()
+        make_beneficiaries(2)
+        self.lines = [transaction_line(i, 'NBC_001', datetime(2024, 3, 1 + i)) for i in range(5)]
+
+    def test_unchanged_file_is_skipped(self):
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, self.lines)
+        import_data.run_import('transaction', path, batch_size=10)
+
+        stats = import_data.run_import('transaction', path, batch_size=10)
+
+        self.assertTrue(stats['unchanged'])
+        self.assertEqual(stats['rows'], 0)
+
+    def test_grown_file_applies_rows_from_its_mark(self):
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, self.lines)
+        import_data.run_import('transaction', path, batch_size=10)
+        older = transaction_line(90, 'NBC_002', datetime(2024, 2, 1))
+        newer = transaction_line(91, 'NBC_002', datetime(2024, 4, 1))
+        self.write_csv('transactions.csv', TRANSACTION_HEADER, self.lines + [older, newer])
+
+        stats = import_data.run_import('transaction', path, batch_size=10)
+
+        self.assertEqual(stats['stale'], 5)    # the four rows before the mark and the backdated one
+        self.assertEqual(stats['stale_range'][0], pd.Timestamp('2024-02-01', tz='UTC'))
+        self.assertTrue(AccountTransaction.objects.filter(transaction_id='TRX_00091').exists())
+        self.assertFalse(AccountTransaction.objects.filter(transaction_id='TRX_00090').exists())
+
+    def test_file_under_another_name_is_applied_in_full(self):
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, self.lines)
+        import_data.run_import('transaction', path, batch_size=10)
+        backfill = [transaction_line(80 + i, 'NBC_002', datetime(2023, 6, 1 + i)) for i in range(3)]
+        path = self.write_csv('transactions_2023.csv', TRANSACTION_HEADER, backfill)
+
+        stats = import_data.run_import('transaction', path, batch_size=10)
+
+        self.assertEqual(stats['stale'], 0)
+        self.assertEqual(AccountTransaction.objects.filter(beneficiary__beneficiary_id='NBC_002').count(), 3)
+        ledger = ImportLedger.objects.get(feed='transaction')
+        self.assertEqual(ledger.file_name, 'transactions_2023.csv')
+        self.assertEqual(ledger.high_water_mark, datetime(2023, 6, 3, tzinfo=timezone.utc))
+
+    def test_rows_for_unknown_beneficiaries_are_applied_once_they_exist(self):
+        pending = transaction_line(70, 'NBC_003', datetime(2024, 3, 2, 12))
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, self.lines + [pending])
+        import_data.run_import('transaction', path, batch_size=10)
+        ledger = ImportLedger.objects.get(feed='transaction')
+        self.assertEqual(ledger.high_water_mark, datetime(2024, 3, 2, 12, tzinfo=timezone.utc))
+
+        Beneficiary.objects.create(
+            beneficiary_id='NBC_003', aadhar_number='100000000003', mobile_number='9000000003',
+            full_name='Person_3', date_of_birth=date(1980, 1, 4), target_default=False)
+        stats = import_data.run_import('transaction', path, batch_size=10)
+
+        self.assertFalse(stats['unchanged'])
+        self.assertTrue(AccountTransaction.objects.filter(transaction_id='TRX_00070').exists())
+        ledger = ImportLedger.objects.get(feed='transaction')
+        self.assertEqual(ledger.high_water_mark, datetime(2024, 3, 5, tzinfo=timezone.utc))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FeatureParityTests(TestCase):
+    """The csv, db and store feature sources agree on the sample extracts shipped in backend/."""
+    @classmethod
+    def setUpTestData(cls):
+        import_beneficiaries(str(settings.BASE_DIR / 'beneficiary (1).csv'))
+        for import_type, (_, _, _, filename) in import_data.FEEDS.items():
+            import_data.run_import(import_type, str(settings.BASE_DIR / filename), batch_size=50, refresh=False)
+        import_data.refresh_features()
+
+    def config(self, features_as_of):
+        paths = {key: str(settings.BASE_DIR / name) for key, name in model.CONFIG['csv_paths'].items()}
+        paths['beneficiaries'] = str(settings.BASE_DIR / 'beneficiary (1).csv')
+        return {**model.CONFIG, 'csv_paths': paths, 'features_as_of': features_as_of}
+
+    def test_db_matches_csv(self):
+        self.assertTrue(model.compare_feature_sources(self.config('2024-07-31'), 'csv', 'db'))
+
+    def test_store_matches_csv(self):
+        # Stored as of today: read as stored
+        self.assertTrue(model.compare_feature_sources(self.config(None), 'csv', 'store'))
+
+    def test_store_recomputes_windows_of_another_day(self):
+        self.assertTrue(model.compare_feature_sources(self.config('2024-07-31'), 'csv', 'store'))
+
+    def test_windowed_modules_read_only_their_horizon(self):
+        as_of = pd.Timestamp('2024-03-31')    # rows after it are not read either
+        frames = source_frames(modules=['transactions_windowed'], as_of=as_of)
+        self.assertEqual(list(frames), ['transactions'])
+        days = as_day(frames['transactions']['timestamp'])
+        self.assertTrue(len(days))
+        self.assertGreaterEqual(days.min(), as_of - pd.Timedelta(days=HORIZON))
+        self.assertLessEqual(days.max(), as_of)
+        self.assertLess(len(days), AccountTransaction.objects.count())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StoredWindowTests(TestCase):
+    """Stored windows are served as of their refresh day; only explicit requests recompute them."""
+    def setUp(self):
+        self.beneficiaries = make_beneficiaries(2)
+        for i, beneficiary in enumerate(self.beneficiaries):
+            AccountTransaction.objects.create(
+                beneficiary=beneficiary, account_number='AC1', transaction_id=f'TRX_{i}',
+                transaction_timestamp=datetime.now(timezone.utc) - timedelta(days=3), transaction_type='CREDIT',
+                amount=Decimal('100.00'), current_balance=Decimal('500.00'), mode='IMPS',
+            )
+        refresh_features()
+        self.yesterday = django_timezone.localdate() - timedelta(days=1)
+        BeneficiaryFeatures.objects.update(event_features_as_of=self.yesterday)
+
+    def test_live_scoring_reads_the_stored_windows(self):
+        with mock.patch('api.scoring.module_features') as recompute:
+            features = beneficiary_features('NBC_001')
+        recompute.assert_not_called()
+        self.assertEqual(features['txn_count_30d'], 1)
+
+    def test_store_source_recomputes_only_for_an_explicit_date(self):
+        with mock.patch('api.features.module_features', wraps=module_features) as recompute:
+            model.build_features_from_store({**model.CONFIG, 'features_as_of': None})
+            recompute.assert_not_called()
+            frame = model.build_features_from_store({**model.CONFIG, 'features_as_of': '2020-01-01'})
+        recompute.assert_called_once()
+        self.assertEqual(frame.loc['NBC_001', 'txn_count_30d'], 0)   # every transaction is later
+
+    def test_refresh_moves_only_stale_rows(self):
+        BeneficiaryFeatures.objects.filter(beneficiary=self.beneficiaries[0]).update(
+            event_features_as_of=django_timezone.localdate())
+
+        self.assertEqual(refresh_stale_features(), 1)
+        self.assertFalse(BeneficiaryFeatures.objects.exclude(event_features_as_of=django_timezone.localdate()).exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SingleWriterTests(ImportTestCase):
+    def test_writer_error_stops_producers(self):
+        make_beneficiaries(3)
+        lines = [transaction_line(i, 'NBC_001', datetime(2024, 1, 1)) for i in range(50)]
+        path = self.write_csv('transactions.csv', TRANSACTION_HEADER, lines)
+        label, columns, _, filename = import_data.FEEDS['transaction']
+
+        def failing_chunk(frame):
+            raise ValueError('bad row')
+
+        def timed_out(signum, frame):
+            raise AssertionError('import hung after the writer failed')
+
+        previous = signal.signal(signal.SIGALRM, timed_out)
+        signal.alarm(30)
+        try:
+            with mock.patch.dict(import_data.FEEDS, {'transaction': (label, columns, failing_chunk, filename)}):
+                with self.assertRaisesMessage(ValueError, 'bad row'):
+                    import_data.import_all_parallel({'transaction': path}, 1, import_data.BeneficiaryResolver(), 1)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        make_beneficiaries(1)
+
+    def assertRevalidates(self, url):
+        """First GET is 200 with an ETag; repeating it with If-None-Match gets an empty 304. Returns the ETag."""
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(again['ETag'], etag)
+        return etag
+
+    def test_score(self):
+        tables = [ScoreTable({'NBC_001': (650, 'Low Risk')}, version, datetime.now(timezone.utc))
+                  for version in ('v1', 'v2')]
+        with mock.patch('api.views.score_store.current', return_value=tables[0]):
+            etag = self.assertRevalidates('/api/score/NBC_001/')
+        with mock.patch('api.views.score_store.current', return_value=tables[1]):
+            self.assertEqual(self.client.get('/api/score/NBC_001/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_profile_changes_after_an_import(self):
+        url = '/api/beneficiaries/NBC_001/profile/'
+        etag = self.assertRevalidates(url)
+        bump_generation('data')    # as record_import does
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @mock.patch('api.views.refresh_if_stale')   # reports without rows would start a background refresh
+    def test_reports(self, refresh_if_stale):
+        refresh_portfolio_summaries()
+        self.assertRevalidates('/api/reports/')
+        self.assertRevalidates('/api/reports/dpd_buckets/')
+
+
+
+@override_settings(CACHES=TEST_CACHES, SCORES_BATCH_MAX_IDS=3)
+class BatchScoresTests(TestCase):
+    url = '/api/scores/batch/'
+
+    def setUp(self):
+        table = ScoreTable({'NBC_001': (650, 'Low Risk'), 'NBC_002': (410, 'High Risk')}, 'v1',
+                           datetime.now(timezone.utc))
+        patcher = mock.patch('api.views.score_store.current', return_value=table)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body, client=None, **extra):
+        return (client or self.client).post(self.url, json.dumps(body), content_type='application/json', **extra)
+
+    def test_results_follow_the_request_with_duplicates(self):
+        response = self.post({'beneficiary_ids': ['nbc_002', 'NBC_404', ' NBC_002 ']})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['requested'], data['found']), (3, 2))
+        self.assertEqual(data['results'], [
+            {'beneficiary_id': 'NBC_002', 'found': True, 'score': 410, 'risk_band_class': 'High Risk'},
+            {'beneficiary_id': 'NBC_404', 'found': False},
+            {'beneficiary_id': 'NBC_002', 'found': True, 'score': 410, 'risk_band_class': 'High Risk'},
+        ])
+        self.assertEqual(self.client.get(self.url, {'ids': 'NBC_001,,NBC_001'}).json()['requested'], 2)
+
+    def test_id_limit(self):
+        self.assertEqual(self.client.get(self.url, {'ids': 'NBC_001,NBC_002,NBC_003'}).status_code, 200)
+        response = self.post({'beneficiary_ids': ['NBC_001', 'NBC_002', 'NBC_003', 'NBC_001']})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 3', response.json()['error'])
+
+    def test_malformed_requests_are_rejected(self):
+        for body in ({}, {'beneficiary_ids': []}, {'beneficiary_ids': [1, 2]},
+                     {'beneficiary_ids': {'id': 'NBC_001'}}, ['NBC_001'], {'beneficiary_ids': [' ', '']}):
+            self.assertEqual(self.post(body).status_code, 400, body)
+        for ids in ('', ' , ,'):
+            self.assertEqual(self.client.get(self.url, {'ids': ids}).status_code, 400, ids)
+
+    def test_session_clients_need_no_token_for_get(self):
+        # As the dashboard calls it: logged in, with CSRF checks on
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(User.objects.create_user('analyst'))
+        self.assertEqual(client.get(self.url, {'ids': 'NBC_001,NBC_002'}).status_code, 200)
+        self.assertEqual(self.post({'beneficiary_ids': ['NBC_001']}, client).status_code, 403)
+
+        client.get('/admin/login/')    # sets the csrftoken cookie
+        token = client.cookies['csrftoken'].value
+        self.assertEqual(self.post({'beneficiary_ids': ['NBC_001']}, client, HTTP_X_CSRFTOKEN=token).status_code, 200)
+
+
+class CursorOrderingTests(TestCase):
+    def test_rows_sharing_a_date_are_paged_once(self):
+        beneficiary = make_beneficiaries(1)[0]
+        for i in range(7):
+            ElectricityBill.objects.create(
+                beneficiary=beneficiary, service_id=f'SVC_{i}', billing_cycle_start=date(2024, 1, 1),
+                billing_cycle_end=date(2024, 1, 31), kwh_consumption=100, meter_reading_new=1000 + i,
+                due_date=date(2024, 2, 10 + i // 5), bill_amount=Decimal('500.00'), payment_status='Paid',
+            )
+        expected = [f'SVC_{i}' for i in range(7)]
+        for ordering, order in (('due_date', expected), ('-due_date', expected[::-1])):
+            seen = []
+            url = f'/api/electricity-bills/?beneficiary_id=NBC_001&ordering={ordering}&page_size=2'
+            while url:
+                page = self.client.get(url).json()
+                seen += [bill['service_id'] for bill in page['results']]
+                url = page['next']
+            self.assertEqual(seen, order)
+
+
+
+class IndexedFilterTests(TestCase):
+    url = '/api/transactions/'
+
+    def setUp(self):
+        now = django_timezone.now()
+        for i, (beneficiary, days_ago) in enumerate([(b, d) for b in make_beneficiaries(2) for d in (5, 60)]):
+            AccountTransaction.objects.create(
+                beneficiary=beneficiary, account_number=f'AC{i}', transaction_id=f'TRX_{i:05d}',
+                transaction_timestamp=now - timedelta(days=days_ago), transaction_type='CREDIT',
+                amount=Decimal('100.00'), current_balance=Decimal('1000.00'), mode='IMPS')
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['transaction_id'] for row in response.json()['results'])
+
+    def test_anchored_filters_narrow_the_results(self):
+        self.assertEqual(self.ids(beneficiary_id='nbc_002'), ['TRX_00002', 'TRX_00003'])
+        self.assertEqual(self.ids(beneficiary_id='NBC_002', last_days=30), ['TRX_00002'])
+        self.assertEqual(self.ids(transaction_type='debit'), [])
+
+    def test_unanchored_filters_are_rejected(self):
+        for params in ({'last_days': 30}, {'date_from': '2024-01-01', 'date_to': '2024-12-31'},
+                       {'ordering': '-transaction_timestamp'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('needs at least one of', response.json()['filters'])
+        with override_settings(FILTERS_REJECT_UNINDEXED=False):
+            self.assertEqual(len(self.ids(last_days=30)), 2)
+
+    def test_bad_values_are_rejected(self):
+        for params in ({'last_days': 'abc'}, {'last_days': '99999999999'}, {'date_from': '2024-13-01'},
+                       {'date_to': '9999-12-31'}, {'ordering': 'amount'}, {'amount_min': '10'}):
+            response = self.client.get(self.url, {'beneficiary_id': 'NBC_001', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+
+class LRUFileBasedCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.cache = LRUFileBasedCache(tmp, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}})
+
+    def age(self, key, seconds):
+        path = self.cache._key_to_file(key)
+        stamp = os.stat(path).st_mtime - seconds
+        os.utime(path, (stamp, stamp))
+
+    def test_recent_hit_does_not_write(self):
+        self.cache.set('profile', {'id': 1})
+        with mock.patch('api.cache_backends.os.utime') as utime:
+            self.assertEqual(self.cache.get('profile'), {'id': 1})
+        utime.assert_not_called()
+
+    def test_cull_keeps_recently_used_entries(self):
+        for i in range(4):
+            self.cache.set(f'key{i}', i)
+            self.age(f'key{i}', 1000 - i)   # key0 oldest
+        self.assertEqual(self.cache.get('key0'), 0)   # old enough to be touched again
+
+        self.cache.set('key4', 4)   # full: culls the two least recently used
+
+        self.assertEqual([self.cache.get(f'key{i}') for i in range(5)], [0, None, None, 3, 4])
+
+
+
+class ScoreIndexTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, 'scores.idx')
+
+    def test_round_trip(self):
+        write_score_index(self.path, ['NBC_003', 'nbc_001', 'NBC_010'], [700, 450, 610],
+                          ['Low Risk', 'High Risk', 'Medium Risk'], version='v1')
+        index = ScoreIndex(self.path)
+
+        self.assertEqual((len(index), index.version), (3, 'v1'))
+        self.assertEqual(index.get('NBC_001'), (450, 'High Risk'))   # first key
+        self.assertEqual(index.get('NBC_010'), (610, 'Medium Risk'))  # last key
+        for absent in ('NBC_000', 'NBC_002', 'NBC_011', 'NBC_0010', 'NBC_\u00e9', ''):
+            self.assertIsNone(index.get(absent))
+        self.assertEqual(
+            index.get_many(['NBC_010', 'NBC_000', 'NBC_003', 'NBC_999', 'NBC_001', 'NBC_0010']),
+            [(610, 'Medium Risk'), None, (700, 'Low Risk'), None, (450, 'High Risk'), None])
+        self.assertEqual(index.band_counts(), {'High Risk': 1, 'Low Risk': 1, 'Medium Risk': 1})
+
+    def test_store_reloads_when_the_generation_changes(self):
+        generation = ['1']
+        store = ScoreStore([(self.path, open_score_index)], check_interval=3600, generation=lambda: generation[0])
+        self.addCleanup(store.stop)
+        write_score_index(self.path, ['NBC_001'], [450], ['High Risk'], version='v1')
+        self.assertEqual(store.current().get('NBC_001'), (450, 'High Risk'))
+
+        write_score_index(self.path, ['NBC_001', 'NBC_002'], [720, 300], ['Low Risk', 'High Risk'], version='v2')
+        generation[0] = '2'    # as the scoring job's bump_generation('scores') does
+        store._generation_checked = 0.0    # skip the once-a-second throttle
+
+        table = store.current()
+        self.assertEqual(table.version, 'v2')
+        self.assertEqual(table.get_many(['NBC_001', 'NBC_002']), [(720, 'Low Risk'), (300, 'High Risk')])
+
+
+class TunedParamsTests(TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        self.config = {**model.CONFIG, 'model_dir': self.model_dir}
+
+    def write_tuned(self, **params):
+        with open(os.path.join(self.model_dir, 'best_params.json'), 'w') as f:
+            json.dump({'version': 1, 'auc': 0.7, 'params': params, 'rounds': 1}, f)
+
+    def test_not_applied_by_default(self):
+        self.write_tuned(num_leaves=16)
+        self.assertEqual(model.model_params(self.config), model.CONFIG['lgb_params'])
+
+    def test_round_count_is_never_applied(self):
+        self.write_tuned(num_leaves=16, subsample_freq=1, n_estimators=1)
+        params = model.model_params({**self.config, 'use_tuned_params': True})
+        self.assertEqual(params['num_leaves'], 16)
+        self.assertEqual(params['subsample_freq'], 1)
+        self.assertNotIn('n_estimators', params)
+
+    def test_out_of_range_value_is_rejected(self):
+        self.write_tuned(num_leaves=1)
+        with self.assertRaisesMessage(ValueError, 'num_leaves=1'):
+            model.model_params({**self.config, 'use_tuned_params': True})
+
+
+class FeatureCacheKeyTests(TestCase):
+    def test_event_rows_written_outside_the_importers_change_the_key(self):
+        beneficiary = make_beneficiaries(1)[0]
+        config = {**model.CONFIG, 'feature_source': 'db'}
+        key = model.feature_cache_key(config)
+        self.assertEqual(model.feature_cache_key(config), key)
+
+        AccountTransaction.objects.create(
+            beneficiary=beneficiary, account_number='AC1', transaction_id='TRX_1',
+            transaction_timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc), transaction_type='CREDIT',
+            amount=Decimal('100.00'), current_balance=Decimal('500.00'), mode='IMPS',
+        )
+        self.assertNotEqual(model.feature_cache_key(config), key)
+
+
+
+class CalibrationTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.raw = rng.uniform(size=2000)
+        self.y = (rng.uniform(size=2000) < self.raw ** 2).astype(int)    # raw scores overstate the risk
+
+    def test_calibrated_probabilities_are_monotonic_in_the_raw_scores(self):
+        grid = np.sort(np.concatenate([np.linspace(0, 1, 501), [1e-12, 1 - 1e-12]]))
+        for method in METHODS:
+            calibrated = apply_calibration(fit_calibration(self.raw, self.y, method), grid)
+            self.assertTrue((np.diff(calibrated) >= 0).all(), method)
+            self.assertTrue(((calibrated >= 0) & (calibrated <= 1)).all(), method)
+            self.assertLess(calibrated[250], grid[250], method)    # pulled towards the observed rate
+
+    def test_saved_map_round_trips(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        calibration = fit_calibration(self.raw, self.y, 'sigmoid')
+        save_calibration(tmp, calibration)
+        np.testing.assert_array_equal(apply_calibration(load_calibration(tmp), self.raw),
+                                      apply_calibration(calibration, self.raw))
+        save_calibration(tmp, None)    # a new uncalibrated model drops the stale map
+        self.assertIsNone(load_calibration(tmp))
+        with self.assertRaises(ValueError):
+            fit_calibration(self.raw, self.y, 'beta')
+
+    def test_band_cut_offs(self):
+        cal = model.CONFIG['calibration']
+
+        def prob(points):
+            """The default probability that scores exactly `points`."""
+            odds = cal['base_odds'] * 2 ** ((points - cal['base_score']) / cal['pdo'])
+            return 1 / (1 + odds)
+
+        self.assertAlmostEqual(prob(cal['base_score']), 0.05)    # as documented in CONFIG
+        points = [900, 640, 600, 599, 500, 499, 300]
+        scores, bands = model.calibrate([prob(p) for p in points] + [1e-12, 1.0], model.CONFIG)
+        self.assertEqual(scores.tolist(), points + [cal['max_score'], cal['min_score']])
+        self.assertEqual(bands.tolist(), ['Low Risk'] * 3 + ['Moderate Risk'] * 2 + ['High Risk'] * 2
+                                         + ['Low Risk', 'High Risk'])
+
+        for bands in ([(500, 'Moderate Risk'), (600, 'Low Risk'), (None, 'High Risk')],
+                      [(600, 'Low Risk'), (500, 'Moderate Risk')]):
+            with self.assertRaises(ValueError):
+                model.calibrate([0.05], {'calibration': {**cal, 'bands': bands}})
+
+
+class ScoringRunTests(TestCase):
+    @mock.patch.object(model, 'batch_score')
+    def test_scores_are_published_only_on_request(self, batch_score):
+        model.main('batch', 'adhoc.csv')
+        batch_score.assert_called_once_with(model.CONFIG, output='adhoc.csv', publish=False)
+
+        model.main('batch', publish=True)
+        self.assertTrue(batch_score.call_args.kwargs['publish'])
+
+    def test_parallel_batch_matches_predict_proba(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        rng = np.random.default_rng(7)
+        df = pd.DataFrame(rng.normal(size=(60, 4)), columns=['a', 'b', 'c', 'd'],
+                          index=pd.Index([f'NBC_{i:03d}' for i in range(60)], name='beneficiary_id'))
+        df.iloc[::7, 1] = np.nan
+        df['target_default'] = (df['a'] + rng.normal(scale=0.5, size=60) > 0).astype(int)
+        config = {**model.CONFIG, 'model_dir': tmp,
+                  'lgb_params': {**model.CONFIG['lgb_params'], 'n_estimators': 20, 'min_child_samples': 5}}
+        model.train_model(df, config)
+        lgb_model, imputer = (joblib.load(os.path.join(tmp, name)) for name in ('lgb_model.pkl', 'imputer.pkl'))
+        expected = lgb_model.predict_proba(imputer.transform(df.drop(columns=['target_default'])))[:, 1]
+
+        output = os.path.join(tmp, 'scored.csv')
+        with mock.patch.object(model, 'load_features', return_value=df):
+            model.batch_score(config, output, chunk_size=7, workers=2, num_threads=1)
+
+        scored = pd.read_csv(output)
+        self.assertEqual(scored['beneficiary_id'].tolist(), df.index.tolist())   # blocks kept in input order
+        np.testing.assert_allclose(scored['default_prob'], expected, rtol=1e-12)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_drf_output(self):
+        data = {
+            'utc': datetime(2026, 1, 1, tzinfo=timezone.utc),
+            'offset': datetime(2026, 1, 1, 5, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+            'naive': datetime(2026, 1, 1, 1, 1, 1, 123456),
+            'day': date(2026, 1, 1),
+            'amount': Decimal('1.50'),
+            'rows': [{'name': 'é', 'count': 3, 'share': 0.25, 'missing': None}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
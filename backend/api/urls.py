@@ -3,7 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    GetBeneficiaryScore, BeneficiaryViewSet, LoanViewSet, EmiDetailViewSet,
+    GetBeneficiaryScore, LiveBeneficiaryScore, BatchBeneficiaryScores, ScoreStoreStatus, BeneficiaryProfile, PortfolioReports, BeneficiaryViewSet, LoanViewSet, EmiDetailViewSet,
     AccountTransactionViewSet, MobileRechargeViewSet, ElectricityBillViewSet,
     RationCardViewSet, PDSTransactionViewSet, UtilityBillViewSet
 )
@@ -33,4 +33,20 @@ urlpatterns = [
     # --- ADD THIS NEW URL PATTERN FOR THE CSV SCORE LOOKUP ---
     # This will handle requests like /api/score/NBC_001/
     path('score/<str:beneficiary_id>/', GetBeneficiaryScore.as_view(), name='get-score'),
+
+    # Everything about one beneficiary: /api/beneficiaries/NBC_001/profile/
+    path('beneficiaries/<str:beneficiary_id>/profile/', BeneficiaryProfile.as_view(), name='beneficiary-profile'),
+
+    # Portfolio aggregates: /api/reports/ (all) or /api/reports/dpd_buckets/
+    path('reports/', PortfolioReports.as_view(), name='portfolio-reports'),
+    path('reports/<str:report>/', PortfolioReports.as_view(), name='portfolio-report'),
+
+    # Many scores at once: POST /api/scores/batch/ or GET /api/scores/batch/?ids=NBC_001,NBC_002
+    path('scores/batch/', BatchBeneficiaryScores.as_view(), name='batch-scores'),
+
+    # Version of the loaded scores file: /api/scores/status/
+    path('scores/status/', ScoreStoreStatus.as_view(), name='score-store-status'),
+
+    # Fresh score computed on request: /api/score/NBC_001/live/
+    path('score/<str:beneficiary_id>/live/', LiveBeneficiaryScore.as_view(), name='live-score'),
 ]
\ No newline at end of file
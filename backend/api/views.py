@@ -19,85 +19,306 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import * # Import your existing models
 from .serializers import * # Import your existing serializers
+from .scoring import ModelNotAvailable, score_beneficiary
+from .score_store import ScoresNotAvailable, score_store
+from .pagination import StreamingExportMixin
+from .fast_serializers import FastReadMixin
+from .profile import beneficiary_profile, profile_cache_key, profile_last_modified, profile_stamps
+from .filters import IndexedFilterBackend, QueryFilter, date_range_filters
+from .reports import REPORTS, load_reports, refresh_if_stale
+from .http_cache import conditional_response, make_etag
 
-# --- CSV Data Loading ---
-# This code runs only ONCE when the Django server starts.
-try:
-    scores_csv_path = os.path.join(settings.BASE_DIR, 'beneficiary_scores.csv')
-    # Load the scores and set 'beneficiary_id' as the index for fast lookups
-    df_scores = pd.read_csv(scores_csv_path).set_index('beneficiary_id')
-    print("Beneficiary scores CSV loaded successfully into memory.")
-except FileNotFoundError:
-    print(f"CRITICAL ERROR: 'beneficiary_scores.csv' not found in the project root directory.")
-    df_scores = None
+# --- Score Data Loading ---
+# beneficiary_scores.csv is held in memory by score_store, which reloads it in
+# the background whenever a new scoring run replaces the file.
 
 # --- API View for fetching scores ---
 class GetBeneficiaryScore(APIView):
     """
     An API endpoint to retrieve a pre-calculated score for a beneficiary
-    by looking it up in the loaded scores CSV file.
+    by looking it up in the loaded scores table.
     """
     def get(self, request, beneficiary_id, format=None):
-        if df_scores is None:
+        try:
+            # One snapshot per request, so a concurrent reload can't mix versions
+            table = score_store.current()
+        except ScoresNotAvailable as exc:
+            return Response(
+                {"error": f"Score data not loaded: {exc}"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        # Convert to uppercase to be safe
+        beneficiary_id = beneficiary_id.upper()
+        etag = make_etag(request, 'scores', 'score', table.version, beneficiary_id)
+        return conditional_response(request, etag, lambda: self.render(table, beneficiary_id))
+
+    def render(self, table, beneficiary_id):
+        score_data = table.get(beneficiary_id)
+        if score_data is None:
+            return Response(
+                {"error": f"Beneficiary with ID '{beneficiary_id}' not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        score, risk_band_class = score_data
+        response_data = {
+            'beneficiary_id': beneficiary_id,
+            'score': score,
+            'risk_band_class': risk_band_class,
+            'score_version': table.version,
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+# --- API View for fetching many scores in one request ---
+class BatchBeneficiaryScores(APIView):
+    """
+    Scores and risk bands for a list of beneficiaries in one round trip.
+    IDs come from a POST body ({"beneficiary_ids": [...]}) or a comma list
+    (?ids=NBC_001,NBC_002). Results follow the request order, and unknown IDs
+    get a not-found marker instead of failing the whole batch.
+    """
+    def get(self, request, format=None):
+        raw = request.query_params.get('ids', '')
+        return self.lookup(raw.split(',') if raw else [], request)
+
+    def post(self, request, format=None):
+        ids = request.data.get('beneficiary_ids') if hasattr(request.data, 'get') else None
+        if isinstance(ids, str):
+            ids = ids.split(',')
+        if not isinstance(ids, list) or not all(isinstance(b, str) for b in ids):
+            return Response(
+                {"error": "Expected a JSON body like {\"beneficiary_ids\": [\"NBC_001\", ...]}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.lookup(ids)
+
+    def lookup(self, beneficiary_ids, conditional_on=None):
+        # Convert to uppercase to be safe; duplicates are kept, so each occurrence gets its own result
+        beneficiary_ids = [b.strip().upper() for b in beneficiary_ids if b.strip()]
+        if not beneficiary_ids:
+            return Response({"error": "No beneficiary IDs given."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(beneficiary_ids) > settings.SCORES_BATCH_MAX_IDS:
+            return Response(
+                {"error": f"At most {settings.SCORES_BATCH_MAX_IDS} beneficiary IDs per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            table = score_store.current()
+        except ScoresNotAvailable as exc:
+            return Response(
+                {"error": f"Score data not loaded: {exc}"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if conditional_on is not None:
+            # GETs can be revalidated; the ETag covers the exact ID list
+            etag = make_etag(conditional_on, 'scores', 'batch', table.version, ','.join(beneficiary_ids))
+            return conditional_response(conditional_on, etag, lambda: self.render(table, beneficiary_ids))
+        return self.render(table, beneficiary_ids)
+
+    def render(self, table, beneficiary_ids):
+        results = []
+        for beneficiary_id, score_data in zip(beneficiary_ids, table.get_many(beneficiary_ids)):
+            if score_data is None:
+                results.append({'beneficiary_id': beneficiary_id, 'found': False})
+            else:
+                results.append({
+                    'beneficiary_id': beneficiary_id,
+                    'found': True,
+                    'score': score_data[0],
+                    'risk_band_class': score_data[1],
+                })
+        return Response({
+            'score_version': table.version,
+            'requested': len(results),
+            'found': sum(r['found'] for r in results),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+# --- API View for the beneficiary 360° profile ---
+class BeneficiaryProfile(APIView):
+    """
+    A beneficiary with their recent loans and EMIs, transactions, recharges,
+    electricity and utility bills, ration card with PDS uptake, and model
+    features, in one response built from a fixed number of queries.
+    """
+    def get(self, request, beneficiary_id, format=None):
+        beneficiary_id = beneficiary_id.upper()
+        stamps = profile_stamps(beneficiary_id)
+        if stamps is None:
             return Response(
-                {"error": "Server configuration error: Score data not loaded."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": f"Beneficiary with ID '{beneficiary_id}' not found."},
+                status=status.HTTP_404_NOT_FOUND
             )
+        etag = make_etag(request, 'data', profile_cache_key(beneficiary_id, stamps))
+        return conditional_response(
+            request, etag, lambda: Response(beneficiary_profile(beneficiary_id, stamps), status=status.HTTP_200_OK),
+            last_modified=profile_last_modified(stamps),
+        )
+
 
+# --- API View for the portfolio reports ---
+class PortfolioReports(APIView):
+    """
+    Portfolio aggregates (defaults by scheme, DPD buckets, disbursements by
+    month, risk-band distribution) read from the precomputed summary table.
+    Stale summaries are refreshed in the background.
+    """
+    def get(self, request, report=None, format=None):
+        if report is not None and report not in REPORTS:
+            return Response(
+                {"error": f"Unknown report '{report}'. Available: {', '.join(REPORTS)}."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        data = load_reports([report] if report else None)
+        refreshed = [entry['refreshed_at'] for entry in data.values()]
+        refresh_if_stale(None if None in refreshed else min(refreshed))
+        etag = make_etag(request, 'data', report, *refreshed)
+        return conditional_response(
+            request, etag, lambda: Response(data[report] if report else data, status=status.HTTP_200_OK),
+            last_modified=None if None in refreshed else max(refreshed),
+        )
+
+
+# --- API View reporting the loaded score table ---
+class ScoreStoreStatus(APIView):
+    """Which version of the scores file is being served, and whether the last reload failed."""
+    def get(self, request, format=None):
         try:
-            # Look up the beneficiary ID in the dataframe's index
-            score_data = df_scores.loc[beneficiary_id.upper()] # Convert to uppercase to be safe
-
-            # Create the response object
-            response_data = {
-                'beneficiary_id': beneficiary_id.upper(),
-                'score': int(score_data['score']),
-                'risk_band_class': score_data['risk_band_class']
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except KeyError:
-            # This error occurs if the beneficiary_id is not in the index
+            table = score_store.current()
+        except ScoresNotAvailable as exc:
+            return Response({'loaded': False, 'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            'loaded': True,
+            'version': table.version,
+            'loaded_at': table.loaded_at,
+            'count': len(table),
+            'last_error': score_store.last_error,
+        }, status=status.HTTP_200_OK)
+
+
+# --- API View for real-time scoring ---
+class LiveBeneficiaryScore(APIView):
+    """
+    Scores a beneficiary on demand with the current model, using its row in
+    the feature store. The model stays loaded in each worker process.
+    """
+    def get(self, request, beneficiary_id, format=None):
+        beneficiary_id = beneficiary_id.upper()
+        try:
+            result = score_beneficiary(beneficiary_id)
+        except ModelNotAvailable as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if result is None:
             return Response(
                 {"error": f"Beneficiary with ID '{beneficiary_id}' not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        default_prob, model_version = result
+        return Response({
+            'beneficiary_id': beneficiary_id,
+            'default_prob': default_prob,
+            'model_version': model_version,
+        }, status=status.HTTP_200_OK)
 
 
-class BeneficiaryViewSet(viewsets.ModelViewSet):
+class BeneficiaryViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = Beneficiary.objects.all()
     serializer_class = BeneficiarySerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary_id', 'upper', anchor=True),
+    ]
 
 # --- ADD NEW VIEWSETS FOR ALL OTHER MODELS ---
+# Filters are limited to indexed columns; see api/filters.py.
 
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = Loan.objects.all()
     serializer_class = LoanSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('loan_id', 'loan_id', anchor=True),
+    ]
 
-class EmiDetailViewSet(viewsets.ModelViewSet):
+class EmiDetailViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = EmiDetail.objects.all()
     serializer_class = EmiDetailSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'loan__beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('loan_id', 'loan__loan_id', anchor=True),
+        QueryFilter('payment_status', 'payment_status_detailed', anchor=True),
+        # dpd_days > 0 is repeated literally so the planner can use the partial emi_overdue_idx
+        QueryFilter('dpd_min', 'dpd_days__gte', 'positive_int', anchor=True, extra={'dpd_days__gt': 0}),
+        QueryFilter('dpd_max', 'dpd_days__lte', 'int'),
+        *date_range_filters('emi_due_date'),
+    ]
+    ordering_fields = ['emi_due_date']
 
-class AccountTransactionViewSet(viewsets.ModelViewSet):
+class AccountTransactionViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = AccountTransaction.objects.all()
     serializer_class = AccountTransactionSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('transaction_type', 'transaction_type', 'upper', anchor=True),
+        *date_range_filters('transaction_timestamp', datetime_field=True),
+    ]
+    ordering_fields = ['transaction_timestamp']
 
-class MobileRechargeViewSet(viewsets.ModelViewSet):
+class MobileRechargeViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = MobileRecharge.objects.all()
     serializer_class = MobileRechargeSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        *date_range_filters('bill_payment_date'),
+    ]
+    ordering_fields = ['bill_payment_date']
 
-class ElectricityBillViewSet(viewsets.ModelViewSet):
+class ElectricityBillViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = ElectricityBill.objects.all()
     serializer_class = ElectricityBillSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('payment_status', 'payment_status', anchor=True),
+        *date_range_filters('due_date'),
+    ]
+    ordering_fields = ['due_date']
 
-class RationCardViewSet(viewsets.ModelViewSet):
+class RationCardViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = RationCard.objects.all()
     serializer_class = RationCardSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('ration_card_id', 'ration_card_id', anchor=True),
+    ]
 
-class PDSTransactionViewSet(viewsets.ModelViewSet):
+class PDSTransactionViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = PDSTransaction.objects.all()
     serializer_class = PDSTransactionSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'ration_card__beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('ration_card_id', 'ration_card__ration_card_id', anchor=True),
+        *date_range_filters('transaction_date'),
+    ]
+    ordering_fields = ['transaction_date']
 
-class UtilityBillViewSet(viewsets.ModelViewSet):
+class UtilityBillViewSet(FastReadMixin, StreamingExportMixin, viewsets.ModelViewSet):
     queryset = UtilityBill.objects.all()
-    serializer_class = UtilityBillSerializer
\ No newline at end of file
+    serializer_class = UtilityBillSerializer
+    filter_backends = [IndexedFilterBackend]
+    query_filters = [
+        QueryFilter('beneficiary_id', 'beneficiary__beneficiary_id', 'upper', anchor=True),
+        QueryFilter('utility_type', 'utility_type', anchor=True),
+        *date_range_filters('bill_due_date'),
+    ]
+    ordering_fields = ['bill_due_date']
@@ -0,0 +1,198 @@
+# api/windowed_features.py
+"""
+Time-windowed behavioural features, computed with vectorized group-wise
+operations.
+
+For each beneficiary and each window in WINDOWS (days before `as_of`):
+  txn_*   account transactions: count, credit and debit sums, the trend of
+          the net flow, and current_balance volatility (standard deviation)
+  emi_*   EMIs falling due and the share of them paid late (dpd_days > 0),
+          plus days since the last EMI payment
+  mob_*   mobile recharges: count, amount and amount trend, plus days since
+          the last recharge
+  elec_*  electricity bills falling due and the share paid late or not at
+          all, plus days since the last bill payment
+A trend is (sum over the last w days - sum over the w days before) / w,
+i.e. the change in the daily average between consecutive windows, so the
+windows need no event older than HORIZON days. The days-since columns look
+at every event up to `as_of` and have their own builders (RECENCY_BUILDERS).
+
+Each source's beneficiary IDs are factorized once. Every windowed sum is
+then a single np.bincount over the event rows, so the cost grows linearly
+with the number of events, with no per-beneficiary Python loop. Events
+after `as_of` are ignored, so the features can be rebuilt as of a past
+date. Counts and sums without events are 0 (ADDITIVE_COLUMNS). Ratios
+without a denominator and days-since without any payment are NaN.
+
+The engine has no Django dependency. Each source's builder is registered as
+a feature module in api/feature_modules.py, which every feature source (the
+CSVs, the tables and the feature store refresh) runs.
+"""
+import numpy as np
+import pandas as pd
+
+WINDOWS = (30, 90, 180)
+# Days before as_of the windows and their trends reach back
+HORIZON = 2 * max(WINDOWS)
+
+
+def feature_names(windows=WINDOWS):
+    """Every windowed column, in order."""
+    names = []
+    for w in windows:
+        names += [f'txn_count_{w}d', f'txn_credit_{w}d', f'txn_debit_{w}d', f'txn_net_trend_{w}d',
+                  f'txn_balance_std_{w}d']
+    for w in windows:
+        names += [f'emi_due_{w}d', f'emi_late_ratio_{w}d']
+    names.append('emi_days_since_last_payment')
+    for w in windows:
+        names += [f'mob_count_{w}d', f'mob_amount_{w}d', f'mob_trend_{w}d']
+    names.append('mob_days_since_last_recharge')
+    for w in windows:
+        names += [f'elec_bills_{w}d', f'elec_late_ratio_{w}d']
+    names.append('elec_days_since_last_payment')
+    return names
+
+WINDOWED_COLUMNS = feature_names()
+# Columns that are 0, rather than unknown, when a beneficiary has no events
+ADDITIVE_COLUMNS = [c for c in WINDOWED_COLUMNS if not ('ratio' in c or 'days_since' in c or 'std' in c)]
+# Columns of RECENCY_BUILDERS rather than BUILDERS
+RECENCY_COLUMNS = [c for c in WINDOWED_COLUMNS if 'days_since' in c]
+
+
+def as_day(values):
+    """Dates, datetimes (naive or aware) or ISO strings -> midnight timestamps; unparseable -> NaT."""
+    return pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601').dt.tz_localize(None).dt.normalize()
+
+def _days_ago(values, as_of):
+    return ((as_of - as_day(values)) / pd.Timedelta(days=1)).to_numpy()
+
+def numeric(values):
+    """Floats from numbers, Decimals or numeric strings; anything else is NaN."""
+    return pd.to_numeric(values, errors='coerce').astype(float)
+
+def _amounts(values):
+    return numeric(values).fillna(0).to_numpy()
+
+
+class _Grouped:
+    """One source's events keyed by factorized beneficiary codes, restricted to events up to as_of."""
+    def __init__(self, frame, day_column, as_of):
+        days_ago = _days_ago(frame[day_column], as_of)
+        keep = ~(days_ago < 0)      # future events are dropped; undated ones kept for non-windowed use
+        self.frame = frame.loc[keep]
+        self.days_ago = days_ago[keep]
+        self.codes, self.ids = pd.factorize(self.frame['beneficiary_id'])
+        self.size = len(self.ids)
+
+    def in_window(self, w, start=0):
+        return (self.days_ago >= start) & (self.days_ago < start + w)
+
+    def total(self, weights, mask):
+        return np.bincount(self.codes, weights=np.where(mask, weights, 0.0), minlength=self.size)
+
+    def count(self, mask):
+        return np.bincount(self.codes, weights=mask.astype(float), minlength=self.size)
+
+    def trend(self, weights, w):
+        return (self.total(weights, self.in_window(w)) - self.total(weights, self.in_window(w, w))) / w
+
+    def std(self, values, mask):
+        """Sample standard deviation of `values` where `mask`, per beneficiary (two-pass, so large balances stay exact)."""
+        n = self.count(mask)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.total(values, mask) / n
+            squares = self.total((values - mean[self.codes]) ** 2, mask)
+            return np.where(n > 1, np.sqrt(squares / (n - 1)), np.nan)
+
+    def days_since(self, days_ago):
+        """Smallest non-negative `days_ago` per beneficiary (NaN when there is none)."""
+        return pd.Series(days_ago).groupby(self.codes).min().reindex(range(self.size)).to_numpy()
+
+    def result(self, columns):
+        return pd.DataFrame(columns, index=pd.Index(self.ids, name='beneficiary_id'))
+
+
+def _transaction_features(frame, as_of, windows):
+    g = _Grouped(frame, 'timestamp', as_of)
+    kind = g.frame['type'].astype(str).str.upper().to_numpy()
+    amount = _amounts(g.frame['amount'])
+    balance = _amounts(g.frame['balance'])
+    net = np.where(kind == 'CREDIT', amount, np.where(kind == 'DEBIT', -amount, 0.0))
+    out = {}
+    for w in windows:
+        window = g.in_window(w)
+        out[f'txn_count_{w}d'] = g.count(window)
+        out[f'txn_credit_{w}d'] = g.total(amount, window & (kind == 'CREDIT'))
+        out[f'txn_debit_{w}d'] = g.total(amount, window & (kind == 'DEBIT'))
+        out[f'txn_net_trend_{w}d'] = g.trend(net, w)
+        out[f'txn_balance_std_{w}d'] = g.std(balance, window)
+    return g.result(out)
+
+def _emi_features(frame, as_of, windows):
+    g = _Grouped(frame, 'due_date', as_of)
+    late = _amounts(g.frame['dpd_days']) > 0
+    out = {}
+    for w in windows:
+        window = g.in_window(w)
+        due = g.count(window)
+        out[f'emi_due_{w}d'] = due
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[f'emi_late_ratio_{w}d'] = g.count(window & late) / due
+    return g.result(out)
+
+def _recharge_features(frame, as_of, windows):
+    g = _Grouped(frame, 'date', as_of)
+    amount = _amounts(g.frame['amount'])
+    out = {}
+    for w in windows:
+        window = g.in_window(w)
+        out[f'mob_count_{w}d'] = g.count(window)
+        out[f'mob_amount_{w}d'] = g.total(amount, window)
+        out[f'mob_trend_{w}d'] = g.trend(amount, w)
+    return g.result(out)
+
+def _electricity_features(frame, as_of, windows):
+    g = _Grouped(frame, 'due_date', as_of)
+    paid_ago = _days_ago(g.frame['payment_date'], as_of)
+    paid = paid_ago >= 0
+    # Late: paid after the due date, not paid (as of as_of), or flagged late by the utility
+    late = (~paid | (paid_ago < g.days_ago)
+            | (g.frame['status'].astype(str).str.lower() == 'late').to_numpy())
+    out = {}
+    for w in windows:
+        window = g.in_window(w)
+        bills = g.count(window)
+        out[f'elec_bills_{w}d'] = bills
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[f'elec_late_ratio_{w}d'] = g.count(window & late) / bills
+    return g.result(out)
+
+BUILDERS = {
+    'transactions': _transaction_features,
+    'emis': _emi_features,
+    'recharges': _recharge_features,
+    'electricity': _electricity_features,
+}
+
+
+def _emi_recency(frame, as_of):
+    g = _Grouped(frame, 'due_date', as_of)
+    paid_ago = _days_ago(g.frame['paid_date'], as_of)
+    return g.result({'emi_days_since_last_payment': g.days_since(np.where(paid_ago >= 0, paid_ago, np.nan))})
+
+def _recharge_recency(frame, as_of):
+    g = _Grouped(frame, 'date', as_of)
+    return g.result({'mob_days_since_last_recharge': g.days_since(g.days_ago)})
+
+def _electricity_recency(frame, as_of):
+    g = _Grouped(frame, 'due_date', as_of)
+    paid_ago = _days_ago(g.frame['payment_date'], as_of)
+    return g.result({'elec_days_since_last_payment': g.days_since(np.where(paid_ago >= 0, paid_ago, np.nan))})
+
+# source -> builder(frame, as_of) of its days-since column
+RECENCY_BUILDERS = {
+    'emis': _emi_recency,
+    'recharges': _recharge_recency,
+    'electricity': _electricity_recency,
+}
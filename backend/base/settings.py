@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -120,6 +121,72 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# List endpoints page by primary-key cursor; full pulls go through <list url>/export/
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
+    # orjson-backed JSON (when installed) for the values()-based list/retrieve fast path
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.fast_serializers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+# List filters that no index can serve return 400; set False to only log a warning
+FILTERS_REJECT_UNINDEXED = True
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip by the streaming exports
+
+# Beneficiary profile: newest rows returned per related list, and cache lifetime
+PROFILE_WINDOWS = {
+    'loans': 20,
+    'emis': 36,             # per loan
+    'transactions': 50,
+    'recharges': 12,
+    'electricity_bills': 12,
+    'utility_bills': 12,
+    'pds_transactions': 24,
+}
+PROFILE_CACHE_TTL = 15 * 60  # seconds
+
+# Portfolio report summaries older than this are recomputed in the background
+REPORTS_MAX_AGE = 15 * 60  # seconds
+
+# Trained model and imputer written by model.py, served by the live scoring endpoint
+SCORING_MODEL_DIR = BASE_DIR / 'models'
+
+# Pre-calculated scores served by /api/score/<id>/; re-read when the file changes
+SCORES_FILE = BASE_DIR / 'beneficiary_scores.csv'
+# Binary score index written by the scoring job; preferred over the CSV when present
+SCORES_INDEX_FILE = BASE_DIR / 'beneficiary_scores.idx'
+SCORES_CHECK_INTERVAL = 30  # seconds
+SCORES_BATCH_MAX_IDS = 10000  # per /api/scores/batch/ request
+
+# Shared cache for rendered profiles and the invalidation generations (see api/http_cache.py).
+# Redis when REDIS_URL is set (give it maxmemory-policy allkeys-lru); otherwise a file cache
+# shared by all worker processes on the machine, evicting the least recently used entries.
+CACHE_TTL = 15 * 60  # seconds
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'TIMEOUT': CACHE_TTL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'api.cache_backends.LRUFileBasedCache',
+            'LOCATION': BASE_DIR / '.cache',
+            'TIMEOUT': CACHE_TTL,
+            'OPTIONS': {
+                'MAX_ENTRIES': 20000,
+                'CULL_FREQUENCY': 10,   # evict the least recently used tenth when full
+            },
+        }
+    }
+# Clients may reuse a response this long before revalidating it with its ETag
+HTTP_CACHE_MAX_AGE = 0  # seconds
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,205 @@
+"""
+Benchmark for the hot-path indexes added in migration 0004.
+
+Builds a synthetic SQLite database (10M account transactions by default, the
+other tables scaled from it) migrated up to 0003, runs the per-beneficiary
+time-range and status-filter queries the API and model use, then applies
+0004 and runs them again. Prints each query's plan and median latency
+before and after.
+
+Usage (from backend/):
+    python benchmarks/bench_indexes.py [--transactions=N] [--beneficiaries=N] [--runs=N] [--keep]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+
+# --- DJANGO SETUP AGAINST A THROWAWAY DATABASE ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'base.settings')
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--transactions', type=int, default=10_000_000)
+parser.add_argument('--beneficiaries', type=int, default=100_000)
+parser.add_argument('--runs', type=int, default=5, help='timed runs per query (median is reported)')
+parser.add_argument('--keep', action='store_true', help='keep the synthetic database file')
+options = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(prefix='nbcfdc-bench-'), 'bench.sqlite3')
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = db_path
+import django
+django.setup()
+# --- END OF DJANGO SETUP ---
+
+from django.core.management import call_command
+from django.db import connection
+from api.models import (
+    AccountTransaction, EmiDetail, MobileRecharge, ElectricityBill, PDSTransaction, UtilityBill
+)
+
+START = date(2023, 1, 1)
+DAYS = 730
+
+
+def insert(table, columns, rows, chunk=50_000):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    with connection.cursor() as cursor:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+def build_dataset(n_beneficiaries, n_transactions):
+    """Fills every table with random rows; sizes other than transactions are scaled from it."""
+    rnd = random.Random(42)
+    n_loans = n_beneficiaries
+    n_emis = max(n_transactions // 10, 1)
+    n_bills = max(n_transactions // 20, 1)
+    day = lambda: START + timedelta(days=rnd.randrange(DAYS))
+    benef = lambda: rnd.randint(1, n_beneficiaries)
+    now = datetime.now(timezone.utc)
+
+    print(f"Generating {n_beneficiaries:,} beneficiaries, {n_transactions:,} transactions, "
+          f"{n_emis:,} EMIs and {n_bills:,} rows per bill/recharge/PDS table...")
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = OFF')
+        cursor.execute('PRAGMA synchronous = OFF')
+    insert('api_beneficiary',
+           ['id', 'beneficiary_id', 'aadhar_number', 'mobile_number', 'full_name', 'date_of_birth',
+            'target_default', 'created_at', 'updated_at'],
+           ((i, f'NBC_{i:07d}', f'{i:012d}', f'{i:010d}', f'Person_{i}', '1980-01-01', i % 7 == 0, now, now)
+            for i in range(1, n_beneficiaries + 1)))
+    insert('api_loan',
+           ['id', 'beneficiary_id', 'loan_id', 'loan_scheme', 'sanction_date', 'original_loan_amount',
+            'loan_tenure_months'],
+           ((i, i, f'L_{i}', rnd.choice(['Education Loan', 'Small Trade Loan', 'Term Loan']), day(),
+             rnd.randint(10_000, 100_000), 12) for i in range(1, n_loans + 1)))
+    insert('api_emidetail',
+           ['loan_id', 'emi_record_id', 'emi_due_date', 'emi_paid_date', 'emi_amount',
+            'payment_status_detailed', 'dpd_days'],
+           ((rnd.randint(1, n_loans), f'E{i}', day(), None, rnd.randint(500, 10_000),
+             rnd.choice(['Paid On Time', 'Paid On Time', 'Paid On Time', 'Late']),
+             rnd.choice([0] * 9 + [rnd.randint(1, 120)])) for i in range(n_emis)))
+    insert('api_accounttransaction',
+           ['beneficiary_id', 'account_number', 'transaction_id', 'transaction_timestamp', 'transaction_type',
+            'amount', 'current_balance', 'mode', 'is_recurring'],
+           ((benef(), 'AC1', f'TRX_{i}', datetime.combine(day(), datetime.min.time()),
+             rnd.choice(['CREDIT', 'DEBIT']), rnd.randint(10, 50_000), rnd.randint(0, 100_000), 'UPI', False)
+            for i in range(n_transactions)))
+    insert('api_mobilerecharge',
+           ['beneficiary_id', 'operator_name', 'plan_type', 'bill_payment_date', 'recharge_amount',
+            'validity_days', 'payment_source', 'is_auto_pay'],
+           ((benef(), 'Jio', 'Prepaid', day(), 299, 28, 'UPI', False) for _ in range(n_bills)))
+    insert('api_electricitybill',
+           ['beneficiary_id', 'service_id', 'billing_cycle_start', 'billing_cycle_end', 'kwh_consumption',
+            'meter_reading_new', 'due_date', 'bill_amount', 'payment_status', 'subsidy_amount'],
+           ((benef(), f'ELEC_{i}', START, START, 100, 1000, day(), 1500,
+             rnd.choice(['Paid On Time', 'Paid On Time', 'Late']), 0) for i in range(n_bills)))
+    insert('api_utilitybill',
+           ['beneficiary_id', 'connection_id', 'utility_type', 'billing_period', 'bill_due_date', 'bill_amount',
+            'arrears_amount'],
+           ((benef(), f'UTIL_{i}', rnd.choice(['Water', 'Gas', 'Property Tax', 'Sewerage']), 'June 2024', day(),
+             800, 0) for i in range(n_bills)))
+    insert('api_rationcard',
+           ['id', 'beneficiary_id', 'ration_card_id', 'card_type', 'num_family_members'],
+           ((i, i, f'TN{i}', 'BPL', 4) for i in range(1, n_beneficiaries + 1)))
+    insert('api_pdstransaction',
+           ['ration_card_id', 'transaction_date', 'item_name', 'allocated_quantity_kg',
+            'actual_uptake_quantity_kg', 'uptake_ratio'],
+           ((benef(), day(), 'Rice', 20, 18, 0.9) for _ in range(n_bills)))
+    print(f"Dataset ready in {time.perf_counter() - started:.1f}s.")
+
+
+def queries(n_beneficiaries):
+    """(label, queryset factory) pairs; each factory picks a fresh random beneficiary."""
+    rnd = random.Random(7)
+    since, until = date(2024, 6, 1), date(2024, 9, 1)
+    pick = lambda: rnd.randint(1, n_beneficiaries)
+    return [
+        ('transactions: beneficiary, last 90 days',
+         lambda: AccountTransaction.objects.filter(
+             beneficiary_id=pick(), transaction_timestamp__range=(
+                 datetime(2024, 6, 1, tzinfo=timezone.utc), datetime(2024, 9, 1, tzinfo=timezone.utc)))),
+        ('transactions: DEBIT in one week',
+         lambda: AccountTransaction.objects.filter(
+             transaction_type='DEBIT', transaction_timestamp__range=(
+                 datetime(2024, 6, 1, tzinfo=timezone.utc), datetime(2024, 6, 8, tzinfo=timezone.utc))).values('id')),
+        ('emis: loan, due-date range',
+         lambda: EmiDetail.objects.filter(loan_id=pick(), emi_due_date__range=(since, until))),
+        ('emis: overdue (dpd_days > 0)',
+         lambda: EmiDetail.objects.filter(dpd_days__gt=0).values('id', 'dpd_days')),
+        ('emis: Late in one month',
+         lambda: EmiDetail.objects.filter(payment_status_detailed='Late',
+                                          emi_due_date__range=(since, date(2024, 7, 1)))),
+        ('recharges: beneficiary, date range',
+         lambda: MobileRecharge.objects.filter(beneficiary_id=pick(), bill_payment_date__range=(since, until))),
+        ('electricity: beneficiary, due range',
+         lambda: ElectricityBill.objects.filter(beneficiary_id=pick(), due_date__range=(since, until))),
+        ('electricity: Late in one month',
+         lambda: ElectricityBill.objects.filter(payment_status='Late', due_date__range=(since, date(2024, 7, 1)))),
+        ('utilities: beneficiary, due range',
+         lambda: UtilityBill.objects.filter(beneficiary_id=pick(), bill_due_date__range=(since, until))),
+        ('utilities: Water in one month',
+         lambda: UtilityBill.objects.filter(utility_type='Water', bill_due_date__range=(since, date(2024, 7, 1)))),
+        ('pds: ration card, date range',
+         lambda: PDSTransaction.objects.filter(ration_card_id=pick(), transaction_date__range=(since, until))),
+    ]
+
+
+def measure(n_beneficiaries, runs):
+    """Returns {label: (plan, median seconds)}."""
+    results = {}
+    for label, make in queries(n_beneficiaries):
+        plan = make().explain()
+        timings = []
+        for _ in range(runs):
+            qs = make()
+            started = time.perf_counter()
+            list(qs)
+            timings.append(time.perf_counter() - started)
+        results[label] = (plan, statistics.median(timings))
+    return results
+
+
+if __name__ == '__main__':
+    print(f"Synthetic database: {db_path}")
+    call_command('migrate', 'api', '0003', verbosity=0)
+    build_dataset(options.beneficiaries, options.transactions)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    before = measure(options.beneficiaries, options.runs)
+
+    print("Applying migration 0004 (hot-path indexes)...")
+    started = time.perf_counter()
+    call_command('migrate', 'api', '0004', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f"Indexes built in {time.perf_counter() - started:.1f}s.")
+    after = measure(options.beneficiaries, options.runs)
+
+    print("\n=== Query plans ===")
+    for label in before:
+        print(f"\n{label}\n  before: {before[label][0]}\n  after:  {after[label][0]}")
+
+    print("\n=== Median latency ===")
+    print(f"  {'Query':<42}{'Before (ms)':>13}{'After (ms)':>12}{'Speed-up':>10}")
+    for label in before:
+        b, a = before[label][1] * 1000, after[label][1] * 1000
+        print(f"  {label:<42}{b:>13.2f}{a:>12.2f}{b / a if a else float('inf'):>9.1f}x")
+
+    connection.close()
+    if not options.keep:
+        os.remove(db_path)
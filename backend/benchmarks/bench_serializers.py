@@ -0,0 +1,132 @@
+"""
+Benchmark for the values()-based fast read path (api/fast_serializers.py).
+
+Builds a synthetic SQLite database with N account transactions, EMIs and
+recharges, then renders 100k-row pages through both paths:
+  drf   ModelSerializer(many=True).data + DRF's JSONRenderer
+  fast  .values() + compiled row function + FastJSONRenderer (orjson if installed)
+and prints rows/sec for each, after checking that both produce the same JSON.
+
+Usage (from backend/):
+    python benchmarks/bench_serializers.py [--rows=N] [--page=N] [--runs=N] [--keep]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+
+# --- DJANGO SETUP AGAINST A THROWAWAY DATABASE ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'base.settings')
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--rows', type=int, default=100_000, help='rows per table')
+parser.add_argument('--page', type=int, default=100_000, help='rows rendered per timed page')
+parser.add_argument('--runs', type=int, default=3, help='timed runs per path (median is reported)')
+parser.add_argument('--keep', action='store_true', help='keep the synthetic database file')
+options = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(prefix='nbcfdc-bench-'), 'bench.sqlite3')
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = db_path
+import django
+django.setup()
+# --- END OF DJANGO SETUP ---
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from api.models import AccountTransaction, EmiDetail, MobileRecharge
+from api.serializers import AccountTransactionSerializer, EmiDetailSerializer, MobileRechargeSerializer
+from api.fast_serializers import FastJSONRenderer, compile_serializer, orjson
+
+START = date(2023, 1, 1)
+
+TARGETS = [
+    ('transactions', AccountTransaction, AccountTransactionSerializer),
+    ('emis', EmiDetail, EmiDetailSerializer),
+    ('recharges', MobileRecharge, MobileRechargeSerializer),
+]
+
+
+def build_dataset(n):
+    rnd = random.Random(42)
+    n_beneficiaries = max(n // 100, 1)
+    day = lambda: START + timedelta(days=rnd.randrange(730))
+    now = datetime.now(timezone.utc)
+    print(f"Generating {n:,} rows per table...")
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = OFF')
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.executemany(
+            "INSERT INTO api_beneficiary (id, beneficiary_id, aadhar_number, mobile_number, full_name, "
+            "date_of_birth, target_default, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            [(i, f'NBC_{i:07d}', f'{i:012d}', f'{i:010d}', f'Person_{i}', '1980-01-01', False, now, now)
+             for i in range(1, n_beneficiaries + 1)])
+        cursor.executemany(
+            "INSERT INTO api_loan (id, beneficiary_id, loan_id, loan_scheme, sanction_date, original_loan_amount, "
+            "loan_tenure_months) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(i, i, f'L_{i}', 'Term Loan', START, 50_000, 12) for i in range(1, n_beneficiaries + 1)])
+        cursor.executemany(
+            "INSERT INTO api_accounttransaction (beneficiary_id, account_number, transaction_id, "
+            "transaction_timestamp, transaction_type, amount, current_balance, mode, is_recurring) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            [(rnd.randint(1, n_beneficiaries), 'AC1', f'TRX_{i}', datetime.combine(day(), datetime.min.time()),
+              rnd.choice(['CREDIT', 'DEBIT']), f'{rnd.randint(10, 50_000)}.50', f'{rnd.randint(0, 100_000)}.00',
+              'UPI', False) for i in range(n)])
+        cursor.executemany(
+            "INSERT INTO api_emidetail (loan_id, emi_record_id, emi_due_date, emi_paid_date, emi_amount, "
+            "payment_status_detailed, dpd_days) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(rnd.randint(1, n_beneficiaries), f'E{i}', day(), day(), f'{rnd.randint(500, 10_000)}.00',
+              'Paid On Time', rnd.choice([0, 0, 0, 15])) for i in range(n)])
+        cursor.executemany(
+            "INSERT INTO api_mobilerecharge (beneficiary_id, operator_name, plan_type, bill_payment_date, "
+            "recharge_amount, validity_days, payment_source, is_auto_pay) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [(rnd.randint(1, n_beneficiaries), 'Jio', 'Prepaid', day(), '299.00', 28, 'UPI', False)
+             for _ in range(n)])
+
+
+def render_drf(model, serializer_class, page):
+    rows = list(model.objects.order_by('id')[:page])
+    return JSONRenderer().render(serializer_class(rows, many=True).data)
+
+def render_fast(model, serializer_class, page):
+    columns, render_row = compile_serializer(serializer_class)
+    rows = model.objects.order_by('id').values(*columns)[:page]
+    return FastJSONRenderer().render([render_row(row) for row in rows])
+
+
+def median_time(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    print(f"Synthetic database: {db_path}")
+    call_command('migrate', verbosity=0)
+    build_dataset(options.rows)
+    page = min(options.page, options.rows)
+    print(f"JSON encoder for the fast path: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+
+    print(f"\n=== Rendering {page:,}-row pages (median of {options.runs}) ===")
+    print(f"  {'Endpoint':<14}{'DRF rows/s':>14}{'Fast rows/s':>14}{'Speed-up':>10}")
+    for label, model, serializer_class in TARGETS:
+        if json.loads(render_drf(model, serializer_class, 1000)) != json.loads(render_fast(model, serializer_class, 1000)):
+            sys.exit(f"{label}: fast path output differs from the DRF serializer")
+        drf = median_time(lambda: render_drf(model, serializer_class, page), options.runs)
+        fast = median_time(lambda: render_fast(model, serializer_class, page), options.runs)
+        print(f"  {label:<14}{page / drf:>14,.0f}{page / fast:>14,.0f}{drf / fast:>9.1f}x")
+
+    connection.close()
+    if not options.keep:
+        os.remove(db_path)
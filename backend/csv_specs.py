@@ -0,0 +1,102 @@
+"""
+Declarative, header-driven CSV parsing for the import scripts.
+
+A feed is described by a list of `Column`s (CSV header, model field, type).
+`read_frames` streams the file with pandas in fixed-size chunks, converts each
+column in one vectorized step and hands back DataFrames whose columns are
+named after the model fields, holding plain Python values ready for
+`to_instances` / `bulk_create`. Memory stays bounded by the chunk size
+regardless of the file size.
+"""
+from decimal import Decimal
+
+import pandas as pd
+from django.utils import timezone
+
+
+class Column:
+    """One CSV column: its header, the model field it feeds and how cells are converted."""
+    def __init__(self, header, kind='str', field=None, fmt=None, required=True):
+        self.header = header
+        self.kind = kind            # str, upper, int, float, decimal, bool, date or datetime
+        self.field = field or header
+        self.fmt = fmt              # strptime format for date/datetime columns (None = ISO)
+        self.required = required    # optional columns are filled with None when absent
+
+    def __repr__(self):
+        return f"Column({self.header!r} -> {self.field!r}, {self.kind})"
+
+
+def _nullable(series):
+    """Object Series of plain Python values with None wherever `series` is missing."""
+    return series.astype(object).where(series.notna(), None)
+
+def _to_str(series, column):
+    return series.fillna('').astype(object)
+
+def _to_upper(series, column):
+    return series.fillna('').str.upper().astype(object)
+
+def _to_number(series, column):
+    return _nullable(series)
+
+def _to_decimal(series, column):
+    return pd.Series([Decimal(v) if isinstance(v, str) else None for v in series], index=series.index, dtype=object)
+
+def _to_bool(series, column):
+    return series.fillna('').str.strip().str.lower().isin(('true', '1', 'yes')).astype(object)
+
+def _to_date(series, column):
+    parsed = pd.to_datetime(series, format=column.fmt or '%Y-%m-%d', errors='coerce')
+    return parsed.dt.date.astype(object).where(parsed.notna(), None)
+
+def _to_datetime(series, column):
+    parsed = pd.to_datetime(series, format=column.fmt or 'ISO8601', errors='coerce')
+    if parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(timezone.get_default_timezone())
+    # Built positionally: to_pydatetime() comes back with a fresh RangeIndex, which
+    # would not line up with the index of any chunk after the first.
+    return pd.Series(list(parsed.dt.to_pydatetime()), index=series.index, dtype=object).where(parsed.notna(), None)
+
+# kind -> (dtype pandas parses the raw column as, vectorized converter)
+CONVERTERS = {
+    'str': ('str', _to_str),
+    'upper': ('str', _to_upper),
+    'int': ('Int64', _to_number),
+    'float': ('float64', _to_number),
+    'decimal': ('str', _to_decimal),
+    'bool': ('str', _to_bool),
+    'date': ('str', _to_date),
+    'datetime': ('str', _to_datetime),
+}
+
+
+def read_frames(file_path, columns, chunksize):
+    """
+    Streams `file_path` as DataFrames of up to `chunksize` rows, one column per
+    `Column.field`, converted to Python values. Columns are located by header,
+    so their order in the file does not matter; a missing required header
+    raises ValueError before any row is read.
+    """
+    headers = set(pd.read_csv(file_path, nrows=0).columns)
+    missing = [c.header for c in columns if c.required and c.header not in headers]
+    if missing:
+        raise ValueError(f"'{file_path}' is missing required columns: {', '.join(missing)}")
+    present = [c for c in columns if c.header in headers]
+
+    reader = pd.read_csv(
+        file_path, usecols=[c.header for c in present],
+        dtype={c.header: CONVERTERS[c.kind][0] for c in present},
+        keep_default_na=False, na_values=[''], chunksize=chunksize,
+    )
+    for chunk in reader:
+        frame = pd.DataFrame({c.field: CONVERTERS[c.kind][1](chunk[c.header], c) for c in present}, index=chunk.index)
+        for c in columns:
+            if c.field not in frame:
+                frame[c.field] = None
+        yield frame
+
+def to_instances(model, frame, fields):
+    """Builds one unsaved `model` per row of `frame`, passing the listed `fields` as kwargs."""
+    columns = [frame[field].tolist() for field in fields]
+    return [model(**dict(zip(fields, values))) for values in zip(*columns)]
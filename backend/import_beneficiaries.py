@@ -1,7 +1,5 @@
 import os
 import sys
-import csv
-from datetime import datetime
 
 # --- This is the required setup to use Django's models in a standalone script ---
 
@@ -20,48 +18,51 @@ django.setup()
 
 # --- Now you can import your models and use them ---
 
+from csv_specs import Column, read_frames, to_instances
 from api.models import Beneficiary
+from api.http_cache import bump_generation
 
-def import_beneficiaries(file_path):
-    """Reads a CSV file and imports data into the Beneficiary model."""
+# CSV header -> Beneficiary field. Dates arrive as DD-MM-YYYY and target_default as 0/1.
+BENEFICIARY_COLUMNS = [
+    Column('beneficiary_id'),
+    Column('aadhaar_number', field='aadhar_number'),
+    Column('mobile_number'),
+    Column('full_name'),
+    Column('date_of_birth', 'date', fmt='%d-%m-%Y'),
+    Column('target_default', 'bool'),
+]
+BENEFICIARY_FIELDS = [column.field for column in BENEFICIARY_COLUMNS]
+
+def import_beneficiaries(file_path, batch_size=2000):
+    """Reads a CSV file in chunks and upserts the rows into the Beneficiary model."""
     print(f'Starting import from "{file_path}"...')
     
     created_count = 0
     updated_count = 0
 
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.reader(f)
-            header = next(reader)  # Skip the header row
-
-            for row in reader:
-                beneficiary_id_val = row[0]
-                
-                # Format date and boolean values
-                formatted_date = datetime.strptime(row[4], '%d-%m-%Y').strftime('%Y-%m-%d')
-                is_default = (row[5] == '1')
+        for frame in read_frames(file_path, BENEFICIARY_COLUMNS, batch_size):
+            # Later rows win, as they did with one update_or_create per row.
+            frame = frame.drop_duplicates('beneficiary_id', keep='last')
+            ids = set(frame['beneficiary_id'])
+            existing = Beneficiary.objects.filter(beneficiary_id__in=ids).count()
 
-                # Use update_or_create to avoid duplicates
-                _, created = Beneficiary.objects.update_or_create(
-                    beneficiary_id=beneficiary_id_val,
-                    defaults={
-                        'aadhar_number': row[1],
-                        'mobile_number': row[2],
-                        'full_name': row[3],
-                        'date_of_birth': formatted_date,
-                        'target_default': is_default,
-                    }
-                )
+            # One upsert per chunk instead of update_or_create per row
+            Beneficiary.objects.bulk_create(
+                to_instances(Beneficiary, frame, BENEFICIARY_FIELDS),
+                update_conflicts=True,
+                unique_fields=['beneficiary_id'],
+                update_fields=BENEFICIARY_FIELDS[1:] + ['updated_at'],
+            )
 
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
+            created_count += len(ids) - existing
+            updated_count += existing
 
     except FileNotFoundError:
         print(f'ERROR: File not found at "{file_path}"')
         return
     
+    bump_generation('data')  # cached profiles and ETags from before the import are stale
     print(f'\nImport complete! {created_count} created, {updated_count} updated.')
 
 if __name__ == '__main__':
@@ -1,8 +1,11 @@
 import os
 import sys
-import csv
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
+import time
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
 
 # --- REQUIRED DJANGO SETUP ---
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -12,182 +15,601 @@ import django
 django.setup()
 # --- END OF DJANGO SETUP ---
 
+import pandas as pd
+from django.db import connection, transaction
+
+from csv_specs import Column, read_frames, to_instances
+from api.features import refresh_features, refresh_stale_features
+from api.reports import refresh_portfolio_summaries
+from api.http_cache import bump_generation
 from api.models import (
     Beneficiary, Loan, EmiDetail, AccountTransaction, MobileRecharge,
-    ElectricityBill, RationCard, PDSTransaction, UtilityBill
+    ElectricityBill, RationCard, PDSTransaction, UtilityBill, ImportLedger
 )
 
-def get_beneficiary(beneficiary_id):
-    """Safely retrieves a Beneficiary object or None if not found."""
-    try:
-        return Beneficiary.objects.get(beneficiary_id=beneficiary_id)
-    except Beneficiary.DoesNotExist:
-        print(f"  - WARNING: Beneficiary with ID '{beneficiary_id}' not found. Skipping row.")
-        return None
+# Number of CSV rows read, resolved and written per database transaction.
+DEFAULT_BATCH_SIZE = 2000
+
+
+# --- BULK INGESTION HELPERS ---
+class BeneficiaryResolver:
+    """
+    Maps CSV beneficiary_id values to Beneficiary primary keys from a single
+    preloaded query. One resolver is shared by every importer in an `all` run,
+    and rows with unknown IDs are tallied for one summary instead of a warning per row.
+    """
+    def __init__(self):
+        self.pks = dict(Beneficiary.objects.values_list('beneficiary_id', 'pk'))
+        self.misses = defaultdict(Counter)  # beneficiary_id -> {feed label: skipped rows}
+        self._lock = threading.Lock()  # Parallel importers record misses concurrently.
+
+    def filter_known(self, frame, label):
+        """
+        Returns the rows of `frame` whose beneficiary_id exists, with that column
+        replaced by the Beneficiary primary key, recording the rest as misses.
+        """
+        pks = frame['beneficiary_id'].map(self.pks)
+        known = pks.notna()
+        if not known.all():
+            with self._lock:
+                for beneficiary_id, count in frame.loc[~known, 'beneficiary_id'].value_counts().items():
+                    self.misses[beneficiary_id][label] += count
+        frame = frame[known].copy()
+        frame['beneficiary_id'] = pks[known].astype('int64')
+        return frame
+
+    def report(self, limit=20):
+        """Prints one summary line per unknown beneficiary_id (up to `limit`)."""
+        if not self.misses:
+            return
+        skipped = sum(sum(feeds.values()) for feeds in self.misses.values())
+        print(f"\n- WARNING: {len(self.misses)} unknown beneficiary IDs, {skipped} rows skipped:")
+        for beneficiary_id in sorted(self.misses)[:limit]:
+            feeds = ', '.join(f"{label}: {count}" for label, count in sorted(self.misses[beneficiary_id].items()))
+            print(f"  - '{beneficiary_id}' ({feeds})")
+        if len(self.misses) > limit:
+            print(f"  - ... and {len(self.misses) - limit} more.")
+
+def last_by_key(objects, key):
+    """De-duplicates objects on a natural key, keeping the last one (mirrors row-by-row upserts)."""
+    return list({key(obj): obj for obj in objects}.values())
+
+def upsert(model, frame, fields, unique_field):
+    """Writes one `model` row per frame row, updating all other `fields` where `unique_field` already exists."""
+    objects = last_by_key(to_instances(model, frame, fields), lambda obj: getattr(obj, unique_field))
+    model.objects.bulk_create(
+        objects, update_conflicts=True, unique_fields=[unique_field],
+        update_fields=[field for field in fields if field != unique_field],
+    )
+
+def parse_chunks(label, columns, file_path, batch_size, resolver, stats, watermark=None, since=None):
+    """
+    Yields (rows read, known-beneficiary frame) for each chunk of `file_path`,
+    timing the parse and conversion in `stats`. With a `watermark` column rows
+    before `since` are dropped and the marks of the rows passed on are tracked
+    (see track_watermark).
+    """
+    started = time.perf_counter()
+    for frame in read_frames(file_path, columns, batch_size):
+        read = len(frame)
+        stats['rows'] += read
+        if watermark:
+            marks = pd.to_datetime(frame[watermark], utc=True)
+            frame, marks = drop_stale(frame, marks, since, stats)
+        known = resolver.filter_known(frame, label)
+        if watermark:
+            track_watermark(marks, marks.index.isin(known.index), stats)
+        stats['parse'] += time.perf_counter() - started
+        yield read, known
+        started = time.perf_counter()
+    stats['parse'] += time.perf_counter() - started
+
+def write_chunk(label, apply_chunk, read, frame, stats):
+    """
+    Applies one parsed chunk inside its own transaction, timing it in `stats`
+    and collecting the beneficiaries it touched in stats['touched'].
+    """
+    started = time.perf_counter()
+    if len(frame):
+        with transaction.atomic():
+            apply_chunk(frame)
+        stats['touched'].update(frame['beneficiary_id'].unique().tolist())
+    stats['write'] += time.perf_counter() - started
+    stats['done'] += read
+    elapsed = time.perf_counter() - stats['started']
+    print(f"  - {label}: {stats['done']} rows processed ({stats['done'] / elapsed:,.0f} rows/sec)")
+
+def new_stats(label):
+    return {'label': label, 'rows': 0, 'done': 0, 'stale': 0, 'mark': None, 'parse': 0.0, 'write': 0.0,
+            'started': time.perf_counter(), 'wall': 0.0, 'unchanged': False, 'touched': set(),
+            'stale_range': None, 'held_back': None}
+
+def refresh_touched(all_stats):
+    """
+    Refreshes the feature store once for every beneficiary touched by the
+    finished imports in `all_stats`. Doing it after the feeds, instead of per
+    chunk, reads each beneficiary's history once and sees all of it.
+    """
+    touched = set().union(*(stats['touched'] for stats in all_stats))
+    if not touched:
+        return 0
+    started = time.perf_counter()
+    written = refresh_features(sorted(touched))
+    bump_generation('data')
+    print(f"  - Feature store refreshed for {written} beneficiaries in {time.perf_counter() - started:.2f}s.")
+    return written
+
+def finish_stats(stats):
+    stats['wall'] = time.perf_counter() - stats['started']
+    rate = stats['rows'] / stats['wall'] if stats['wall'] else 0
+    if stats['stale']:
+        first, last = stats['stale_range']
+        print(f"  - WARNING: {stats['label']}: skipped {stats['stale']} rows dated {first} to {last}, before the "
+              f"previous high-water mark of this file. Re-run with --full to apply them.")
+    print(f"{stats['label']} data import complete: {stats['rows']} rows in {stats['wall']:.2f}s ({rate:,.0f} rows/sec).")
+    return stats
+
+def run_import(import_type, file_path, batch_size, resolver=None, full=False, refresh=True):
+    """
+    Feeds `file_path` to the feed's chunk writer one chunk at a time, one transaction per chunk.
+    Only rows with a known beneficiary reach the writer, their beneficiary_id
+    already resolved to a primary key. Without a shared `resolver` a private one
+    is created and its miss summary printed at the end. Unless `full` is set,
+    unchanged files and already-imported rows of append-only feeds are skipped
+    (see plan_import). The touched beneficiaries' features are refreshed at the
+    end, unless `refresh` is False (the caller then runs refresh_touched once
+    for several feeds). Returns the feed's timing stats.
+    """
+    label, columns, apply_chunk, _ = FEEDS[import_type]
+    stats = new_stats(label)
+    file_hash, unchanged, since = plan_import(import_type, file_path, full)
+    if unchanged:
+        print(f"\n{label}: '{file_path}' is unchanged since the last import. Skipping.")
+        stats['unchanged'] = True
+        return stats
+
+    own_resolver = resolver is None
+    if own_resolver:
+        resolver = BeneficiaryResolver()
+    print(f"\nImporting {label} data from '{file_path}' (batch size {batch_size})...")
+    watermark = WATERMARKS.get(import_type, (None, False))[0]
+    for read, frame in parse_chunks(label, columns, file_path, batch_size, resolver, stats, watermark, since):
+        write_chunk(label, apply_chunk, read, frame, stats)
+    finish_stats(stats)
+    if refresh:
+        refresh_touched([stats])
+    record_import(import_type, file_path, file_hash, stats)
+    if own_resolver:
+        resolver.report()
+    return stats
+
+
+# --- INCREMENTAL IMPORTS ---
+# import type -> (column tracked as the feed's high-water mark, append-only?)
+# When the same source file of an append-only feed changes, only rows at or
+# after its previous mark are re-applied. A file under another name (e.g. a
+# backfill) and every other feed are re-applied in full.
+WATERMARKS = {
+    'repayment': ('emi_due_date', False),
+    'transaction': ('transaction_timestamp', True),
+    'recharge': ('bill_payment_date', True),
+}
+
+def file_fingerprint(file_path, block_size=1 << 20):
+    """SHA-256 hex digest of the file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def plan_import(import_type, file_path, full=False):
+    """
+    Compares `file_path` with the feed's ImportLedger entry. Returns
+    (file hash, unchanged, since): `unchanged` when the same file was already
+    imported, and `since` the previous high-water mark when an append-only
+    feed's file of the same name has grown (None means apply every row).
+    `full` forces a complete re-import.
+    """
+    file_hash = file_fingerprint(file_path)
+    ledger = ImportLedger.objects.filter(feed=import_type).first()
+    if full or ledger is None:
+        return file_hash, False, None
+    if ledger.file_hash == file_hash:
+        return file_hash, True, None
+    _, append_only = WATERMARKS.get(import_type, (None, False))
+    same_source = ledger.file_name == os.path.basename(file_path)
+    since = ledger.high_water_mark if append_only and same_source else None
+    return file_hash, False, since
+
+def drop_stale(frame, marks, since, stats):
+    """Drops the rows (and their `marks`) before `since`, kept inclusive as the upserts are idempotent."""
+    if since is None:
+        return frame, marks
+    fresh = marks >= pd.Timestamp(since)
+    if not fresh.all():
+        stats['stale'] += int((~fresh).sum())
+        first, last = marks[~fresh].min(), marks[~fresh].max()
+        if stats['stale_range'] is not None:
+            first, last = min(first, stats['stale_range'][0]), max(last, stats['stale_range'][1])
+        stats['stale_range'] = (first, last)
+    return frame[fresh], marks[fresh]
+
+def track_watermark(marks, written, stats):
+    """
+    Records the latest mark of the rows `written` in stats['mark'], and the
+    earliest mark of the rest (unknown beneficiaries) in stats['held_back'],
+    which the stored mark must not pass.
+    """
+    latest = marks[written].max()
+    if pd.notna(latest) and (stats['mark'] is None or latest > stats['mark']):
+        stats['mark'] = latest
+    earliest = marks[~written].min()
+    if pd.notna(earliest) and (stats['held_back'] is None or earliest < stats['held_back']):
+        stats['held_back'] = earliest
+
+def record_import(import_type, file_path, file_hash, stats):
+    """
+    Stores the file's fingerprint, row count and high-water mark once the
+    import has finished, and starts a new 'data' cache generation so cached
+    profiles and ETags from before the import are dropped. The mark carries
+    over only from a previous import of the same source file. When rows were
+    held back (unknown beneficiaries), the mark stops at the earliest of them
+    and no fingerprint is kept, so the next run, even of the same file,
+    applies them once their beneficiaries exist.
+    """
+    held_back = stats['held_back']
+    if held_back is not None:
+        mark = min(held_back, stats['mark']) if stats['mark'] is not None else held_back
+        file_hash = ''
+        print(f"  - {stats['label']}: high-water mark held at {mark}, before rows for unknown beneficiaries.")
+    else:
+        previous = ImportLedger.objects.filter(
+            feed=import_type, file_name=os.path.basename(file_path),
+        ).values_list('high_water_mark', flat=True).first()
+        marks = [pd.Timestamp(m) for m in (previous, stats['mark']) if m is not None]
+        mark = max(marks) if marks else None
+    ImportLedger.objects.update_or_create(
+        feed=import_type,
+        defaults={
+            'file_name': os.path.basename(file_path), 'file_hash': file_hash, 'row_count': stats['rows'],
+            'high_water_mark': mark.to_pydatetime() if mark is not None else None,
+        })
+    bump_generation('data')
+
+
+# --- CSV COLUMN SPECS (CSV header -> model field) ---
+REPAYMENT_COLUMNS = [
+    Column('beneficiary_id'), Column('loan_id'), Column('loan_scheme'), Column('sanction_date', 'date'),
+    Column('original_loan_amount', 'decimal'), Column('loan_tenure_months', 'int'),
+    Column('business_activity_code', 'int', required=False),
+    Column('emi_record_id'), Column('emi_due_date', 'date'), Column('emi_paid_date', 'date'),
+    Column('emi_amount', 'decimal'), Column('payment_status_detailed'), Column('dpd_days', 'int'),
+]
+TRANSACTION_COLUMNS = [
+    Column('beneficiary_id'), Column('account_number'), Column('transaction_id'),
+    Column('transaction_timestamp', 'datetime'), Column('type', 'upper', field='transaction_type'),
+    Column('amount', 'decimal'), Column('description'), Column('current_balance', 'decimal'), Column('mode'),
+    Column('merchant_category', required=False), Column('is_recurring', 'bool'),
+    Column('location_city', required=False),
+]
+RECHARGE_COLUMNS = [
+    Column('beneficiary_id'), Column('operator_name'), Column('plan_type'), Column('bill_payment_date', 'date'),
+    Column('recharge_amount', 'decimal'), Column('validity_days', 'int'), Column('payment_source'),
+    Column('is_auto_pay', 'bool'), Column('data_usage_gb', 'float', required=False),
+]
+ELECTRICITY_COLUMNS = [
+    Column('beneficiary_id'), Column('service_id'), Column('billing_cycle_start', 'date'),
+    Column('billing_cycle_end', 'date'), Column('kwh_consumption', 'int'), Column('meter_reading_new', 'int'),
+    Column('due_date', 'date'), Column('bill_amount', 'decimal'), Column('payment_date', 'date'),
+    Column('payment_status'), Column('subsidy_amount', 'decimal'),
+]
+PDS_COLUMNS = [
+    Column('beneficiary_id'), Column('ration_card_id'), Column('card_type'), Column('num_family_members', 'int'),
+    Column('member_aadhaar_list', field='member_aadhar_list'), Column('transaction_date', 'date'),
+    Column('item_name'), Column('allocated_quantity_kg', 'float'), Column('actual_uptake_quantity_kg', 'float'),
+    Column('uptake_ratio', 'float'),
+]
+UTILITY_COLUMNS = [
+    Column('beneficiary_id'), Column('connection_id'), Column('utility_type'), Column('billing_period'),
+    Column('bill_due_date', 'date'), Column('bill_amount', 'decimal'), Column('payment_date', 'date'),
+    Column('arrears_amount', 'decimal'), Column('metered_consumption', 'float'),
+]
+
+
+# --- CHUNK WRITERS (one per CSV feed) ---
+LOAN_FIELDS = ['loan_id', 'beneficiary_id', 'loan_scheme', 'sanction_date', 'original_loan_amount',
+               'loan_tenure_months', 'business_activity_code']
+EMI_FIELDS = ['emi_record_id', 'loan_id', 'emi_due_date', 'emi_paid_date', 'emi_amount',
+              'payment_status_detailed', 'dpd_days']
+TRANSACTION_FIELDS = ['transaction_id', 'beneficiary_id', 'account_number', 'transaction_timestamp',
+                      'transaction_type', 'amount', 'description', 'current_balance', 'mode',
+                      'merchant_category', 'is_recurring', 'location_city']
+RECHARGE_FIELDS = ['beneficiary_id', 'operator_name', 'bill_payment_date', 'recharge_amount', 'plan_type',
+                   'validity_days', 'payment_source', 'is_auto_pay', 'data_usage_gb']
+ELECTRICITY_FIELDS = ['service_id', 'beneficiary_id', 'billing_cycle_start', 'billing_cycle_end',
+                      'kwh_consumption', 'meter_reading_new', 'due_date', 'bill_amount', 'payment_date',
+                      'payment_status', 'subsidy_amount']
+RATION_CARD_FIELDS = ['ration_card_id', 'beneficiary_id', 'card_type', 'num_family_members', 'member_aadhar_list']
+PDS_FIELDS = ['ration_card_id', 'transaction_date', 'item_name', 'allocated_quantity_kg',
+              'actual_uptake_quantity_kg', 'uptake_ratio']
+UTILITY_FIELDS = ['connection_id', 'beneficiary_id', 'utility_type', 'billing_period', 'bill_due_date',
+                  'bill_amount', 'payment_date', 'arrears_amount', 'metered_consumption']
+
+def insert_missing(model, objects, natural_key, existing):
+    """Inserts the objects whose natural key is not in `existing`; the first occurrence wins, like get_or_create."""
+    new = {}
+    for obj in objects:
+        key = natural_key(obj)
+        if key not in existing:
+            new.setdefault(key, obj)
+    model.objects.bulk_create(list(new.values()))
+
+def apply_repayment_chunk(frame):
+    upsert(Loan, frame, LOAN_FIELDS, 'loan_id')
+
+    loans = dict(Loan.objects.filter(loan_id__in=set(frame['loan_id'])).values_list('loan_id', 'pk'))
+    upsert(EmiDetail, frame.assign(loan_id=frame['loan_id'].map(loans)), EMI_FIELDS, 'emi_record_id')
+
+def apply_transactions_chunk(frame):
+    upsert(AccountTransaction, frame, TRANSACTION_FIELDS, 'transaction_id')
+
+def apply_recharge_chunk(frame):
+    # MobileRecharge has no unique column, so rows are matched on the same
+    # (beneficiary, operator, date, amount) tuple the old get_or_create used.
+    existing = set(MobileRecharge.objects.filter(
+        beneficiary_id__in=set(frame['beneficiary_id'].tolist()),
+        bill_payment_date__in=set(frame['bill_payment_date']),
+    ).values_list('beneficiary_id', 'operator_name', 'bill_payment_date', 'recharge_amount'))
+    insert_missing(
+        MobileRecharge, to_instances(MobileRecharge, frame, RECHARGE_FIELDS),
+        lambda r: (r.beneficiary_id, r.operator_name, r.bill_payment_date, r.recharge_amount), existing,
+    )
+
+def apply_electricity_chunk(frame):
+    upsert(ElectricityBill, frame, ELECTRICITY_FIELDS, 'service_id')
 
-# ... (All the import functions like import_repayment, import_transactions, etc., remain exactly the same as before) ...
-def import_repayment(file_path):
+def apply_pds_chunk(frame):
+    # RationCard is one-to-one with Beneficiary: a beneficiary keeps the card it
+    # already has (or the first one seen), and rows for any other card are skipped.
+    card_owner = dict(RationCard.objects.filter(
+        beneficiary_id__in=set(frame['beneficiary_id'].tolist()),
+    ).values_list('beneficiary_id', 'ration_card_id'))
+    first_cards = frame.drop_duplicates('beneficiary_id').set_index('beneficiary_id')['ration_card_id']
+    owner = frame['beneficiary_id'].map({**first_cards.to_dict(), **card_owner})
+    keep = owner == frame['ration_card_id']
+    if not keep.all():
+        print(f"  - WARNING: Skipped {(~keep).sum()} rows for beneficiaries that already hold another ration card.")
+        frame = frame[keep]
+
+    upsert(RationCard, frame, RATION_CARD_FIELDS, 'ration_card_id')
+
+    cards = dict(RationCard.objects.filter(
+        ration_card_id__in=set(frame['ration_card_id']),
+    ).values_list('ration_card_id', 'pk'))
+    frame = frame.assign(ration_card_id=frame['ration_card_id'].map(cards))
+    existing = set(PDSTransaction.objects.filter(
+        ration_card_id__in=set(cards.values()),
+        transaction_date__in=set(frame['transaction_date']),
+    ).values_list('ration_card_id', 'transaction_date', 'item_name'))
+    insert_missing(
+        PDSTransaction, to_instances(PDSTransaction, frame, PDS_FIELDS),
+        lambda t: (t.ration_card_id, t.transaction_date, t.item_name), existing,
+    )
+
+def apply_utilities_chunk(frame):
+    upsert(UtilityBill, frame, UTILITY_FIELDS, 'connection_id')
+
+
+# --- IMPORTERS ---
+def import_repayment(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports Loan and EmiDetail data from repayment.csv."""
-    print(f"\nImporting Repayment data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
-                continue
-            loan, _ = Loan.objects.update_or_create(
-                loan_id=row[1],
-                defaults={
-                    'beneficiary': beneficiary, 'loan_scheme': row[2], 'sanction_date': row[3],
-                    'original_loan_amount': Decimal(row[4]), 'loan_tenure_months': int(row[5]),
-                })
-            EmiDetail.objects.update_or_create(
-                emi_record_id=row[7],
-                defaults={
-                    'loan': loan, 'emi_due_date': row[8], 'emi_paid_date': row[9] or None,
-                    'emi_amount': Decimal(row[10]), 'payment_status_detailed': row[11], 'dpd_days': int(row[12]),
-                })
-    print("Repayment data import complete.")
-
-def import_transactions(file_path):
+    return run_import('repayment', file_path, batch_size, resolver, full)
+
+def import_transactions(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports AccountTransaction data from transactions.csv."""
-    print(f"\nImporting Account Transaction data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
-                continue
-            AccountTransaction.objects.update_or_create(
-                transaction_id=row[2],
-                defaults={
-                    'beneficiary': beneficiary, 'account_number': row[1], 'transaction_timestamp': row[3],
-                    'transaction_type': row[4].upper(), 'amount': Decimal(row[5]), 'description': row[6],
-                    'current_balance': Decimal(row[7]), 'mode': row[8], 'is_recurring': row[10].lower() == 'true',
-                })
-    print("Account Transaction data import complete.")
-
-def import_recharge(file_path):
+    return run_import('transaction', file_path, batch_size, resolver, full)
+
+def import_recharge(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports MobileRecharge data from recharge.csv."""
-    print(f"\nImporting Mobile Recharge data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
-                continue
-            MobileRecharge.objects.get_or_create(
-                beneficiary=beneficiary, operator_name=row[1], bill_payment_date=row[3],
-                recharge_amount=Decimal(row[4]),
-                defaults={
-                    'plan_type': row[2], 'validity_days': int(row[5]),
-                    'payment_source': row[6], 'is_auto_pay': row[7].lower() == 'true',
-                })
-    print("Mobile Recharge data import complete.")
-
-def import_electricity(file_path):
+    return run_import('recharge', file_path, batch_size, resolver, full)
+
+def import_electricity(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports ElectricityBill data from electricity.csv."""
-    print(f"\nImporting Electricity Bill data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
-                continue
-            ElectricityBill.objects.update_or_create(
-                service_id=row[1],
-                defaults={
-                    'beneficiary': beneficiary, 'billing_cycle_start': row[2], 'billing_cycle_end': row[3],
-                    'kwh_consumption': int(row[4]), 'meter_reading_new': int(row[5]), 'due_date': row[6],
-                    'bill_amount': Decimal(row[7]), 'payment_date': row[8] or None, 'payment_status': row[9],
-                    'subsidy_amount': Decimal(row[10]),
-                })
-    print("Electricity Bill data import complete.")
-
-def import_pds(file_path):
+    return run_import('electricity', file_path, batch_size, resolver, full)
+
+def import_pds(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports RationCard and PDSTransaction data from pds.csv."""
-    print(f"\nImporting PDS data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
-                continue
-            ration_card, _ = RationCard.objects.update_or_create(
-                ration_card_id=row[1],
-                defaults={
-                    'beneficiary': beneficiary, 'card_type': row[2],
-                    'num_family_members': int(row[3]), 'member_aadhar_list': row[4],
-                })
-            PDSTransaction.objects.get_or_create(
-                ration_card=ration_card, transaction_date=row[5], item_name=row[6],
-                defaults={
-                    'allocated_quantity_kg': float(row[7]), 'actual_uptake_quantity_kg': float(row[8]),
-                    'uptake_ratio': float(row[9]),
-                })
-    print("PDS data import complete.")
-
-def import_utilities(file_path):
+    return run_import('pds', file_path, batch_size, resolver, full)
+
+def import_utilities(file_path, batch_size=DEFAULT_BATCH_SIZE, resolver=None, full=False):
     """Imports UtilityBill data from utilities.csv."""
-    print(f"\nImporting Utility Bill data from '{file_path}'...")
-    with open(file_path, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            beneficiary = get_beneficiary(row[0])
-            if not beneficiary:
+    return run_import('utility', file_path, batch_size, resolver, full)
+
+# import type -> (label, column spec, chunk writer, default CSV file)
+FEEDS = {
+    'repayment': ('Repayment', REPAYMENT_COLUMNS, apply_repayment_chunk, 'repayment.csv'),
+    'transaction': ('Account Transaction', TRANSACTION_COLUMNS, apply_transactions_chunk, 'transactions.csv'),
+    'recharge': ('Mobile Recharge', RECHARGE_COLUMNS, apply_recharge_chunk, 'recharge.csv'),
+    'electricity': ('Electricity Bill', ELECTRICITY_COLUMNS, apply_electricity_chunk, 'electricity.csv'),
+    'pds': ('PDS', PDS_COLUMNS, apply_pds_chunk, 'pds.csv'),
+    'utility': ('Utility Bill', UTILITY_COLUMNS, apply_utilities_chunk, 'utilities.csv'),
+}
+
+
+# --- PARALLEL "all" RUN ---
+def import_all_parallel(files, batch_size, resolver, workers, full=False):
+    """
+    Imports several feeds concurrently. `files` maps import type -> CSV path.
+
+    On SQLite, which allows a single writer, `workers` threads parse and
+    convert the CSVs and hand chunks over a bounded queue to the calling
+    thread, which does all the writes. On a server database every feed is
+    imported end to end by its own worker thread (and database connection).
+    """
+    if connection.vendor == 'sqlite':
+        return _import_single_writer(files, batch_size, resolver, workers, full)
+
+    def import_feed(import_type, file_path):
+        try:
+            return run_import(import_type, file_path, batch_size, resolver, full, refresh=False)
+        finally:
+            connection.close()  # Each worker thread holds its own connection.
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(import_feed, t, path) for t, path in files.items()]
+        all_stats = [future.result() for future in futures]
+    # Once every feed has committed, so no refresh sees another feed half-written.
+    refresh_touched(all_stats)
+    return all_stats
+
+def _import_single_writer(files, batch_size, resolver, workers, full):
+    chunks = queue.Queue(maxsize=workers * 2)  # Bounds the parsed-but-unwritten backlog.
+    stop = threading.Event()  # Set when the writer fails, so producers stop instead of blocking on a full queue.
+    all_stats = {import_type: new_stats(FEEDS[import_type][0]) for import_type in files}
+
+    plans = {}
+    for import_type, file_path in files.items():
+        file_hash, unchanged, since = plan_import(import_type, file_path, full)
+        if unchanged:
+            print(f"\n{FEEDS[import_type][0]}: '{file_path}' is unchanged since the last import. Skipping.")
+            all_stats[import_type]['unchanged'] = True
+        else:
+            plans[import_type] = (file_hash, since)
+
+    def put(item):
+        """Queues `item` unless the writer has stopped; returns whether it was queued."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
-            UtilityBill.objects.update_or_create(
-                connection_id=row[1],
-                defaults={
-                    'beneficiary': beneficiary, 'utility_type': row[2], 'billing_period': row[3],
-                    'bill_due_date': row[4], 'bill_amount': Decimal(row[5]), 'payment_date': row[6] or None,
-                    'arrears_amount': Decimal(row[7]), 'metered_consumption': float(row[8]) if row[8] else None,
-                })
-    print("Utility Bill data import complete.")
+        return False
+
+    def produce(import_type, file_path):
+        label, columns, _, _ = FEEDS[import_type]
+        watermark = WATERMARKS.get(import_type, (None, False))[0]
+        try:
+            for chunk in parse_chunks(label, columns, file_path, batch_size, resolver,
+                                      all_stats[import_type], watermark, plans[import_type][1]):
+                if not put((import_type, chunk)):
+                    return
+        finally:
+            put((import_type, None))  # Sentinel: this feed is fully parsed.
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(produce, t, files[t]) for t in plans]
+        pending = set(plans)
+        try:
+            while pending:
+                import_type, chunk = chunks.get()
+                label, _, apply_chunk, _ = FEEDS[import_type]
+                if chunk is None:
+                    pending.discard(import_type)
+                    finish_stats(all_stats[import_type])
+                    continue
+                read, frame = chunk
+                write_chunk(label, apply_chunk, read, frame, all_stats[import_type])
+        except BaseException:
+            stop.set()  # Lets the producers return so the pool can shut down, then re-raises.
+            raise
+        for future in futures:
+            future.result()  # Re-raise any parse error.
+    refresh_touched(list(all_stats.values()))
+    for import_type, (file_hash, _) in plans.items():
+        record_import(import_type, files[import_type], file_hash, all_stats[import_type])
+    return list(all_stats.values())
+
+def print_timing_report(all_stats):
+    """Prints per-feed row counts and parse/write/wall-clock times, slowest feed first."""
+    print("\n📊 Per-file timing report:")
+    print(f"  {'Feed':<22}{'Rows':>10}{'Parse (s)':>12}{'Write (s)':>12}{'Wall (s)':>11}{'Rows/sec':>12}")
+    for stats in sorted(all_stats, key=lambda s: s['wall'], reverse=True):
+        if stats['unchanged']:
+            print(f"  {stats['label']:<22}{'unchanged, skipped':>22}")
+            continue
+        rate = stats['rows'] / stats['wall'] if stats['wall'] else 0
+        print(f"  {stats['label']:<22}{stats['rows']:>10}{stats['parse']:>12.2f}"
+              f"{stats['write']:>12.2f}{stats['wall']:>11.2f}{rate:>12,.0f}")
+
+
+def parse_options(argv):
+    """Splits `--name=value` options and `--flag` switches out of argv, returning (positional_args, options)."""
+    args, options = [], {}
+    for arg in argv:
+        if arg.startswith('--') and '=' in arg:
+            name, value = arg[2:].split('=', 1)
+            options[name] = value
+        elif arg.startswith('--'):
+            options[arg[2:]] = True
+        else:
+            args.append(arg)
+    return args, options
 
 
 # --- SCRIPT EXECUTION LOGIC ---
 if __name__ == '__main__':
-    importers = {
-        'repayment': (import_repayment, 'repayment.csv'),
-        'transaction': (import_transactions, 'transactions.csv'),
-        'recharge': (import_recharge, 'recharge.csv'),
-        'electricity': (import_electricity, 'electricity.csv'),
-        'pds': (import_pds, 'pds.csv'),
-        'utility': (import_utilities, 'utilities.csv'),
-    }
+    args, options = parse_options(sys.argv[1:])
+    batch_size = int(options.get('batch-size', DEFAULT_BATCH_SIZE))
+    workers = int(options.get('workers', 1))
+    full = bool(options.get('full', False))
 
     # Check if the user wants to run all importers
-    if len(sys.argv) == 2 and sys.argv[1].lower() == 'all':
+    if len(args) == 1 and args[0].lower() == 'all':
         print("🚀 Starting bulk data import for all files...")
-        for import_type, (import_func, filename) in importers.items():
+        started = time.perf_counter()
+        resolver = BeneficiaryResolver()
+        files = {}
+        for import_type, (_, _, _, filename) in FEEDS.items():
             if os.path.exists(filename):
-                import_func(filename)
+                files[import_type] = filename
             else:
                 print(f"\n- WARNING: File '{filename}' not found. Skipping {import_type} import.")
-        print("\n✅ All data imports are complete.")
+        if workers > 1:
+            all_stats = import_all_parallel(files, batch_size, resolver, workers, full)
+        else:
+            all_stats = [run_import(t, path, batch_size, resolver, full, refresh=False) for t, path in files.items()]
+            refresh_touched(all_stats)
+        resolver.report()
+        print_timing_report(all_stats)
+        if any(not stats['unchanged'] for stats in all_stats):
+            refresh_portfolio_summaries()
+            print("\n📈 Portfolio report summaries refreshed.")
+        print(f"\n✅ All data imports are complete in {time.perf_counter() - started:.2f}s.")
+
+    # Move the stored windows to today (suitable for a daily cron); --full rebuilds every row
+    elif len(args) == 1 and args[0].lower() == 'features':
+        started = time.perf_counter()
+        written = refresh_features() if full else refresh_stale_features()
+        bump_generation('data')
+        print(f"✅ Feature store refreshed for {written} beneficiaries in {time.perf_counter() - started:.2f}s.")
+
+    # Recompute the portfolio report summaries (suitable for cron)
+    elif len(args) == 1 and args[0].lower() == 'reports':
+        started = time.perf_counter()
+        written = refresh_portfolio_summaries()
+        bump_generation('data')
+        summary = ', '.join(f"{report}: {rows}" for report, rows in written.items())
+        print(f"✅ Portfolio summaries refreshed ({summary}) in {time.perf_counter() - started:.2f}s.")
 
     # Logic for importing a single file (remains the same)
-    elif len(sys.argv) == 3:
-        importer_type = sys.argv[1].lower()
-        file_path = sys.argv[2]
-        import_function, _ = importers.get(importer_type, (None, None))
+    elif len(args) == 2:
+        importer_type = args[0].lower()
+        file_path = args[1]
 
-        if not import_function:
+        if importer_type not in FEEDS:
             print(f"Error: Unknown importer type '{importer_type}'")
             sys.exit(1)
         
-        import_function(file_path)
+        run_import(importer_type, file_path, batch_size, full=full)
 
     else:
         print("Usage:")
-        print("  To run all imports: python unified_import.py all")
-        print("  To run a single import: python unified_import.py <type> <filename>")
-        print(f"  Available types: {', '.join(importers.keys())}")
+        print("  To run all imports: python unified_import.py all [--batch-size=N] [--workers=N] [--full]")
+        print("  To run a single import: python unified_import.py <type> <filename> [--batch-size=N] [--full]")
+        print("  To move the feature store's windows to today (daily): python unified_import.py features [--full]")
+        print("  To refresh the portfolio report summaries: python unified_import.py reports")
+        print("  --full re-imports files even if unchanged since the last run, or rebuilds every feature row.")
+        print(f"  Available types: {', '.join(FEEDS.keys())}")
         sys.exit(1)
\ No newline at end of file
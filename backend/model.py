@@ -1,12 +1,27 @@
 import os
+import sys
+import json
+import time
+import shutil
+import pickle
+import inspect
+import hashlib
+import multiprocessing
+from datetime import datetime, timezone
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.impute import SimpleImputer
 from sklearn.model_selection import StratifiedKFold
-from sklearn.calibration import CalibratedClassifierCV
+from sklearn.metrics import roc_auc_score
 import lightgbm as lgb
 import joblib
 
+from api.calibration import apply_calibration, fit_calibration, load_calibration, save_calibration
+from api.feature_modules import attach, compute_features, feature_columns, fill_missing, selected_modules
+
 # ---------------- Config ----------------
 CONFIG = {
     'csv_paths': {
@@ -18,7 +33,81 @@ CONFIG = {
         'pds': 'pds.csv',
         'other_utils': 'utilities.csv'
     },
+    # 'csv' runs the feature modules on the raw CSVs above; 'db' runs them on
+    # rows read from the imported tables; 'store' reads the BeneficiaryFeatures
+    # table kept up to date by import_data.py (one row per beneficiary)
+    'feature_source': 'csv',
+    # Feature modules (api/feature_modules.py) to build, None = all registered.
+    # The windowed ones count back from features_as_of ('YYYY-MM-DD'; None =
+    # today). With None, the 'store' source serves its windows as of their last
+    # refresh (import_data.py features, daily); with a date, it recomputes the
+    # rows stored as of another day.
+    'feature_modules': None,
+    'features_as_of': None,
     'model_dir': 'models/',
+    # Published scores: the CSV and the memory-mapped index the API serves from
+    'scores_csv': 'beneficiary_scores.csv',
+    'score_index': 'beneficiary_scores.idx',
+    # Default probability -> points score and risk band (calibrate): base_score
+    # points at base_odds good:bad odds, pdo more points each time the odds
+    # double, clipped to [min_score, max_score]. Bands are (lowest score, label),
+    # best first; the last one (None) takes everything below.
+    'calibration': {
+        'base_score': 600,
+        'base_odds': 19,        # i.e. a 5% default probability scores 600
+        'pdo': 40,
+        'min_score': 300,
+        'max_score': 900,
+        'bands': [(600, 'Low Risk'), (500, 'Moderate Risk'), (None, 'High Risk')],
+    },
+    # Cross-validated training (train_cv): folds run in parallel worker
+    # processes (None = one per fold, up to the CPU count), each boosting up
+    # to max_rounds and stopping once validation AUC has not improved for
+    # early_stopping_rounds. calibration: 'isotonic', 'sigmoid' or None.
+    'cv': {
+        'n_splits': 5,
+        'max_rounds': 2000,
+        'early_stopping_rounds': 50,
+        'calibration': 'isotonic',
+        'workers': None,
+        'num_threads': None,
+    },
+    # Hyperparameter search (tune): n_trials random configurations from
+    # SEARCH_SPACE, trained concurrently on a cached LightGBM Dataset binary of
+    # a stratified train/validation split. A trial whose validation AUC is below
+    # the median of earlier trials at a checkpoint (prune_warmup rounds, then
+    # every doubling) is pruned. The best configuration is saved as a versioned
+    # file in models/tuning/ and as models/best_params.json. Only when
+    # use_tuned_params is set do train and train_cv merge its SEARCH_SPACE
+    # hyperparameters over lgb_params; the number of rounds is never taken
+    # from it.
+    'tuning': {
+        'n_trials': 40,
+        'valid_fraction': 0.2,
+        'max_rounds': 2000,
+        'early_stopping_rounds': 50,
+        'prune_warmup': 25,
+        'prune_min_trials': 5,
+        'workers': None,
+        'num_threads': None,
+    },
+    'use_tuned_params': False,
+    # Feature frames cached between runs (load_features), keyed by the inputs'
+    # content and the feature code. Entries unused for max_age_days are evicted,
+    # then the least recently used ones until the cache fits in max_bytes.
+    'feature_cache': {
+        'dir': 'models/feature_cache/',
+        'max_age_days': 7,
+        'max_bytes': 2 * 1024 ** 3,
+    },
+    # Chunked batch scoring (batch_score): beneficiaries per block, worker
+    # processes (None = one per CPU) and LightGBM threads per worker (None =
+    # CPUs / workers)
+    'batch_scoring': {
+        'chunk_size': 50000,
+        'workers': None,
+        'num_threads': None,
+    },
     'random_state': 42,
     'lgb_params': {
         'objective': 'binary',
@@ -33,67 +122,357 @@ def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
+def model_params(config):
+    """
+    config['lgb_params'], overlaid with the tuned hyperparameters (TUNED_PARAMS)
+    in the model dir when use_tuned_params is set. Other tuned keys (e.g. a
+    round count from an older file) are ignored with a warning, and a value
+    outside its SEARCH_SPACE range raises ValueError. The merged parameters
+    are printed.
+    """
+    params = dict(config['lgb_params'])
+    path = os.path.join(config['model_dir'], 'best_params.json')
+    if not (config.get('use_tuned_params') and os.path.exists(path)):
+        return params
+    with open(path) as f:
+        artifact = json.load(f)
+    tuned = artifact['params']
+    ignored = sorted(set(tuned) - TUNED_PARAMS)
+    if ignored:
+        print(f"WARNING: ignoring {', '.join(ignored)} from {path}; only the searched hyperparameters are applied.")
+    for name, (low, high, _) in SEARCH_SPACE.items():
+        if name in tuned and not low <= tuned[name] <= high:
+            raise ValueError(f"Tuned {name}={tuned[name]} in {path} is outside its search range [{low}, {high}].")
+    params.update({name: value for name, value in tuned.items() if name in TUNED_PARAMS})
+    print(f"Using tuned hyperparameters v{artifact.get('version')} from {path} "
+          f"(validation AUC {artifact.get('auc')}): {params}")
+    return params
+
 def load_csv_safe(path):
     if not os.path.exists(path):
         print(f"Warning: CSV not found: {path}. Returning empty DataFrame")
         return pd.DataFrame()
     return pd.read_csv(path)
 
+def setup_django():
+    """Makes the Django models importable; needed by the database-backed feature sources."""
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'base.settings')
+    import django
+    django.setup()
+
 # ---------------- Feature Engineering ----------------
 def build_features(config):
+    source = config.get('feature_source', 'csv')
+    if source == 'store':
+        return build_features_from_store(config)
+    if source == 'db':
+        return build_features_from_db(config)
+    if source != 'csv':
+        raise ValueError(f"Unknown feature_source '{source}'")
     cp = config['csv_paths']
     df_b = load_csv_safe(cp['beneficiaries'])
-    df_repay = load_csv_safe(cp['repayment'])
-    df_aa = load_csv_safe(cp['aa'])
-    df_mob = load_csv_safe(cp['mobile'])
-    df_elec = load_csv_safe(cp['electric'])
 
     if df_b.empty:
         raise ValueError("Beneficiaries CSV missing or empty.")
 
-    # Basic features
-    df_b['age'] = pd.to_datetime('today') - pd.to_datetime(df_b.get('date_of_birth', pd.NaT), errors='coerce')
-    df_b['age'] = df_b['age'].dt.days / 365.25
-    df_b['aadhaar_present'] = df_b.get('aadhaar_number', pd.NA).notna().astype(int)
-    df_b['mobile_present'] = df_b.get('mobile_number', pd.NA).notna().astype(int)
-
-    base = df_b.set_index('beneficiary_id')[['age','aadhaar_present','mobile_present','target_default']]
-
-    # Repayment features
-    if not df_repay.empty:
-        df_repay['dpd_days'] = pd.to_numeric(df_repay.get('dpd_days',0), errors='coerce').fillna(0)
-        repay_feats = df_repay.groupby('beneficiary_id').agg(
-            num_emi_records=('emi_record_id','nunique'),
-            total_emi_amount=('emi_amount','sum'),
-            avg_dpd=('dpd_days','mean'),
-            max_dpd=('dpd_days','max')
-        ).fillna(0)
-        base = base.join(repay_feats, how='left').fillna(0)
-
-    # AA features
-    if not df_aa.empty:
-        df_aa['amount'] = pd.to_numeric(df_aa.get('amount',0), errors='coerce').fillna(0)
-        df_aa['type'] = df_aa.get('type','').str.upper()
-        credits = df_aa[df_aa['type']=='CREDIT'].groupby('beneficiary_id')['amount'].sum().rename('total_credit')
-        debits = df_aa[df_aa['type']=='DEBIT'].groupby('beneficiary_id')['amount'].sum().rename('total_debit')
-        aa_agg = pd.concat([credits,debits],axis=1).fillna(0)
-        base = base.join(aa_agg, how='left').fillna(0)
-
-    # Mobile features
-    if not df_mob.empty:
-        df_mob['recharge_amount'] = pd.to_numeric(df_mob.get('recharge_amount',0), errors='coerce').fillna(0)
-        mob_agg = df_mob.groupby('beneficiary_id')['recharge_amount'].agg(['sum','mean']).rename(columns={'sum':'mob_total_recharge','mean':'mob_avg_recharge'})
-        base = base.join(mob_agg, how='left').fillna(0)
-
-    # Electricity features
-    if not df_elec.empty:
-        df_elec['bill_amount'] = pd.to_numeric(df_elec.get('bill_amount',0), errors='coerce').fillna(0)
-        elec_agg = df_elec.groupby('beneficiary_id')['bill_amount'].agg(['sum','mean']).rename(columns={'sum':'elec_total','mean':'elec_avg'})
-        base = base.join(elec_agg, how='left').fillna(0)
-
-    base.fillna(0, inplace=True)
+    base = base_features(df_b.set_index('beneficiary_id'))
+
+    # Every feature family, from one read of each source CSV
+    modules = config.get('feature_modules')
+    features = compute_features(csv_sources(cp), as_of=config.get('features_as_of'), modules=modules)
+    return attach(base, features, modules)
+
+# feature_modules source -> (csv_paths key, {CSV column: normalized column})
+CSV_SOURCES = {
+    'emis': ('repayment', {'emi_due_date': 'due_date', 'emi_paid_date': 'paid_date', 'emi_amount': 'amount'}),
+    'transactions': ('aa', {'transaction_timestamp': 'timestamp', 'current_balance': 'balance'}),
+    'recharges': ('mobile', {'bill_payment_date': 'date', 'recharge_amount': 'amount'}),
+    'electricity': ('electric', {'payment_status': 'status', 'bill_amount': 'amount', 'subsidy_amount': 'subsidy'}),
+    'utilities': ('other_utils', {'bill_due_date': 'due_date', 'bill_amount': 'amount',
+                                  'arrears_amount': 'arrears'}),
+    'pds': ('pds', {'num_family_members': 'family_members', 'transaction_date': 'date',
+                    'allocated_quantity_kg': 'allocated_kg', 'actual_uptake_quantity_kg': 'uptake_kg'}),
+}
+
+def csv_sources(csv_paths):
+    """{source: normalized frame} for compute_features(), reading each CSV once."""
+    sources = {}
+    for name, (key, renames) in CSV_SOURCES.items():
+        df = load_csv_safe(csv_paths[key])
+        if df.empty:
+            continue
+        if name == 'pds':
+            # As import_data.py stores them: one ration card per beneficiary (the first seen)
+            first_card = df.groupby('beneficiary_id')['ration_card_id'].transform('first')
+            df = df[df['ration_card_id'] == first_card]
+        sources[name] = df.rename(columns=renames)
+    return sources
+
+def base_features(df_b):
+    """Age and identity flags from beneficiary rows (date_of_birth, aadhaar_number, mobile_number)."""
+    out = pd.DataFrame(index=df_b.index)
+    out['age'] = (pd.to_datetime('today') - pd.to_datetime(df_b['date_of_birth'], errors='coerce')).dt.days / 365.25
+    out['aadhaar_present'] = df_b['aadhaar_number'].notna().astype(int)
+    out['mobile_present'] = df_b['mobile_number'].notna().astype(int)
+    out['target_default'] = df_b['target_default'].astype(int)
+    return out
+
+STORE_COLUMNS = ['pk', 'beneficiary_id', 'date_of_birth', 'aadhaar_number', 'mobile_number', 'target_default']
+
+def _store_rows(queryset):
+    """values_list() of the beneficiary columns and every BeneficiaryFeatures column."""
+    from api.features import FEATURE_COLUMNS
+    return queryset.values_list(
+        'pk', 'beneficiary_id', 'date_of_birth', 'aadhar_number', 'mobile_number', 'target_default',
+        *[f'features__{col}' for col in FEATURE_COLUMNS], 'features__event_features',
+        'features__event_features_as_of',
+    )
+
+def _store_frame(rows, config):
+    """
+    The feature frame of store rows, with the event features as stored (as of
+    the day of their last refresh). Rows never stored, and, when the run sets
+    features_as_of, rows stored as of another day, are recomputed from the
+    tables, so every row's windows share that reference date.
+    """
+    from api.features import EVENT_COLUMNS, FEATURE_COLUMNS, module_features
+    df = pd.DataFrame.from_records(
+        rows, columns=[*STORE_COLUMNS, *FEATURE_COLUMNS, 'event_features', 'event_features_as_of'])
+    events = pd.DataFrame.from_records(
+        [stored or {} for stored in df['event_features']], columns=EVENT_COLUMNS, index=df.index)
+    features = df[FEATURE_COLUMNS].join(events).astype(float)
+
+    modules = config.get('feature_modules')
+    as_of = pd.Timestamp(config.get('features_as_of') or 'today').date()
+    stale = df['event_features_as_of'].isna().to_numpy()
+    if config.get('features_as_of'):
+        stale = stale | (df['event_features_as_of'] != as_of).to_numpy()
+    event_modules = [m.name for m in selected_modules(modules) if set(m.columns) & set(EVENT_COLUMNS)]
+    if stale.any() and event_modules:
+        fresh = module_features(df.loc[stale, 'pk'].tolist(), as_of=as_of, modules=event_modules)
+        columns = [col for col in fresh.columns if col in EVENT_COLUMNS]
+        features.loc[stale, columns] = fresh.reindex(df.loc[stale, 'pk'])[columns].to_numpy()
+        print(f"Recomputed event features as of {as_of} for {int(stale.sum())} of {len(df)} store rows")
+    df = df.set_index('beneficiary_id')
+    features.index = df.index
+    # Beneficiaries without any rows: filled as compute_features() does
+    return base_features(df).join(fill_missing(features[feature_columns(modules)], modules))
+
+def build_features_from_store(config, chunk_size=10000):
+    """Same frame as build_features(), read from the precomputed BeneficiaryFeatures table."""
+    setup_django()
+    from api.models import Beneficiary
+
+    rows = _store_rows(Beneficiary.objects.order_by('pk'))
+    df = _store_frame(rows.iterator(chunk_size=chunk_size), config)
+    if df.empty:
+        raise ValueError("Beneficiary table is empty.")
+    return df
+
+def iter_features_from_store(config, chunk_size=10000):
+    """build_features_from_store() in blocks of `chunk_size` beneficiaries, by primary-key ranges."""
+    setup_django()
+    from api.models import Beneficiary
+
+    last_pk = 0
+    while True:
+        rows = list(_store_rows(Beneficiary.objects.filter(pk__gt=last_pk).order_by('pk'))[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield _store_frame(rows, config)
+
+def build_features_from_db(config, chunk_size=10000):
+    """Same frame as build_features(), from the imported tables by api.features (one query per table)."""
+    setup_django()
+    from api.models import Beneficiary
+    from api.features import module_features
+
+    rows = Beneficiary.objects.order_by('pk').values_list(
+        'pk', 'beneficiary_id', 'date_of_birth', 'aadhar_number', 'mobile_number', 'target_default')
+    df_b = pd.DataFrame.from_records(
+        rows.iterator(chunk_size=chunk_size),
+        columns=['pk', 'beneficiary_id', 'date_of_birth', 'aadhaar_number', 'mobile_number', 'target_default'],
+    ).set_index('pk')
+    if df_b.empty:
+        raise ValueError("Beneficiary table is empty.")
+
+    modules = config.get('feature_modules')
+    features = module_features(as_of=config.get('features_as_of'), modules=modules, chunk_size=chunk_size)
+    base = attach(base_features(df_b), features, modules)
+    base.index = df_b['beneficiary_id']
     return base
 
+def compare_feature_sources(config, left='csv', right='db', tolerance=1e-6):
+    """
+    Builds the feature frame from two sources and reports any mismatch in
+    columns, beneficiaries or values (beyond `tolerance`). Returns True on parity.
+    """
+    frames = {}
+    for source in (left, right):
+        frames[source] = build_features({**config, 'feature_source': source}).sort_index()
+    a, b = frames[left], frames[right]
+    ok = True
+    if list(a.columns) != list(b.columns):
+        print(f"Column mismatch:\n  {left}: {list(a.columns)}\n  {right}: {list(b.columns)}")
+        ok = False
+    if not a.index.equals(b.index):
+        print(f"Beneficiary mismatch: {len(a.index.symmetric_difference(b.index))} IDs only in one source")
+        ok = False
+    common = a.columns.intersection(b.columns)
+    rows = a.index.intersection(b.index)
+    diff = (a.loc[rows, common].astype(float) - b.loc[rows, common].astype(float)).abs().max()
+    for col, value in diff[diff > tolerance].items():
+        print(f"Value mismatch in '{col}': max abs diff {value:.6g}")
+        ok = False
+    print(f"Feature parity {left} vs {right}: {'OK' if ok else 'FAILED'} ({len(rows)} beneficiaries, {len(common)} columns)")
+    return ok
+
+# ---------------- Feature Cache ----------------
+FEATURE_CODE = [build_features, csv_sources, base_features, _store_rows, _store_frame,
+                build_features_from_store, build_features_from_db]
+
+def feature_code_version():
+    """Hash of the feature-building code here and in api/; any edit gives new cache keys."""
+    digest = hashlib.sha256()
+    for fn in FEATURE_CODE:
+        digest.update(inspect.getsource(fn).encode())
+    digest.update(json.dumps(CSV_SOURCES, sort_keys=True).encode())
+    for module in ('features.py', 'feature_modules.py', 'windowed_features.py'):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api', module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def _file_digest(path, memo):
+    """SHA-256 of a file's content, remembered in `memo` by (size, mtime) so unchanged files are read once."""
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    entry = memo.get(os.path.abspath(path))
+    if entry and entry['stamp'] == stamp:
+        return entry['sha256']
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    memo[os.path.abspath(path)] = {'stamp': stamp, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def _table_stamp(model):
+    """Row count, highest pk and, where the model has one, latest updated_at of a table."""
+    from django.db.models import Count, Max
+    stamp = {'n': Count('pk'), 'last_pk': Max('pk')}
+    if any(field.name == 'updated_at' for field in model._meta.get_fields()):
+        stamp['latest'] = Max('updated_at')
+    return [model._meta.label, model.objects.aggregate(**stamp)]
+
+def _database_inputs():
+    """
+    What the 'db' and 'store' features are computed from: the import ledger
+    and a stamp of every table they read, so rows written outside the
+    importers (the API, the admin) also give a new key.
+    """
+    setup_django()
+    from api.features import EVENT_SOURCES
+    from api.models import Beneficiary, BeneficiaryFeatures, ImportLedger, Loan, RationCard
+    tables = [Beneficiary, BeneficiaryFeatures, Loan, RationCard,
+              *(queryset.model for queryset, _, _, _ in EVENT_SOURCES.values())]
+    stamps = [
+        list(ImportLedger.objects.order_by('feed').values_list('feed', 'file_hash', 'row_count')),
+        *(_table_stamp(model) for model in tables),
+    ]
+    return json.dumps(stamps, default=str)
+
+def feature_cache_key(config):
+    """Content address of the feature frame `config` would build today."""
+    source = config.get('feature_source', 'csv')
+    memo_path = os.path.join(config['feature_cache']['dir'], 'file_hashes.json')
+    memo = {}
+    if os.path.exists(memo_path):
+        with open(memo_path) as f:
+            memo = json.load(f)
+    parts = [source, feature_code_version(), pd.Timestamp('today').date().isoformat(),  # age changes daily
+             f"modules={config.get('feature_modules')}@{config.get('features_as_of')}"]
+    if source == 'csv':
+        for name, path in sorted(config['csv_paths'].items()):
+            parts.append(f"{name}={_file_digest(path, memo) if os.path.exists(path) else 'missing'}")
+        ensure_dir(config['feature_cache']['dir'])
+        with open(f"{memo_path}.tmp", 'w') as f:
+            json.dump(memo, f)
+        os.replace(f"{memo_path}.tmp", memo_path)
+    else:
+        parts.append(_database_inputs())
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:24]
+
+def _write_frame(df, directory):
+    try:
+        df.to_parquet(os.path.join(directory, 'features.parquet'))
+    except ImportError:     # no pyarrow/fastparquet; a pickled frame loads just as fast
+        df.to_pickle(os.path.join(directory, 'features.pkl'), protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_frame(directory):
+    path = os.path.join(directory, 'features.parquet')
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return pd.read_pickle(os.path.join(directory, 'features.pkl'))
+
+def _directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+def evict_feature_cache(config, keep=None):
+    """Removes entries unused for max_age_days, then the least recently used beyond max_bytes."""
+    options = config['feature_cache']
+    root = options['dir']
+    if not os.path.isdir(root):
+        return 0
+    entries = sorted(
+        (entry.stat().st_mtime, entry.path, _directory_size(entry.path))
+        for entry in os.scandir(root) if entry.is_dir() and not entry.name.endswith('.tmp')
+    )
+    cutoff = time.time() - options['max_age_days'] * 86400
+    total = sum(size for _, _, size in entries)
+    removed = 0
+    for last_used, path, size in entries:
+        if os.path.basename(path) == keep:
+            continue
+        if last_used < cutoff or total > options['max_bytes']:
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+    return removed
+
+def load_features(config):
+    """
+    build_features(config), served from the feature cache when the inputs and
+    feature code are unchanged. A miss builds the frame, stores it as
+    Parquet (or a pickle without pyarrow) and evicts stale entries.
+    """
+    started = time.perf_counter()
+    options = config['feature_cache']
+    key = feature_cache_key(config)
+    directory = os.path.join(options['dir'], key)
+    if os.path.isdir(directory):
+        df = _read_frame(directory)
+        os.utime(directory)     # last used, for eviction
+        print(f"Features loaded from cache {key} in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({len(df):,} rows)")
+        return df
+
+    df = build_features(config)
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    ensure_dir(tmp_dir)
+    _write_frame(df, tmp_dir)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({'key': key, 'source': config.get('feature_source', 'csv'), 'rows': len(df),
+                   'columns': list(df.columns), 'created_at': datetime.now(timezone.utc).isoformat()}, f)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:     # another run stored the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict_feature_cache(config, keep=key)
+    print(f"Features built and cached as {key} in {time.perf_counter() - started:.2f}s ({len(df):,} rows)")
+    return df
+
 # ---------------- Train Model ----------------
 def train_model(df, config):
     y = df['target_default'].values
@@ -102,16 +481,341 @@ def train_model(df, config):
     imputer = SimpleImputer(strategy='median')
     X_imputed = imputer.fit_transform(X)
 
-    model = lgb.LGBMClassifier(**config['lgb_params'])
+    model = lgb.LGBMClassifier(**model_params(config))
     model.fit(X_imputed, y)
 
     ensure_dir(config['model_dir'])
     joblib.dump(model, os.path.join(config['model_dir'],'lgb_model.pkl'))
     joblib.dump(imputer, os.path.join(config['model_dir'],'imputer.pkl'))
+    save_calibration(config['model_dir'], None)  # a map fitted for an earlier model no longer applies
     print("Model and imputer saved.")
 
+# ---------------- Cross-Validated Training ----------------
+_cv_data = None
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss / 1024
+
+def _init_cv_worker(X, y):
+    """Process pool initializer: receives the training data once per worker, not once per fold."""
+    global _cv_data
+    _cv_data = (X, y)
+
+def _train_fold(fold, train_idx, val_idx, params, max_rounds, stopping_rounds, num_threads):
+    """Fits one fold with early stopping on its validation part; returns its metrics and predictions."""
+    started = time.perf_counter()
+    X, y = _cv_data
+    imputer = SimpleImputer(strategy='median')
+    X_train = imputer.fit_transform(X.iloc[train_idx])
+    X_val = imputer.transform(X.iloc[val_idx])
+    train_set = lgb.Dataset(X_train, y[train_idx])
+    booster = lgb.train({**params, 'metric': 'auc', 'num_threads': num_threads}, train_set,
+                        num_boost_round=max_rounds, valid_sets=[train_set.create_valid(X_val, y[val_idx])],
+                        callbacks=[lgb.early_stopping(stopping_rounds, verbose=False)])
+    preds = booster.predict(X_val, num_iteration=booster.best_iteration, num_threads=num_threads)
+    return {
+        'fold': fold,
+        'auc': roc_auc_score(y[val_idx], preds),
+        'best_iteration': booster.best_iteration or max_rounds,
+        'seconds': time.perf_counter() - started,
+        'peak_rss_mb': _peak_rss_mb(),
+        'val_idx': val_idx,
+        'preds': preds,
+    }
+
+def train_cv(df, config):
+    """
+    Stratified K-fold training. The folds are fitted in parallel processes,
+    each with its own imputer and early stopping on its validation fold,
+    and report AUC, best round, wall time and peak memory. The final model
+    is then fitted on all rows for the mean best round count. With
+    calibration enabled, a map fitted on the out-of-fold probabilities is
+    saved alongside it (see api/calibration.py) and applied by every
+    scoring path. Writes models/cv_report.json and returns the report.
+    """
+    options = config['cv']
+    started = time.perf_counter()
+    y = df['target_default'].astype(int).values
+    X = df.drop(columns=['target_default'])
+    n_splits = options['n_splits']
+    cpus = os.cpu_count() or 1
+    workers = options.get('workers') or min(n_splits, cpus)
+    num_threads = options.get('num_threads') or max(1, cpus // workers)
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=config['random_state']).split(X, y)
+    params = model_params(config)
+    params.pop('n_estimators', None)    # the rounds come from early stopping
+    fold_args = [(fold, train_idx, val_idx, params, options['max_rounds'],
+                  options['early_stopping_rounds'], num_threads)
+                 for fold, (train_idx, val_idx) in enumerate(folds, 1)]
+
+    print(f"Training {n_splits} folds with {workers} worker(s) x {num_threads} LightGBM thread(s)")
+    if workers == 1:
+        _init_cv_worker(X, y)
+        results = [_train_fold(*args) for args in fold_args]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_cv_worker, initargs=(X, y)) as pool:
+            results = list(pool.map(_train_fold, *zip(*fold_args)))
+
+    oof = np.empty(len(y))
+    print(f"  {'Fold':<6}{'AUC':>8}{'Rounds':>8}{'Seconds':>9}{'Peak MB':>9}")
+    for result in results:
+        oof[result['val_idx']] = result['preds']
+        print(f"  {result['fold']:<6}{result['auc']:>8.4f}{result['best_iteration']:>8}"
+              f"{result['seconds']:>9.2f}{result['peak_rss_mb']:>9.0f}")
+    aucs = np.array([result['auc'] for result in results])
+    rounds = int(round(np.mean([result['best_iteration'] for result in results])))
+    print(f"  AUC {aucs.mean():.4f} +/- {aucs.std():.4f}, out-of-fold AUC {roc_auc_score(y, oof):.4f}")
+
+    # Final model on all rows
+    imputer = SimpleImputer(strategy='median')
+    X_imputed = imputer.fit_transform(X)
+    model = lgb.LGBMClassifier(**{**params, 'n_estimators': rounds, 'n_jobs': cpus})
+    model.fit(X_imputed, y)
+    calibration = fit_calibration(oof, y, options['calibration']) if options.get('calibration') else None
+
+    ensure_dir(config['model_dir'])
+    joblib.dump(model, os.path.join(config['model_dir'], 'lgb_model.pkl'))
+    joblib.dump(imputer, os.path.join(config['model_dir'], 'imputer.pkl'))
+    save_calibration(config['model_dir'], calibration)
+
+    report = {
+        'folds': [{k: v for k, v in result.items() if k not in ('val_idx', 'preds')} for result in results],
+        'auc_mean': aucs.mean(),
+        'auc_std': aucs.std(),
+        'oof_auc': roc_auc_score(y, oof),
+        'final_rounds': rounds,
+        'calibration': options.get('calibration'),
+        'wall_seconds': time.perf_counter() - started,
+        'peak_rss_mb': max(_peak_rss_mb(), _peak_rss_mb(resource.RUSAGE_CHILDREN)),
+    }
+    with open(os.path.join(config['model_dir'], 'cv_report.json'), 'w') as f:
+        json.dump(report, f, indent=2, default=float)
+    print(f"Model ({rounds} rounds{', ' + options['calibration'] + ' calibration' if calibration else ''}) "
+          f"and imputer saved in {report['wall_seconds']:.2f}s, peak RSS {report['peak_rss_mb']:,.0f} MB.")
+    return report
+
+# ---------------- Hyperparameter Search ----------------
+# name -> (low, high, sampling); names are the LGBMClassifier ones, which lgb.train also accepts
+SEARCH_SPACE = {
+    'learning_rate': (0.01, 0.3, 'log'),
+    'num_leaves': (8, 256, 'int_log'),
+    'min_child_samples': (5, 200, 'int_log'),
+    'colsample_bytree': (0.5, 1.0, 'uniform'),
+    'subsample': (0.5, 1.0, 'uniform'),
+    'reg_alpha': (1e-8, 10.0, 'log'),
+    'reg_lambda': (1e-8, 10.0, 'log'),
+}
+# What model_params() takes from a tuned configuration: the searched tree
+# shape and regularization, and the bagging frequency sample_params() sets
+TUNED_PARAMS = set(SEARCH_SPACE) | {'subsample_freq'}
+
+def sample_params(rng):
+    """One random configuration from SEARCH_SPACE."""
+    params = {}
+    for name, (low, high, sampling) in SEARCH_SPACE.items():
+        if sampling == 'uniform':
+            params[name] = float(rng.uniform(low, high))
+        else:
+            value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            params[name] = int(round(value)) if sampling == 'int_log' else value
+    params['subsample_freq'] = 1    # bagging only happens with a frequency
+    return params
+
+def cached_tuning_datasets(df, config):
+    """
+    Paths of LightGBM Dataset binaries (train, valid) for a stratified split
+    of `df`, built once per distinct feature frame and split. Trials load
+    them instead of re-binning the features.
+    """
+    options = config['tuning']
+    y = df['target_default'].astype(int).values
+    X = df.drop(columns=['target_default'])
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(json.dumps([list(df.columns), options['valid_fraction'], config['random_state']]).encode())
+    cache_dir = os.path.join(config['model_dir'], 'tuning', 'datasets', digest.hexdigest()[:16])
+    paths = os.path.join(cache_dir, 'train.bin'), os.path.join(cache_dir, 'valid.bin')
+    if all(os.path.exists(path) for path in paths):
+        print(f"Using cached tuning datasets in {cache_dir}")
+        return paths
+
+    from sklearn.model_selection import train_test_split
+    train_idx, val_idx = train_test_split(np.arange(len(y)), test_size=options['valid_fraction'], stratify=y,
+                                          random_state=config['random_state'])
+    imputer = SimpleImputer(strategy='median')
+    X_train = imputer.fit_transform(X.iloc[train_idx])
+    X_val = imputer.transform(X.iloc[val_idx])
+    names = list(imputer.get_feature_names_out())
+    # feature_pre_filter off, so trials may use any min_child_samples with the same bins
+    dataset_params = {'feature_pre_filter': False, 'verbosity': -1}
+    train_set = lgb.Dataset(X_train, y[train_idx], feature_name=names, params=dataset_params)
+    valid_set = train_set.create_valid(X_val, y[val_idx])
+    ensure_dir(cache_dir)
+    for dataset, path in zip((train_set, valid_set), paths):
+        dataset.construct().save_binary(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+    print(f"Tuning datasets ({len(train_idx):,} train / {len(val_idx):,} valid rows) cached in {cache_dir}")
+    return paths
+
+class TrialPruned(Exception):
+    pass
+
+class MedianPruningCallback:
+    """
+    LightGBM callback: at each checkpoint round, records the trial's
+    validation AUC in `history` (shared by all worker processes) and raises
+    TrialPruned if it is below the median of at least `min_trials` others.
+    """
+    order = 30  # after early stopping's bookkeeping
+
+    def __init__(self, history, lock, checkpoints, min_trials):
+        self.history = history
+        self.lock = lock
+        self.checkpoints = set(checkpoints)
+        self.min_trials = min_trials
+
+    def __call__(self, env):
+        round_ = env.iteration + 1
+        if round_ not in self.checkpoints:
+            return
+        auc = next(result[2] for result in env.evaluation_result_list if result[1] == 'auc')
+        with self.lock:
+            others = self.history.get(round_, [])
+            self.history[round_] = others + [auc]
+        if len(others) >= self.min_trials and auc < np.median(others):
+            raise TrialPruned(round_, auc)
+
+_tuning = None
+
+def _init_tuning_worker(paths, history, lock):
+    global _tuning
+    _tuning = (paths, history, lock)
+
+def _run_trial(trial, params, base_params, options, num_threads):
+    """Trains one configuration on the cached datasets; returns its summary."""
+    started = time.perf_counter()
+    (train_path, valid_path), history, lock = _tuning
+    train_set = lgb.Dataset(train_path)
+    valid_set = lgb.Dataset(valid_path)   # binned with the training set's mappers when it was cached
+    checkpoints, round_ = [], options['prune_warmup']
+    while round_ < options['max_rounds']:
+        checkpoints.append(round_)
+        round_ *= 2
+    evals = {}
+    result = {'trial': trial, 'params': params, 'pruned_at': None}
+    try:
+        booster = lgb.train(
+            {**base_params, **params, 'metric': 'auc', 'num_threads': num_threads, 'verbosity': -1},
+            train_set, num_boost_round=options['max_rounds'], valid_sets=[valid_set],
+            callbacks=[lgb.early_stopping(options['early_stopping_rounds'], verbose=False),
+                       lgb.record_evaluation(evals),
+                       MedianPruningCallback(history, lock, checkpoints, options['prune_min_trials'])],
+        )
+        result.update(auc=booster.best_score['valid_0']['auc'], rounds=booster.best_iteration)
+    except TrialPruned as pruned:
+        round_, auc = pruned.args
+        aucs = evals['valid_0']['auc']
+        result.update(auc=max(aucs), rounds=int(np.argmax(aucs)) + 1, pruned_at=round_)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def save_best_params(config, best, trials, dataset_path):
+    """Writes models/tuning/best_params_vNNN.json and points models/best_params.json at it."""
+    tuning_dir = os.path.join(config['model_dir'], 'tuning')
+    ensure_dir(tuning_dir)
+    version = 1 + sum(1 for name in os.listdir(tuning_dir) if name.startswith('best_params_v'))
+    artifact = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'dataset': os.path.basename(os.path.dirname(dataset_path)),
+        'auc': best['auc'],
+        'params': best['params'],
+        'rounds': best['rounds'],   # where the best trial stopped on its validation split; not applied
+        'trials': trials,
+    }
+    path = os.path.join(tuning_dir, f'best_params_v{version:03d}.json')
+    with open(path, 'w') as f:
+        json.dump(artifact, f, indent=2)
+    latest = os.path.join(config['model_dir'], 'best_params.json')
+    with open(f"{latest}.tmp", 'w') as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(f"{latest}.tmp", latest)
+    return path
+
+def tune(df, config, n_trials=None):
+    """
+    Random search over SEARCH_SPACE with concurrent trials and median
+    pruning (see CONFIG['tuning']). Prints a leaderboard, saves the best
+    configuration as a versioned artifact and returns its path.
+    """
+    options = config['tuning']
+    n_trials = n_trials or options['n_trials']
+    started = time.perf_counter()
+    paths = cached_tuning_datasets(df, config)
+    cpus = os.cpu_count() or 1
+    workers = options.get('workers') or cpus
+    num_threads = options.get('num_threads') or max(1, cpus // workers)
+    base_params = {k: v for k, v in config['lgb_params'].items() if k not in ('n_estimators', 'metric')}
+    rng = np.random.default_rng(config['random_state'])
+    trial_args = [(trial, sample_params(rng), base_params, options, num_threads) for trial in range(1, n_trials + 1)]
+
+    print(f"Tuning: {n_trials} trials with {workers} worker(s) x {num_threads} LightGBM thread(s)")
+    with multiprocessing.Manager() as manager:
+        history, lock = manager.dict(), manager.Lock()
+        if workers == 1:
+            _init_tuning_worker(paths, history, lock)
+            results = [_run_trial(*args) for args in trial_args]
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_tuning_worker,
+                                     initargs=(paths, history, lock)) as pool:
+                results = list(pool.map(_run_trial, *zip(*trial_args)))
+
+    completed = sorted((r for r in results if r['pruned_at'] is None), key=lambda r: -r['auc'])
+    pruned = [r for r in results if r['pruned_at'] is not None]
+    if not completed:
+        raise RuntimeError("Every trial was pruned; lower prune_min_trials or raise prune_warmup.")
+    print(f"  {'Trial':<7}{'AUC':>8}{'Rounds':>8}{'Seconds':>9}  learning_rate / num_leaves")
+    for result in completed[:5]:
+        print(f"  {result['trial']:<7}{result['auc']:>8.4f}{result['rounds']:>8}{result['seconds']:>9.2f}  "
+              f"{result['params']['learning_rate']:.4f} / {result['params']['num_leaves']}")
+    best = completed[0]
+    path = save_best_params(config, best, results, paths[0])
+    print(f"{len(completed)} trials completed, {len(pruned)} pruned, in {time.perf_counter() - started:.2f}s. "
+          f"Best AUC {best['auc']:.4f} (trial {best['trial']}) saved to {path}")
+    return path
+
+# ---------------- Calibration ----------------
+def calibrate(probs, config):
+    """
+    Maps default probabilities to (integer scores, risk band labels) with the
+    points-to-double-the-odds scaling in config['calibration']. Vectorized.
+    """
+    cal = config['calibration']
+    factor = cal['pdo'] / np.log(2)
+    offset = cal['base_score'] - factor * np.log(cal['base_odds'])
+    probs = np.clip(np.asarray(probs, dtype=float), 1e-9, 1 - 1e-9)
+    points = offset + factor * np.log((1 - probs) / probs)
+    scores = np.clip(np.rint(points), cal['min_score'], cal['max_score']).astype(np.int16)
+
+    cuts, labels = zip(*cal['bands'])
+    if cuts[-1] is not None or None in cuts[:-1] or list(cuts[:-1]) != sorted(cuts[:-1], reverse=True):
+        raise ValueError("calibration bands must be in descending score order and end with (None, label)")
+    bands = np.select([scores >= cut for cut in cuts[:-1]], labels[:-1], default=labels[-1])
+    return scores, bands
+
+def calibrated_frame(ids, probs, config):
+    """beneficiary_id, default_prob, score and risk_band_class for one scored block."""
+    scores, bands = calibrate(probs, config)
+    return pd.DataFrame({'beneficiary_id': np.asarray(ids), 'default_prob': probs,
+                         'score': scores, 'risk_band_class': bands})
+
 # ---------------- Score Model ----------------
-def score_model(df, config, output='scored_output.csv'):
+def score_model(df, config, output='scored_output.csv', publish=False):
+    """
+    Scores every row of `df` into `output` (beneficiary_id, default_prob,
+    score, risk_band_class). With `publish`, also writes the files the API
+    serves (see ScorePublisher).
+    """
     model_path = os.path.join(config['model_dir'],'lgb_model.pkl')
     imputer_path = os.path.join(config['model_dir'],'imputer.pkl')
     if not os.path.exists(model_path) or not os.path.exists(imputer_path):
@@ -119,26 +823,239 @@ def score_model(df, config, output='scored_output.csv'):
 
     model = joblib.load(model_path)
     imputer = joblib.load(imputer_path)
+    calibration = load_calibration(config['model_dir'])
 
     ids = df.index
     X = imputer.transform(df.drop(columns=['target_default'], errors='ignore'))
-    preds = model.predict_proba(X)[:,1]
+    preds = apply_calibration(calibration, model.predict_proba(X)[:,1])
 
-    out = pd.DataFrame({'beneficiary_id': ids, 'default_prob': preds})
+    out = calibrated_frame(ids, preds, config)
     out.to_csv(output, index=False)
     print(f"Scored CSV saved at {output}")
+    if publish:
+        publisher = ScorePublisher(config)
+        publisher.write(out)
+        publisher.close()
+
+# ---------------- Batch Scoring ----------------
+def iter_feature_blocks(config, chunk_size):
+    """
+    The feature frame in blocks of `chunk_size` beneficiaries. The 'store'
+    source is read block by block, so memory stays bounded however large the
+    book. 'csv' and 'db' aggregate everything up front and are sliced.
+    """
+    if config.get('feature_source', 'csv') == 'store':
+        yield from iter_features_from_store(config, chunk_size)
+        return
+    df = load_features(config)
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+_worker_model = None
+
+def _init_scoring_worker(model_dir, num_threads):
+    """Process pool initializer: loads the model, imputer and calibration once per worker."""
+    global _worker_model
+    model = joblib.load(os.path.join(model_dir, 'lgb_model.pkl'))
+    imputer = joblib.load(os.path.join(model_dir, 'imputer.pkl'))
+    _worker_model = (model, imputer, load_calibration(model_dir), num_threads)
+
+def _score_block(X):
+    model, imputer, calibration, num_threads = _worker_model
+    return apply_calibration(calibration, model.predict_proba(imputer.transform(X), num_threads=num_threads)[:, 1])
+
+class ScoreWriter:
+    """
+    Appends blocks (DataFrames with the same columns) to a Parquet file (one
+    row group per block; needs pyarrow) or a CSV, chosen by the extension.
+    Writes go to a temporary file that replaces `path` on close(), so readers
+    never see a partial run.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.parquet = path.endswith('.parquet')
+        self.rows = 0
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa, self._pq = pa, pq
+            self._file = None   # opened with the first block's schema
+        else:
+            self._file = open(self.tmp_path, 'w', newline='')
+
+    def write(self, block):
+        if self.parquet:
+            table = self._pa.Table.from_pandas(block, preserve_index=False)
+            if self._file is None:
+                self._file = self._pq.ParquetWriter(self.tmp_path, table.schema)
+            self._file.write_table(table)
+        else:
+            block.to_csv(self._file, index=False, header=self.rows == 0)
+        self.rows += len(block)
+
+    def close(self):
+        if self._file is None:
+            raise ValueError(f"Nothing was scored; '{self.path}' not written.")
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            os.remove(self.tmp_path)
+
+class ScorePublisher:
+    """
+    Publishes scored blocks for the API in the same pass: the scores CSV
+    (beneficiary_id, score, risk_band_class), written incrementally, and on
+    close() the binary score index, built from compact arrays collected
+    along the way. The API servers are then told to switch over.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.csv = ScoreWriter(config['scores_csv'])
+        self.ids, self.scores, self.bands = [], [], []
+
+    def write(self, block):
+        self.csv.write(block[['beneficiary_id', 'score', 'risk_band_class']])
+        self.ids.append(block['beneficiary_id'].to_numpy(dtype=str))
+        self.scores.append(block['score'].to_numpy(dtype=np.int16))
+        self.bands.append(block['risk_band_class'].to_numpy(dtype=str))
+
+    def close(self):
+        from api.score_index import write_score_index
+        self.csv.close()
+        written = write_score_index(self.config['score_index'], np.concatenate(self.ids),
+                                    np.concatenate(self.scores), np.concatenate(self.bands))
+        print(f"Published {written:,} scores to {self.config['scores_csv']} and {self.config['score_index']}")
+        notify_api_servers()
+
+    def abort(self):
+        self.csv.abort()
+
+def batch_score(config, output='scored_output.csv', chunk_size=None, workers=None, num_threads=None,
+                publish=False):
+    """
+    score_model() for the whole book with bounded memory: feature blocks are
+    scored across a process pool, each worker running LightGBM with
+    `num_threads`, calibrated, and written to `output` (.parquet or .csv) as
+    they finish, in input order. At most two blocks per worker are in
+    flight. With `publish`, the API's score files are written in the same
+    pass. Prints and returns the throughput.
+    """
+    options = config.get('batch_scoring', {})
+    chunk_size = chunk_size or options.get('chunk_size') or 50000
+    cpus = os.cpu_count() or 1
+    workers = workers or options.get('workers') or cpus
+    num_threads = num_threads or options.get('num_threads') or max(1, cpus // workers)
+    model_dir = config['model_dir']
+    if not all(os.path.exists(os.path.join(model_dir, name)) for name in ('lgb_model.pkl', 'imputer.pkl')):
+        raise FileNotFoundError("Model or imputer not found. Train the model first.")
+
+    print(f"Batch scoring in blocks of {chunk_size:,} with {workers} worker(s) x {num_threads} LightGBM thread(s)")
+    started = time.perf_counter()
+    writers = [ScoreWriter(output)]
+    if publish:
+        writers.append(ScorePublisher(config))
+
+    blocks = 0
+    def emit(ids, probs):
+        nonlocal blocks
+        block = calibrated_frame(ids, probs, config)
+        for writer in writers:
+            writer.write(block)
+        blocks += 1
+
+    try:
+        if workers == 1:
+            _init_scoring_worker(model_dir, num_threads)
+            for df in iter_feature_blocks(config, chunk_size):
+                emit(df.index, _score_block(df.drop(columns=['target_default'], errors='ignore')))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_scoring_worker,
+                                     initargs=(model_dir, num_threads)) as pool:
+                pending = deque()
+                for df in iter_feature_blocks(config, chunk_size):
+                    X = df.drop(columns=['target_default'], errors='ignore')
+                    pending.append((df.index, pool.submit(_score_block, X)))
+                    if len(pending) >= workers * 2:
+                        ids, future = pending.popleft()
+                        emit(ids, future.result())
+                while pending:
+                    ids, future = pending.popleft()
+                    emit(ids, future.result())
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    for writer in writers:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    peak_mb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+    rows = writers[0].rows
+    report = {'rows': rows, 'blocks': blocks, 'seconds': elapsed,
+              'rows_per_sec': rows / elapsed if elapsed else 0.0, 'peak_rss_mb': peak_mb}
+    print(f"Scored {report['rows']:,} beneficiaries in {blocks} blocks in {elapsed:.2f}s "
+          f"({report['rows_per_sec']:,.0f} rows/sec, peak RSS {peak_mb:,.0f} MB) -> {output}")
+    return report
+
+# ---------------- Publish Scores ----------------
+def notify_api_servers():
+    """Tells the API servers (through the shared cache) to load the newly published scores."""
+    setup_django()
+    from api.http_cache import bump_generation
+    bump_generation('scores')
+
+def publish_score_index(config):
+    """
+    Writes the API's binary score index from the published scores CSV, then
+    tells the API servers to switch to it.
+    """
+    from api.score_index import build_from_csv
+    written = build_from_csv(config['scores_csv'], config['score_index'])
+    print(f"Score index with {written:,} beneficiaries saved at {config['score_index']}")
+    notify_api_servers()
 
 # ---------------- Main ----------------
-def main(mode='train', output=None):
+def main(mode='train', output=None, publish=False):
+    """
+    Runs one pipeline stage. The score modes only write `output`; `publish`
+    (a deploy step) also replaces the scores the API serves.
+    """
     print(f"Running in {mode} mode")
-    df = build_features(CONFIG)
+    if mode=='batch':
+        batch_score(CONFIG, output=output or 'scored_output.csv', publish=publish)
+        return
+    df = load_features(CONFIG)
     if mode=='train':
         train_model(df, CONFIG)
+    elif mode=='train_cv':
+        train_cv(df, CONFIG)
+    elif mode=='tune':
+        tune(df, CONFIG)
     elif mode=='score':
-        score_model(df, CONFIG, output=output or 'scored_output.csv')
+        score_model(df, CONFIG, output=output or 'scored_output.csv', publish=publish)
     else:
-        raise ValueError("Mode must be 'train' or 'score'")
+        raise ValueError("Mode must be 'train', 'train_cv', 'tune', 'score' or 'batch'")
 
 # ---------------- Example Jupyter usage ----------------
 # main(mode='train')
-# main(mode='score', output='my_score.csv')
\ No newline at end of file
+# main(mode='train_cv')  # parallel stratified K-fold with early stopping and calibration
+# main(mode='tune')  # hyperparameter search; later train/train_cv runs use models/best_params.json
+# main(mode='score', output='my_score.csv')
+# main(mode='batch', output='my_score.parquet')  # chunked, parallel; set feature_source='store' for bounded memory
+# main(mode='batch', publish=True)  # also replace the scores the API serves
+# publish_score_index(CONFIG)  # after replacing beneficiary_scores.csv by other means
+# compare_feature_sources(CONFIG, 'csv', 'db')  # parity of the database-backed features
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    if not 1 <= len(args) <= 2 or set(flags) - {'--publish'}:
+        print("Usage: python model.py train|train_cv|tune|score|batch [output] [--publish]")
+        print("  --publish also writes the score files the API serves (score and batch modes).")
+        sys.exit(1)
+    main(args[0], args[1] if len(args) == 2 else None, publish='--publish' in flags)